@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 import requests
 from fastapi import HTTPException
@@ -73,14 +73,15 @@ class AccountService:
             "grade": user.get("grade"),
         }
 
-    def _fetch_self_payload(self, cookie: str) -> Dict[str, Any]:
+    def _fetch_self_payload(self, cookie: str) -> Tuple[Dict[str, Any], bytes]:
+        """返回 (解析后的响应, 原始响应体)；原始响应体直接入库，免去再次序列化"""
         headers = self._build_stealth_headers(cookie)
         resp = requests.get("https://api.zsxq.com/v3/users/self", headers=headers, timeout=30)
         resp.raise_for_status()
         payload = resp.json()
         if not payload.get("succeeded"):
             raise HTTPException(status_code=400, detail="API returned failure")
-        return payload
+        return payload, resp.content
 
     def get_account_self(self, account_id: str) -> Dict[str, Any]:
         db = get_account_info_db()
@@ -97,9 +98,9 @@ class AccountService:
         if not cookie:
             raise HTTPException(status_code=400, detail="Account has no configured Cookie")
 
-        payload = self._fetch_self_payload(cookie)
+        payload, raw_body = self._fetch_self_payload(cookie)
         self_info = self._extract_self_info(payload)
-        db.upsert_self_info(account_id, self_info, raw_json=payload)
+        db.upsert_self_info(account_id, self_info, raw_json=raw_body)
         return {"self": db.get_self_info(account_id)}
 
     def refresh_account_self(self, account_id: str) -> Dict[str, Any]:
@@ -112,10 +113,10 @@ class AccountService:
         if not cookie:
             raise HTTPException(status_code=400, detail="Account has no configured Cookie")
 
-        payload = self._fetch_self_payload(cookie)
+        payload, raw_body = self._fetch_self_payload(cookie)
         self_info = self._extract_self_info(payload)
         db = get_account_info_db()
-        db.upsert_self_info(account_id, self_info, raw_json=payload)
+        db.upsert_self_info(account_id, self_info, raw_json=raw_body)
         return {"self": db.get_self_info(account_id)}
 
     def get_group_account_self(self, group_id: str) -> Dict[str, Any]:
@@ -131,9 +132,9 @@ class AccountService:
         if info:
             return {"self": info}
 
-        payload = self._fetch_self_payload(cookie)
+        payload, raw_body = self._fetch_self_payload(cookie)
         self_info = self._extract_self_info(payload)
-        db.upsert_self_info(account_id, self_info, raw_json=payload)
+        db.upsert_self_info(account_id, self_info, raw_json=raw_body)
         return {"self": db.get_self_info(account_id)}
 
     def refresh_group_account_self(self, group_id: str) -> Dict[str, Any]:
@@ -144,8 +145,8 @@ class AccountService:
         if not cookie:
             raise HTTPException(status_code=400, detail="未找到可用Cookie，请先配置账号或默认Cookie")
 
-        payload = self._fetch_self_payload(cookie)
+        payload, raw_body = self._fetch_self_payload(cookie)
         self_info = self._extract_self_info(payload)
         db = get_account_info_db()
-        db.upsert_self_info(account_id, self_info, raw_json=payload)
+        db.upsert_self_info(account_id, self_info, raw_json=raw_body)
         return {"self": db.get_self_info(account_id)}
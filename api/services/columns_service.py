@@ -10,6 +10,7 @@ from typing import Any, Dict, Optional
 import requests
 from fastapi import HTTPException
 
+from app.runtime.image_cache_manager import get_image_cache_manager
 from modules.accounts.accounts_sql_manager import get_accounts_sql_manager
 from modules.shared.db_path_manager import get_db_path_manager
 from modules.shared.logger_config import log_debug, log_error, log_exception, log_info
@@ -490,18 +491,26 @@ class ColumnsService:
                     if cache_images:
                         talk = topic_detail.get('talk', {}) if 'talk' in topic_detail else {}
                         topic_images = talk.get('images', [])
+                        pending_images = [
+                            (image.get('image_id'), image.get('original', {}).get('url'))
+                            for image in topic_images
+                        ]
+                        pending_images = [(image_id, url) for image_id, url in pending_images if image_id and url]
+
+                        if pending_images and not self.tasks.is_task_stopped(task_id):
+                            # 同一话题的图片并发下载，结果按原顺序写回数据库
+                            try:
+                                cache_manager = get_image_cache_manager(group_id)
+                                image_results = cache_manager.download_and_cache_many(
+                                    [url for _, url in pending_images]
+                                )
+                            except Exception as ie:
+                                log_exception(f"图片批量缓存失败: topic_id={topic_id}")
+                                self.tasks.append_log(task_id, f"      ⚠️ 图片缓存失败: {ie}")
+                                image_results = []
 
-                        for image in topic_images:
-                            if self.tasks.is_task_stopped(task_id):
-                                break
-
-                            original_url = image.get('original', {}).get('url')
-                            image_id = image.get('image_id')
-
-                            if original_url and image_id:
+                            for (image_id, original_url), (success, local_path, error_msg) in zip(pending_images, image_results):
                                 try:
-                                    cache_manager = get_image_cache_manager(group_id)
-                                    success, local_path, error_msg = cache_manager.download_and_cache(original_url)
                                     if success and local_path:
                                         db.update_image_local_path(image_id, str(local_path))
                                         images_count += 1
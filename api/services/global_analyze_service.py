@@ -266,7 +266,7 @@ class GlobalAnalyzePerformanceService:
                 )
 
                 try:
-                    get_global_analyzer().invalidate_cache()
+                    get_global_analyzer().invalidate_if_stale()
                     add_task_log(task_id, "🔄 全局统计缓存已刷新")
                 except Exception:
                     pass
@@ -444,7 +444,7 @@ class GlobalTaskService:
                         self._log(task_id, f"   ❌ 群组 {gid} 重算失败: {e}")
 
                 try:
-                    get_global_analyzer().invalidate_cache()
+                    get_global_analyzer().invalidate_if_stale()
                     self._log(task_id, "🔄 全局统计缓存已刷新")
                 except Exception:
                     pass
@@ -492,7 +492,7 @@ class GlobalTaskService:
                     self._log(task_id, f"⚠️ 失败群组: {len(failures)} 个")
 
                 try:
-                    get_global_analyzer().invalidate_cache()
+                    get_global_analyzer().invalidate_if_stale()
                     self._log(task_id, "🔄 全局统计缓存已刷新")
                 except Exception:
                     pass
@@ -462,7 +462,8 @@ class GroupService:
             from app.runtime.image_cache_manager import clear_group_cache_manager, get_image_cache_manager
 
             cache_manager = get_image_cache_manager(group_id)
-            ok, _ = cache_manager.clear_cache()
+            # 同步删除：随后要移除群组目录，不能留下后台删除中的旧缓存目录
+            ok, _ = cache_manager.clear_cache(wait=True)
             if ok:
                 details["images_cache_removed"] = True
             images_dir = os.path.join(group_dir, "images")
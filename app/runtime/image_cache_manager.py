@@ -1,29 +1,114 @@
 """
 图片缓存管理器
 负责下载、缓存和提供本地图片服务
+
+缓存文件名为 URL 的 blake2b-128 十六进制摘要（与旧版 MD5 文件名等长）；
+旧版以 MD5 命名的缓存文件仍可通过启动时的目录索引命中，无需迁移。
+新文件按缓存键前两位分片存放（ab/abcd....jpg）；升级前平铺在根目录的文件保留原位
+（数据库中已记录其本地路径），同样由目录索引命中。
 """
 
 import os
 import hashlib
+import shutil
+import threading
+from collections import OrderedDict
 import requests
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 import time
 
 
+# 图片批量下载共享线程池（各群组缓存管理器共用，工作线程按需创建）
+_download_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="image-cache")
+
+# 清空缓存时移走的旧目录（<缓存目录名>.old.<pid>.<ns>）-> 正在删除它的后台线程
+_pending_trash: Dict[str, threading.Thread] = {}
+_pending_trash_lock = threading.Lock()
+
+
+def _remove_trash_dir(path: str) -> None:
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+    finally:
+        with _pending_trash_lock:
+            _pending_trash.pop(path, None)
+
+
+def _schedule_trash_removal(path: str) -> None:
+    """后台删除旧缓存目录；同一目录已在删除中时不重复启动"""
+    with _pending_trash_lock:
+        if path in _pending_trash:
+            return
+        worker = threading.Thread(target=_remove_trash_dir, args=(path,), daemon=True)
+        _pending_trash[path] = worker
+        worker.start()
+
+
+@lru_cache(maxsize=8192)
+def _url_cache_key(url: str) -> str:
+    """URL 的缓存键（blake2b-128 十六进制）；热点URL直接命中记忆，不再重复编码与哈希"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16, usedforsecurity=False).hexdigest()
+
+
+@lru_cache(maxsize=8192)
+def _legacy_url_cache_key(url: str) -> str:
+    """旧版缓存键（MD5十六进制），仅用于命中升级前已缓存的文件"""
+    return hashlib.md5(url.encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+# URL 路径后缀 -> 缓存扩展名
+_EXT_BY_PATH_SUFFIX = {
+    'jpg': '.jpg',
+    'jpeg': '.jpg',
+    'png': '.png',
+    'gif': '.gif',
+    'webp': '.webp',
+    'bmp': '.bmp',
+}
+
+
+@lru_cache(maxsize=4096)
+def _url_path_extension(url: str) -> Optional[str]:
+    """从URL路径后缀推断缓存扩展名（无法识别时返回 None）；重复URL免去 urlparse"""
+    _, dot, suffix = urlparse(url).path.lower().rpartition('.')
+    return _EXT_BY_PATH_SUFFIX.get(suffix) if dot else None
+
+
+def hash_urls_batch(urls: Iterable[str]) -> List[str]:
+    """
+    批量计算URL的缓存键，结果同时写入缓存键记忆
+
+    Args:
+        urls: 图片URL序列
+
+    Returns:
+        与输入顺序一致的缓存键列表
+    """
+    return list(map(_url_cache_key, urls))
+
+
 class ImageCacheManager:
     """图片缓存管理器"""
 
-    def __init__(self, cache_dir: str = "cache/images"):
+    # 缓存文件可能使用的扩展名（按查找优先级）
+    CACHE_EXTENSIONS = ('.jpg', '.png', '.gif', '.webp', '.bmp')
+
+    def __init__(self, cache_dir: str = "cache/images", chunk_size: int = 256 * 1024):
         """
         初始化图片缓存管理器
 
         Args:
             cache_dir: 缓存目录路径
+            chunk_size: 下载时每次读取/写入的字节数
         """
         self.cache_dir = Path(cache_dir)
+        self.chunk_size = chunk_size
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         # 支持的图片格式
@@ -35,6 +120,8 @@ class ImageCacheManager:
             'image/webp': '.webp',
             'image/bmp': '.bmp'
         }
+        # 响应类型前缀判定用的元组，交给 str.startswith 在 C 层逐个比较
+        self._supported_ct_tuple = tuple(self.supported_formats)
         
         # 默认请求头
         self.headers = {
@@ -45,6 +132,99 @@ class ImageCacheManager:
             'Cache-Control': 'no-cache',
             'Pragma': 'no-cache'
         }
+
+        # 复用连接池，避免每张图片重新建立 TCP/TLS 连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # 缓存键 -> 已缓存文件路径，初始化时一次 scandir 建立，下载成功后增量写入
+        self._index: Dict[str, Path] = {}
+        self._index_lock = threading.Lock()
+        # 缓存文件数与总字节数：首次查询时扫描一次，之后随下载/清空增量维护；None 表示需重新扫描
+        self._totals: Optional[Tuple[int, int]] = None
+        self._rebuild_index()
+        self._sweep_stale_trash()
+
+    def _trash_prefix(self) -> str:
+        return f"{self.cache_dir.name}.old."
+
+    def _sweep_stale_trash(self) -> None:
+        """清理上次进程退出时未删完的旧缓存目录（后台线程随进程退出被中断时遗留）"""
+        prefix = self._trash_prefix()
+        try:
+            with os.scandir(self.cache_dir.parent) as entries:
+                stale = [entry.path for entry in entries if entry.name.startswith(prefix) and entry.is_dir()]
+        except OSError:
+            return
+        for path in stale:
+            _schedule_trash_removal(path)
+
+    def _shard_dir(self, cache_key: str) -> Path:
+        """缓存键所属的分片目录"""
+        return self.cache_dir / cache_key[:2]
+
+    def _iter_cache_files(self) -> Iterator[os.DirEntry]:
+        """遍历根目录（升级前的平铺文件）与两字符分片目录中的全部文件"""
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield entry
+                elif len(entry.name) == 2 and entry.is_dir():
+                    with os.scandir(entry.path) as shard_entries:
+                        for shard_entry in shard_entries:
+                            if shard_entry.is_file():
+                                yield shard_entry
+
+    def _rebuild_index(self) -> None:
+        """扫描缓存目录重建缓存文件索引"""
+        index: Dict[str, Path] = {}
+        try:
+            for entry in self._iter_cache_files():
+                cache_key, dot, ext = entry.name.partition('.')
+                if dot and f".{ext}" in self.CACHE_EXTENSIONS:
+                    index.setdefault(cache_key, Path(entry.path))
+        except OSError:
+            pass
+        with self._index_lock:
+            self._index = index
+
+    def _lookup_cached(self, cache_key: str) -> Optional[Path]:
+        """
+        查找缓存键对应的已缓存文件
+
+        索引未命中时回退在分片目录中逐个扩展名探测，兼容其他进程写入的缓存文件
+        """
+        cached = self._index.get(cache_key)
+        if cached is not None:
+            return cached
+        shard_dir = self._shard_dir(cache_key)
+        for ext in self.CACHE_EXTENSIONS:
+            cache_file = shard_dir / f"{cache_key}{ext}"
+            if cache_file.exists():
+                with self._index_lock:
+                    self._index[cache_key] = cache_file
+                    # 其他进程写入的文件，计数需重新扫描
+                    self._totals = None
+                return cache_file
+        return None
+
+    def _find_cached(self, url: str) -> Optional[Path]:
+        """查找URL对应的已缓存文件：先按当前缓存键，再按索引中的旧版 MD5 文件名"""
+        cached = self._lookup_cached(self._get_cache_key(url))
+        if cached is None and self._index:
+            cached = self._index.get(_legacy_url_cache_key(url))
+        return cached
+    
+    def prewarm(self, urls: Iterable[str]) -> None:
+        """
+        批量预计算一页图片URL的缓存键，后续查询直接命中记忆
+
+        Args:
+            urls: 图片URL序列
+        """
+        hash_urls_batch(url for url in urls if url)
     
     def _get_cache_key(self, url: str) -> str:
         """
@@ -56,7 +236,7 @@ class ImageCacheManager:
         Returns:
             缓存键（文件名前缀）
         """
-        return hashlib.md5(url.encode('utf-8')).hexdigest()
+        return _url_cache_key(url)
     
     def _get_file_extension(self, content_type: str, url: str) -> str:
         """
@@ -69,16 +249,15 @@ class ImageCacheManager:
         Returns:
             文件扩展名
         """
-        # 优先使用Content-Type
-        if content_type in self.supported_formats:
-            return self.supported_formats[content_type]
+        # 优先使用Content-Type（忽略 charset 等参数）
+        extension = self.supported_formats.get(content_type.partition(';')[0].strip())
+        if extension:
+            return extension
         
         # 从URL路径推断
-        parsed_url = urlparse(url)
-        path = parsed_url.path.lower()
-        for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp']:
-            if path.endswith(ext):
-                return ext if ext != '.jpeg' else '.jpg'
+        extension = _url_path_extension(url)
+        if extension:
+            return extension
         
         # 默认使用jpg
         return '.jpg'
@@ -97,14 +276,15 @@ class ImageCacheManager:
         cache_key = self._get_cache_key(url)
         
         # 如果已存在文件，直接返回
-        for ext in ['.jpg', '.png', '.gif', '.webp', '.bmp']:
-            existing_file = self.cache_dir / f"{cache_key}{ext}"
-            if existing_file.exists():
-                return existing_file
+        existing_file = self._find_cached(url)
+        if existing_file is not None:
+            return existing_file
         
-        # 生成新文件路径
+        # 生成新文件路径（按缓存键前缀分片）
         extension = self._get_file_extension(content_type or '', url)
-        return self.cache_dir / f"{cache_key}{extension}"
+        shard_dir = self._shard_dir(cache_key)
+        shard_dir.mkdir(exist_ok=True)
+        return shard_dir / f"{cache_key}{extension}"
     
     def is_cached(self, url: str) -> bool:
         """
@@ -119,15 +299,8 @@ class ImageCacheManager:
         if not url:
             return False
             
-        cache_key = self._get_cache_key(url)
-        
         # 检查是否存在任何格式的缓存文件
-        for ext in ['.jpg', '.png', '.gif', '.webp', '.bmp']:
-            cache_file = self.cache_dir / f"{cache_key}{ext}"
-            if cache_file.exists():
-                return True
-        
-        return False
+        return self._find_cached(url) is not None
     
     def get_cached_path(self, url: str) -> Optional[Path]:
         """
@@ -139,18 +312,10 @@ class ImageCacheManager:
         Returns:
             缓存文件路径，如果不存在则返回None
         """
-        if not self.is_cached(url):
+        if not url:
             return None
         
-        cache_key = self._get_cache_key(url)
-        
-        # 查找存在的缓存文件
-        for ext in ['.jpg', '.png', '.gif', '.webp', '.bmp']:
-            cache_file = self.cache_dir / f"{cache_key}{ext}"
-            if cache_file.exists():
-                return cache_file
-        
-        return None
+        return self._find_cached(url)
     
     def download_and_cache(self, url: str, timeout: int = 30) -> Tuple[bool, Optional[Path], Optional[str]]:
         """
@@ -167,29 +332,39 @@ class ImageCacheManager:
             return False, None, "URL为空"
         
         try:
-            # 检查是否已缓存
-            if self.is_cached(url):
-                cached_path = self.get_cached_path(url)
-                return True, cached_path, None
+            # 检查是否已缓存（索引中的文件可能已被外部删除，失效后重新下载）
+            cached_path = self.get_cached_path(url)
+            if cached_path is not None:
+                if cached_path.exists():
+                    return True, cached_path, None
+                with self._index_lock:
+                    self._index.pop(self._get_cache_key(url), None)
+                    self._index.pop(_legacy_url_cache_key(url), None)
+                    self._totals = None
             
             # 下载图片
-            response = requests.get(url, headers=self.headers, timeout=timeout, stream=True)
+            response = self.session.get(url, headers=self.headers, timeout=timeout, stream=True)
             response.raise_for_status()
             
             # 检查内容类型
             content_type = response.headers.get('content-type', '').lower()
-            if not any(fmt in content_type for fmt in self.supported_formats.keys()):
+            if not content_type.startswith(self._supported_ct_tuple):
                 return False, None, f"不支持的图片格式: {content_type}"
             
             # 获取缓存路径
             cache_path = self._get_cache_path(url, content_type)
             
             # 保存文件
+            written = 0
             with open(cache_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
                     if chunk:
-                        f.write(chunk)
+                        written += f.write(chunk)
             
+            with self._index_lock:
+                self._index[self._get_cache_key(url)] = cache_path
+                if self._totals is not None:
+                    self._totals = (self._totals[0] + 1, self._totals[1] + written)
             return True, cache_path, None
             
         except requests.exceptions.RequestException as e:
@@ -197,6 +372,28 @@ class ImageCacheManager:
         except Exception as e:
             return False, None, f"缓存失败: {str(e)}"
     
+    def download_and_cache_many(
+        self, urls: List[str], timeout: int = 30
+    ) -> List[Tuple[bool, Optional[Path], Optional[str]]]:
+        """
+        并发下载并缓存多张图片，已缓存的URL直接命中索引不发起请求
+
+        Args:
+            urls: 图片URL列表
+            timeout: 单张图片请求超时时间
+
+        Returns:
+            与输入顺序一致的 (是否成功, 缓存文件路径, 错误信息) 列表
+        """
+        self.prewarm(urls)
+        # 同一URL只下载一次，避免并发写同一缓存文件
+        unique_urls = list(dict.fromkeys(urls))
+        futures = {
+            url: _download_executor.submit(self.download_and_cache, url, timeout)
+            for url in unique_urls
+        }
+        return [futures[url].result() for url in urls]
+    
     def get_cache_info(self) -> dict:
         """
         获取缓存统计信息
@@ -211,13 +408,17 @@ class ImageCacheManager:
                 "cache_dir": str(self.cache_dir)
             }
         
-        total_files = 0
-        total_size = 0
-        
-        for file_path in self.cache_dir.iterdir():
-            if file_path.is_file():
+        totals = self._totals
+        if totals is None:
+            total_files = 0
+            total_size = 0
+            for entry in self._iter_cache_files():
                 total_files += 1
-                total_size += file_path.stat().st_size
+                total_size += entry.stat().st_size
+            totals = (total_files, total_size)
+            with self._index_lock:
+                self._totals = totals
+        total_files, total_size = totals
         
         return {
             "total_files": total_files,
@@ -226,10 +427,22 @@ class ImageCacheManager:
             "cache_dir": str(self.cache_dir)
         }
     
-    def clear_cache(self) -> Tuple[bool, str]:
+    def close(self) -> None:
+        """释放连接池与目录索引（实例被淘汰时调用）"""
+        try:
+            self.session.close()
+        except Exception:
+            pass
+        with self._index_lock:
+            self._index.clear()
+
+    def clear_cache(self, wait: bool = False) -> Tuple[bool, str]:
         """
         清空缓存
         
+        Args:
+            wait: 是否同步删除移走的旧目录（调用方随后要删除上级目录时传 True）
+
         Returns:
             (是否成功, 消息)
         """
@@ -237,20 +450,59 @@ class ImageCacheManager:
             if not self.cache_dir.exists():
                 return True, "缓存目录不存在"
             
-            deleted_count = 0
-            for file_path in self.cache_dir.iterdir():
-                if file_path.is_file():
-                    file_path.unlink()
-                    deleted_count += 1
+            totals = self._totals
+            if totals is not None:
+                deleted_count = totals[0]
+            else:
+                deleted_count = sum(1 for _ in self._iter_cache_files())
+
+            # 整个目录原子改名移走后在后台删除，清空耗时与文件数无关；改名失败（如 Windows 下目录被占用）时逐个删除
+            # 进程退出时未删完的旧目录由下次创建管理器时的 _sweep_stale_trash 接着清理
+            trash_dir = self.cache_dir.with_name(f"{self._trash_prefix()}{os.getpid()}.{time.time_ns()}")
+            try:
+                os.replace(self.cache_dir, trash_dir)
+            except OSError:
+                for entry in list(self._iter_cache_files()):
+                    os.unlink(entry.path)
+            else:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                if wait:
+                    shutil.rmtree(trash_dir, ignore_errors=True)
+                else:
+                    _schedule_trash_removal(str(trash_dir))
             
+            with self._index_lock:
+                self._index.clear()
+                self._totals = (0, 0)
             return True, f"已删除 {deleted_count} 个缓存文件"
             
         except Exception as e:
             return False, f"清空缓存失败: {str(e)}"
 
 
-# 全局缓存管理器实例字典，按群组ID存储
-_cache_managers = {}
+# 全局缓存管理器实例（LRU），按群组ID存储；超出上限时移出最久未用的实例
+_cache_managers: "OrderedDict[str, ImageCacheManager]" = OrderedDict()
+_cache_managers_lock = threading.Lock()
+_MAX_MANAGERS = 64
+
+
+def set_max_managers(n: int) -> None:
+    """设置缓存管理器实例上限（至少为 1），超出部分立即淘汰"""
+    global _MAX_MANAGERS
+    with _cache_managers_lock:
+        _MAX_MANAGERS = max(1, int(n))
+        _evict_overflow()
+
+
+def _evict_overflow() -> None:
+    """
+    淘汰超出上限的最久未用实例（调用方持有 _cache_managers_lock）
+
+    只移出注册表、不调用 close()：调用方可能仍持有该实例，清空其索引会使旧版 MD5 文件查不到而重复下载；
+    无人引用后由 GC 回收
+    """
+    while len(_cache_managers) > _MAX_MANAGERS:
+        _cache_managers.popitem(last=False)
 
 
 def get_image_cache_manager(group_id: str = None) -> ImageCacheManager:
@@ -263,27 +515,32 @@ def get_image_cache_manager(group_id: str = None) -> ImageCacheManager:
     Returns:
         图片缓存管理器实例
     """
-    global _cache_managers
+    key = group_id or 'default'
+    with _cache_managers_lock:
+        manager = _cache_managers.get(key)
+        if manager is not None:
+            _cache_managers.move_to_end(key)
+            return manager
 
-    if group_id:
-        # 使用群组专用缓存目录
-        if group_id not in _cache_managers:
+        if group_id:
+            # 使用群组专用缓存目录
             from modules.shared.db_path_manager import get_db_path_manager
             path_manager = get_db_path_manager()
             # 在群组数据库目录下创建images子目录
             db_dir = path_manager.get_group_data_dir(group_id)
             cache_dir = db_dir / "images"
-            _cache_managers[group_id] = ImageCacheManager(str(cache_dir))
-        return _cache_managers[group_id]
-    else:
-        # 使用默认全局缓存目录
-        if 'default' not in _cache_managers:
-            _cache_managers['default'] = ImageCacheManager()
-        return _cache_managers['default']
+            manager = ImageCacheManager(str(cache_dir))
+        else:
+            # 使用默认全局缓存目录
+            manager = ImageCacheManager()
+        _cache_managers[key] = manager
+        _evict_overflow()
+        return manager
 
 
 def clear_group_cache_manager(group_id: str):
     """清除指定群组的缓存管理器实例"""
-    global _cache_managers
-    if group_id in _cache_managers:
-        del _cache_managers[group_id]
+    with _cache_managers_lock:
+        manager = _cache_managers.pop(group_id, None)
+    if manager is not None:
+        manager.close()
@@ -420,7 +420,7 @@ class AutoScheduler:
 
                 try:
                     from modules.analyzers.global_analyzer import get_global_analyzer
-                    get_global_analyzer().invalidate_cache()
+                    get_global_analyzer().invalidate_if_stale()
                     self.log("🔄 全局缓存已刷新")
                 except Exception as e:
                     self.log(f"⚠️ 全局缓存刷新失败: {e}")
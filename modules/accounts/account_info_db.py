@@ -5,12 +5,58 @@ import os
 import json
 import sqlite3
 import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple, Union
 
 from modules.shared.db_path_manager import get_db_path_manager
+from modules.shared.logger_config import log_warning
 
-_lock = threading.Lock()
+# 原始响应：接口响应体（bytes/str，原样入库免去解码再编码）或已解析的字典
+RawJson = Union[bytes, str, Dict[str, Any], None]
+
+_lock = threading.RLock()  # 可重入：transaction() 内可再调用各写方法
+
+# WAL 模式下默认 NORMAL（不会损坏数据库，仅省去每次提交的 fsync）；需要最强持久性时设为 FULL
+_SYNCHRONOUS = os.environ.get("ACCOUNTS_DB_SYNCHRONOUS", "NORMAL").strip().upper()
+if _SYNCHRONOUS not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+    _SYNCHRONOUS = "NORMAL"
+
+_UPSERT_SELF_SQL = """
+    INSERT INTO accounts_self (account_id, uid, name, avatar_url, location, user_sid, grade, raw_json, fetched_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(account_id) DO UPDATE SET
+        uid=excluded.uid,
+        name=excluded.name,
+        avatar_url=excluded.avatar_url,
+        location=excluded.location,
+        user_sid=excluded.user_sid,
+        grade=excluded.grade,
+        raw_json=excluded.raw_json,
+        fetched_at=excluded.fetched_at
+"""
+
+
+class _ReaderHandle:
+    """线程本地读连接的持有者；仅存放在 threading.local 中，生命周期与所属线程一致"""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _release_reader(readers: List[sqlite3.Connection], readers_lock: threading.Lock, conn: sqlite3.Connection) -> None:
+    """关闭读连接并从登记表移除（close() 已统一关闭时仅为空操作）"""
+    with readers_lock:
+        try:
+            readers.remove(conn)
+        except ValueError:
+            pass
+    try:
+        conn.close()
+    except Exception:
+        pass
 
 
 def _ensure_dir(path: str):
@@ -24,6 +70,8 @@ class AccountInfoDB:
     账号信息数据库：持久化 /v3/users/self 的用户信息
     数据库存放路径：DatabasePathManager.get_config_db_path()
     表：accounts_self
+
+    写入走共享连接并由 _lock 串行；读取使用线程本地连接，WAL 下并发读互不阻塞。
     """
     def __init__(self, db_path: Optional[str] = None):
         pm = get_db_path_manager()
@@ -31,10 +79,31 @@ class AccountInfoDB:
         _ensure_dir(self.db_path)
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS};")
         self.conn.execute("PRAGMA foreign_keys=ON;")
         self.cursor = self.conn.cursor()
+        # transaction() 嵌套深度，>0 时写方法不单独提交
+        self._tx_depth = 0
+        # 线程本地只读连接，及其登记表（供 close 统一关闭）
+        self._tls = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
         self._ensure_schema()
 
+    def _reader(self) -> sqlite3.Connection:
+        """当前线程的读连接（首次使用时创建，线程退出时自动关闭）"""
+        handle = getattr(self._tls, "handle", None)
+        if handle is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA query_only=ON;")
+            handle = _ReaderHandle(conn)
+            self._tls.handle = handle
+            with self._readers_lock:
+                self._readers.append(conn)
+            # 线程退出时其线程本地数据随之释放，句柄被回收即关闭连接并注销，短命线程不会累积连接
+            weakref.finalize(handle, _release_reader, self._readers, self._readers_lock, conn)
+        return handle.conn
+
     def _ensure_schema(self):
         with _lock:
             self.cursor.execute(
@@ -54,77 +123,150 @@ class AccountInfoDB:
             )
             self.conn.commit()
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        在单个写事务内执行多次写入，退出时统一提交一次（异常时回滚）
+        事务内各写方法不再单独提交；嵌套调用以保存点实现，最外层退出时提交
+        """
+        with _lock:
+            if self._tx_depth:
+                # 嵌套层使用保存点：内层失败只回退自身写入，外层事务继续
+                savepoint = f"tx_{self._tx_depth}"
+                self.cursor.execute(f"SAVEPOINT {savepoint}")
+                self._tx_depth += 1
+                try:
+                    yield
+                except BaseException:
+                    self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                    self.cursor.execute(f"RELEASE {savepoint}")
+                    raise
+                else:
+                    self.cursor.execute(f"RELEASE {savepoint}")
+                finally:
+                    self._tx_depth -= 1
+                return
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._tx_depth = 0
+
+    def _commit(self) -> None:
+        """事务外立即提交；处于 transaction() 内时留待事务结束统一提交"""
+        if not self._tx_depth:
+            self.conn.commit()
+
     def upsert_self_info(
         self,
         account_id: str,
         self_info: Dict[str, Any],
-        raw_json: Optional[Dict[str, Any]] = None,
+        raw_json: RawJson = None,
     ):
         """
         保存/更新用户信息
         self_info 期望字段：uid, name, avatar_url, location, user_sid, grade
+        raw_json 可直接传入响应体 bytes/str，原样保存
         """
         if not account_id:
             raise ValueError("account_id 不能为空")
 
         now = datetime.now().isoformat(timespec="seconds")
-        raw_json_str = json.dumps(raw_json or {}, ensure_ascii=False)
+        with _lock:
+            self.cursor.execute(_UPSERT_SELF_SQL, self._self_info_params(account_id, self_info, raw_json, now))
+            self._commit()
+
+    def upsert_self_info_many(
+        self,
+        items: Iterable[Tuple[str, Dict[str, Any], RawJson]],
+    ) -> int:
+        """
+        批量保存/更新用户信息：单条 executemany + 一次提交
+        items 每项为 (account_id, self_info, raw_json)，返回写入条数
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        for account_id, self_info, raw_json in items:
+            if not account_id:
+                raise ValueError("account_id 不能为空")
+            rows.append(self._self_info_params(account_id, self_info, raw_json, now))
+        if not rows:
+            return 0
 
         with _lock:
-            self.cursor.execute(
-                """
-                INSERT INTO accounts_self (account_id, uid, name, avatar_url, location, user_sid, grade, raw_json, fetched_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(account_id) DO UPDATE SET
-                    uid=excluded.uid,
-                    name=excluded.name,
-                    avatar_url=excluded.avatar_url,
-                    location=excluded.location,
-                    user_sid=excluded.user_sid,
-                    grade=excluded.grade,
-                    raw_json=excluded.raw_json,
-                    fetched_at=excluded.fetched_at
-                """,
-                (
-                    account_id,
-                    self_info.get("uid"),
-                    self_info.get("name"),
-                    self_info.get("avatar_url"),
-                    self_info.get("location"),
-                    self_info.get("user_sid"),
-                    self_info.get("grade"),
-                    raw_json_str,
-                    now,
-                ),
-            )
-            self.conn.commit()
+            self.cursor.executemany(_UPSERT_SELF_SQL, rows)
+            self._commit()
+        return len(rows)
+
+    @staticmethod
+    def _self_info_params(
+        account_id: str,
+        self_info: Dict[str, Any],
+        raw_json: RawJson,
+        now: str,
+    ) -> Tuple:
+        return (
+            account_id,
+            self_info.get("uid"),
+            self_info.get("name"),
+            self_info.get("avatar_url"),
+            self_info.get("location"),
+            self_info.get("user_sid"),
+            self_info.get("grade"),
+            AccountInfoDB._encode_raw_json(raw_json),
+            now,
+        )
+
+    @staticmethod
+    def _encode_raw_json(raw_json: RawJson) -> str:
+        if isinstance(raw_json, bytes):
+            try:
+                return raw_json.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            # 非 UTF-8 响应体：json.loads 可识别 UTF-16/32，解析后按文本重新序列化
+            try:
+                text = json.dumps(json.loads(raw_json), ensure_ascii=False)
+            except ValueError:
+                text = raw_json.decode("utf-8", errors="replace")
+                log_warning(f"账号信息原始响应无法按 JSON 解码，已替换非法字节后保存（{len(raw_json)} 字节）")
+            else:
+                log_warning("账号信息原始响应不是 UTF-8 编码，已解析后按 UTF-8 文本保存")
+            return text
+        if isinstance(raw_json, str):
+            return raw_json
+        return json.dumps(raw_json or {}, ensure_ascii=False)
 
     def get_self_info(self, account_id: str) -> Optional[Dict[str, Any]]:
         if not account_id:
             return None
-        with _lock:
-            self.cursor.execute(
-                """
-                SELECT account_id, uid, name, avatar_url, location, user_sid, grade, raw_json, fetched_at
-                FROM accounts_self
-                WHERE account_id = ?
-                """,
-                (account_id,),
-            )
-            row = self.cursor.fetchone()
-            if not row:
-                return None
-            return {
-                "account_id": row[0],
-                "uid": row[1],
-                "name": row[2],
-                "avatar_url": row[3],
-                "location": row[4],
-                "user_sid": row[5],
-                "grade": row[6],
-                "raw_json": self._safe_load_json(row[7]),
-                "fetched_at": row[8],
-            }
+        row = self._reader().execute(
+            """
+            SELECT account_id, uid, name, avatar_url, location, user_sid, grade, raw_json, fetched_at
+            FROM accounts_self
+            WHERE account_id = ?
+            """,
+            (account_id,),
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            "account_id": row[0],
+            "uid": row[1],
+            "name": row[2],
+            "avatar_url": row[3],
+            "location": row[4],
+            "user_sid": row[5],
+            "grade": row[6],
+            "raw_json": self._safe_load_json(row[7]),
+            "fetched_at": row[8],
+        }
 
     def _safe_load_json(self, s: Optional[str]) -> Any:
         if not s:
@@ -144,6 +286,15 @@ class AccountInfoDB:
                 self.conn.close()
             except Exception:
                 pass
+        with self._readers_lock:
+            readers = list(self._readers)
+            self._readers.clear()
+        for conn in readers:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._tls = threading.local()
 
 
 _db_singleton: Optional[AccountInfoDB] = None
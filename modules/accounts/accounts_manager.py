@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""
+旧版 JSON 账号存储（已弃用，账号以 AccountsSQLManager 为准）
+仅供 migrate_accounts_to_sql 读取历史数据；每次变更为一次加锁的读-改-写。
+"""
+
 import os
 import json
 import time
@@ -8,7 +13,7 @@ import threading
 from typing import Dict, Any, List, Optional, Tuple
 from modules.shared.paths import PROJECT_ROOT, get_config_path
 
-_lock = threading.Lock()
+_lock = threading.RLock()  # 可重入：变更操作在持锁期间完成读取与写回
 
 
 _ACCOUNTS_FILE = str(get_config_path("accounts.json"))
@@ -50,6 +55,14 @@ def _read_data() -> Dict[str, Any]:
             return data
 
 
+def _pick_default(accounts: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """从账号列表中选出默认账号（无显式默认时取第一个）"""
+    default = next((a for a in accounts if a.get("is_default")), None)
+    if not default and accounts:
+        default = accounts[0]
+    return default
+
+
 def _write_data(data: Dict[str, Any]) -> None:
     """原子写入数据"""
     tmp_path = _ACCOUNTS_FILE + ".tmp"
@@ -59,11 +72,14 @@ def _write_data(data: Dict[str, Any]) -> None:
 
 
 def _mask_cookie(cookie: str) -> str:
-    """掩码显示 Cookie"""
-    if not cookie:
-        return ""
-    tail = cookie[-8:] if len(cookie) >= 8 else cookie
-    return f"***{tail}"
+    """掩码显示 Cookie（切片对短串同样成立，无需长度判断）"""
+    return f"***{cookie[-8:]}" if cookie else ""
+
+
+def _mask_in_place(acc: Dict[str, Any]) -> Dict[str, Any]:
+    """就地掩码：_read_data 返回的是独立副本，无需再复制账号字典"""
+    acc["cookie"] = _mask_cookie(acc.get("cookie", ""))
+    return acc
 
 
 def _now_iso() -> str:
@@ -79,12 +95,8 @@ def get_accounts(mask_cookie: bool = True) -> List[Dict[str, Any]]:
     data = _read_data()
     accounts = data.get("accounts", [])
     if mask_cookie:
-        safe = []
         for acc in accounts:
-            acc_copy = dict(acc)
-            acc_copy["cookie"] = _mask_cookie(acc_copy.get("cookie", ""))
-            safe.append(acc_copy)
-        return safe
+            _mask_in_place(acc)
     return accounts
 
 
@@ -93,11 +105,7 @@ def get_account_by_id(account_id: str, mask_cookie: bool = False) -> Optional[Di
     data = _read_data()
     for acc in data.get("accounts", []):
         if acc.get("id") == account_id:
-            if mask_cookie:
-                acc_cp = dict(acc)
-                acc_cp["cookie"] = _mask_cookie(acc_cp.get("cookie", ""))
-                return acc_cp
-            return acc
+            return _mask_in_place(acc) if mask_cookie else acc
     return None
 
 
@@ -106,86 +114,81 @@ def add_account(cookie: str, name: Optional[str] = None, make_default: bool = Fa
     if not cookie or not cookie.strip():
         raise ValueError("cookie 不能为空")
 
-    data = _read_data()
-    accounts = data.get("accounts", [])
-
-    account_id = f"acc_{int(time.time() * 1000)}"
-    acc = {
-        "id": account_id,
-        "name": name or f"账号{len(accounts) + 1}",
-        "cookie": cookie.strip(),
-        "created_at": _now_iso(),
-        "is_default": False,
-    }
-
-    if make_default or len(accounts) == 0:
-        # 设置为默认，并取消其他默认
-        for a in accounts:
-            a["is_default"] = False
-        acc["is_default"] = True
-
-    accounts.append(acc)
-    data["accounts"] = accounts
-    _write_data(data)
-    return acc
+    with _lock:
+        data = _read_data()
+        accounts = data.get("accounts", [])
+
+        account_id = f"acc_{int(time.time() * 1000)}"
+        acc = {
+            "id": account_id,
+            "name": name or f"账号{len(accounts) + 1}",
+            "cookie": cookie.strip(),
+            "created_at": _now_iso(),
+            "is_default": False,
+        }
+
+        if make_default or len(accounts) == 0:
+            # 设置为默认，并取消其他默认
+            for a in accounts:
+                a["is_default"] = False
+            acc["is_default"] = True
+
+        accounts.append(acc)
+        data["accounts"] = accounts
+        _write_data(data)
+        return acc
 
 
 def delete_account(account_id: str) -> bool:
     """删除账号，同时清理映射。如果删除默认账号，则将第一个账号设为默认（如存在）"""
-    data = _read_data()
-    accounts = data.get("accounts", [])
-    group_map = data.get("group_account_map", {})
+    with _lock:
+        data = _read_data()
+        accounts = data.get("accounts", [])
+        group_map = data.get("group_account_map", {})
 
-    idx = next((i for i, a in enumerate(accounts) if a.get("id") == account_id), None)
-    if idx is None:
-        return False
+        idx = next((i for i, a in enumerate(accounts) if a.get("id") == account_id), None)
+        if idx is None:
+            return False
 
-    was_default = accounts[idx].get("is_default", False)
-    accounts.pop(idx)
+        was_default = accounts[idx].get("is_default", False)
+        accounts.pop(idx)
 
-    # 清理映射
-    group_map = {gid: aid for gid, aid in group_map.items() if aid != account_id}
+        # 清理映射
+        group_map = {gid: aid for gid, aid in group_map.items() if aid != account_id}
 
-    # 若删除了默认账号，且仍有账号，则设置第一个为默认
-    if was_default and accounts:
-        for i, a in enumerate(accounts):
-            a["is_default"] = (i == 0)
+        # 若删除了默认账号，且仍有账号，则设置第一个为默认
+        if was_default and accounts:
+            for i, a in enumerate(accounts):
+                a["is_default"] = (i == 0)
 
-    data["accounts"] = accounts
-    data["group_account_map"] = group_map
-    _write_data(data)
-    return True
+        data["accounts"] = accounts
+        data["group_account_map"] = group_map
+        _write_data(data)
+        return True
 
 
 def set_default_account(account_id: str) -> bool:
     """设置默认账号"""
-    data = _read_data()
-    accounts = data.get("accounts", [])
-    if not any(a.get("id") == account_id for a in accounts):
-        return False
+    with _lock:
+        data = _read_data()
+        accounts = data.get("accounts", [])
+        if not any(a.get("id") == account_id for a in accounts):
+            return False
 
-    for a in accounts:
-        a["is_default"] = (a.get("id") == account_id)
+        for a in accounts:
+            a["is_default"] = (a.get("id") == account_id)
 
-    data["accounts"] = accounts
-    _write_data(data)
-    return True
+        data["accounts"] = accounts
+        _write_data(data)
+        return True
 
 
 def get_default_account(mask_cookie: bool = False) -> Optional[Dict[str, Any]]:
     """获取默认账号"""
-    data = _read_data()
-    accounts = data.get("accounts", [])
-    default = next((a for a in accounts if a.get("is_default")), None)
-    if not default and accounts:
-        default = accounts[0]
+    default = _pick_default(_read_data().get("accounts", []))
     if not default:
         return None
-    if mask_cookie:
-        cp = dict(default)
-        cp["cookie"] = _mask_cookie(cp.get("cookie", ""))
-        return cp
-    return default
+    return _mask_in_place(default) if mask_cookie else default
 
 
 def assign_group_account(group_id: str, account_id: str) -> Tuple[bool, str]:
@@ -193,15 +196,16 @@ def assign_group_account(group_id: str, account_id: str) -> Tuple[bool, str]:
     if not group_id:
         return False, "group_id 不能为空"
 
-    data = _read_data()
-    if not any(a.get("id") == account_id for a in data.get("accounts", [])):
-        return False, "账号不存在"
+    with _lock:
+        data = _read_data()
+        if not any(a.get("id") == account_id for a in data.get("accounts", [])):
+            return False, "账号不存在"
 
-    group_map = data.get("group_account_map", {})
-    group_map[str(group_id)] = account_id
-    data["group_account_map"] = group_map
-    _write_data(data)
-    return True, "分配成功"
+        group_map = data.get("group_account_map", {})
+        group_map[str(group_id)] = account_id
+        data["group_account_map"] = group_map
+        _write_data(data)
+        return True, "分配成功"
 
 
 def get_group_account_mapping() -> Dict[str, str]:
@@ -216,17 +220,15 @@ def get_account_for_group(group_id: str, mask_cookie: bool = False) -> Optional[
     group_map = data.get("group_account_map", {})
     acc_id = group_map.get(str(group_id))
     account = None
+    accounts = data.get("accounts", [])
     if acc_id:
-        account = next((a for a in data.get("accounts", []) if a.get("id") == acc_id), None)
+        account = next((a for a in accounts if a.get("id") == acc_id), None)
     if not account:
-        account = get_default_account(mask_cookie=False)
+        # 复用同一份快照，不再二次读取文件
+        account = _pick_default(accounts)
     if not account:
         return None
-    if mask_cookie:
-        cp = dict(account)
-        cp["cookie"] = _mask_cookie(cp.get("cookie", ""))
-        return cp
-    return account
+    return _mask_in_place(account) if mask_cookie else account
 
 
 def get_account_summary_for_group(group_id: str) -> Optional[Dict[str, Any]]:
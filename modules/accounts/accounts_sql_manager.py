@@ -9,14 +9,20 @@
 import os
 import sqlite3
 import threading
+from contextlib import contextmanager
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 from modules.shared.db_path_manager import get_db_path_manager
 
 _lock = threading.RLock()  # 使用可重入锁，避免同一线程重复获取锁导致死锁
 
+# WAL 模式下默认 NORMAL（不会损坏数据库，仅省去每次提交的 fsync）；需要最强持久性时设为 FULL
+_SYNCHRONOUS = os.environ.get("ACCOUNTS_DB_SYNCHRONOUS", "NORMAL").strip().upper()
+if _SYNCHRONOUS not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+    _SYNCHRONOUS = "NORMAL"
+
 
 def _ensure_dir(path: str):
     """确保目录存在"""
@@ -31,11 +37,8 @@ def _now_iso() -> str:
 
 
 def _mask_cookie(cookie: str) -> str:
-    """掩码显示 Cookie"""
-    if not cookie:
-        return ""
-    tail = cookie[-8:] if len(cookie) >= 8 else cookie
-    return f"***{tail}"
+    """掩码显示 Cookie（切片对短串同样成立，无需长度判断）"""
+    return f"***{cookie[-8:]}" if cookie else ""
 
 
 class AccountsSQLManager:
@@ -45,58 +48,161 @@ class AccountsSQLManager:
     表：accounts, group_account_map
     """
 
+    # 表结构版本，记录在 PRAGMA user_version；1 = accounts 含 updated_at 列
+    SCHEMA_VERSION = 1
+
     def __init__(self, db_path: Optional[str] = None):
         pm = get_db_path_manager()
         self.db_path = db_path or pm.get_config_db_path()
         _ensure_dir(self.db_path)
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(f"PRAGMA synchronous={_SYNCHRONOUS};")
         self.conn.execute("PRAGMA foreign_keys=ON;")
         self.cursor = self.conn.cursor()
+        # transaction() 嵌套深度，>0 时写方法不单独提交
+        self._tx_depth = 0
+        # 已分配的最大毫秒ID；保证本实例内连续写入生成的账号ID单调且不重复
+        self._last_id_ms = 0
         self._ensure_schema()
 
     def _ensure_schema(self):
-        """创建表结构"""
+        """创建表结构，并按 user_version 执行一次性升级"""
         with _lock:
-            # 账号表
-            self.cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS accounts (
-                    id TEXT PRIMARY KEY,
-                    name TEXT,
-                    cookie TEXT NOT NULL,
-                    is_default INTEGER DEFAULT 0,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT
+            # 已是当前版本时表与索引必然齐全，直接返回，不取写锁
+            self.cursor.execute("PRAGMA user_version")
+            if self.cursor.fetchone()[0] >= self.SCHEMA_VERSION:
+                return
+            # 建表、升级与版本号在同一写事务内原子提交；取得写锁后重读版本，其他进程可能已完成升级
+            self.cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # 账号表
+                self.cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS accounts (
+                        id TEXT PRIMARY KEY,
+                        name TEXT,
+                        cookie TEXT NOT NULL,
+                        is_default INTEGER DEFAULT 0,
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT
+                    )
+                    """
                 )
-                """
-            )
 
-            # 检查是否需要添加updated_at列（兼容旧表）
-            self.cursor.execute("PRAGMA table_info(accounts)")
-            columns = [row[1] for row in self.cursor.fetchall()]
-            if "updated_at" not in columns:
-                self.cursor.execute("ALTER TABLE accounts ADD COLUMN updated_at TEXT")
+                self.cursor.execute("PRAGMA user_version")
+                version = self.cursor.fetchone()[0]
+                if version < 1:
+                    # 未记录版本的旧表可能缺少 updated_at 列，仅在升级时检查一次
+                    self.cursor.execute("PRAGMA table_info(accounts)")
+                    columns = [row[1] for row in self.cursor.fetchall()]
+                    if "updated_at" not in columns:
+                        self.cursor.execute("ALTER TABLE accounts ADD COLUMN updated_at TEXT")
+
+                # 群组账号映射表
+                self.cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS group_account_map (
+                        group_id TEXT PRIMARY KEY,
+                        account_id TEXT NOT NULL,
+                        assigned_at TEXT NOT NULL,
+                        FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
+                    )
+                    """
+                )
+                # 创建索引
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_accounts_is_default ON accounts(is_default)"
+                )
+                self.cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_group_account_map_account_id ON group_account_map(account_id)"
+                )
+                if version < self.SCHEMA_VERSION:
+                    self.cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
                 self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
 
-            # 群组账号映射表
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        在单个写事务内执行多次写入，退出时统一提交一次（异常时回滚）
+        事务内各写方法不再单独提交；嵌套调用以保存点实现，最外层退出时提交
+        """
+        with _lock:
+            if self._tx_depth:
+                # 嵌套层使用保存点：内层失败只回退自身写入，外层事务继续
+                savepoint = f"tx_{self._tx_depth}"
+                self.cursor.execute(f"SAVEPOINT {savepoint}")
+                self._tx_depth += 1
+                try:
+                    yield
+                except BaseException:
+                    self.cursor.execute(f"ROLLBACK TO {savepoint}")
+                    self.cursor.execute(f"RELEASE {savepoint}")
+                    raise
+                else:
+                    self.cursor.execute(f"RELEASE {savepoint}")
+                finally:
+                    self._tx_depth -= 1
+                return
+            self.cursor.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            finally:
+                self._tx_depth = 0
+
+    @contextmanager
+    def fast_bulk_load(self) -> Iterator[None]:
+        """
+        一次性批量导入时临时关闭 fsync（synchronous=OFF）并将临时表放入内存，退出时恢复原值
+        掉电可能丢失刚提交的数据，仅供可重跑的迁移等场景显式启用；须在事务外进入
+        journal_mode 保持 WAL：切换需独占连接，且单事务导入下收益可忽略
+        """
+        with _lock:
+            synchronous = self.conn.execute("PRAGMA synchronous").fetchone()[0]
+            temp_store = self.conn.execute("PRAGMA temp_store").fetchone()[0]
+            self.conn.execute("PRAGMA synchronous=OFF")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            try:
+                yield
+            finally:
+                self.conn.execute(f"PRAGMA synchronous={int(synchronous)}")
+                self.conn.execute(f"PRAGMA temp_store={int(temp_store)}")
+
+    @contextmanager
+    def suspended_indexes(self) -> Iterator[None]:
+        """
+        批量导入期间暂时删除两张表的二级索引，退出时按原 DDL 一次性重建
+        主键/唯一约束的自动索引（sql 为空）保留；应在 transaction() 内使用，DDL 随事务原子生效
+        """
+        with _lock:
             self.cursor.execute(
                 """
-                CREATE TABLE IF NOT EXISTS group_account_map (
-                    group_id TEXT PRIMARY KEY,
-                    account_id TEXT NOT NULL,
-                    assigned_at TEXT NOT NULL,
-                    FOREIGN KEY (account_id) REFERENCES accounts(id) ON DELETE CASCADE
-                )
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND sql IS NOT NULL
+                  AND tbl_name IN ('accounts', 'group_account_map')
                 """
             )
-            # 创建索引
-            self.cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_accounts_is_default ON accounts(is_default)"
-            )
-            self.cursor.execute(
-                "CREATE INDEX IF NOT EXISTS idx_group_account_map_account_id ON group_account_map(account_id)"
-            )
+            indexes = self.cursor.fetchall()
+            for name, _ in indexes:
+                self.cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+            try:
+                yield
+            finally:
+                for _, sql in indexes:
+                    self.cursor.execute(sql)
+
+    def _commit(self) -> None:
+        """事务外立即提交；处于 transaction() 内时留待事务结束统一提交"""
+        if not self._tx_depth:
             self.conn.commit()
 
     def get_accounts(self, mask_cookie: bool = True) -> List[Dict[str, Any]]:
@@ -125,6 +231,12 @@ class AccountsSQLManager:
                 accounts.append(acc)
             return accounts
 
+    def count_accounts(self) -> int:
+        """账号总数（只计数，不读取 cookie 等列）"""
+        with _lock:
+            self.cursor.execute("SELECT COUNT(*) FROM accounts")
+            return self.cursor.fetchone()[0]
+
     def get_account_by_id(self, account_id: str, mask_cookie: bool = False) -> Optional[Dict[str, Any]]:
         """根据ID获取账号"""
         with _lock:
@@ -147,6 +259,16 @@ class AccountsSQLManager:
                 "updated_at": row[4],
             }
 
+    def _allocate_id_ms(self, count: int) -> int:
+        """
+        为 count 个新账号分配连续的毫秒ID，返回首个
+        优先向过去分配使末个ID落在当前毫秒；与上次分配重叠时顺延，快速连续写入也不会主键冲突
+        """
+        with _lock:
+            base_ms = max(int(time.time() * 1000) - count + 1, self._last_id_ms + 1)
+            self._last_id_ms = base_ms + max(count, 1) - 1
+            return base_ms
+
     def add_account(self, cookie: str, name: Optional[str] = None) -> Dict[str, Any]:
         """新增账号"""
         if not cookie or not cookie.strip():
@@ -154,7 +276,8 @@ class AccountsSQLManager:
 
         with _lock:
             # 生成账号ID
-            account_id = f"acc_{int(time.time() * 1000)}"
+            id_ms = self._allocate_id_ms(1)
+            account_id = f"acc_{id_ms}"
             now = _now_iso()
 
             # 插入新账号
@@ -165,27 +288,62 @@ class AccountsSQLManager:
                 """,
                 (
                     account_id,
-                    name or f"账号{int(time.time() * 1000) % 10000}",
+                    name or f"账号{id_ms % 10000}",
                     cookie.strip(),
                     now,
                 ),
             )
-            self.conn.commit()
+            self._commit()
 
             return self.get_account_by_id(account_id, mask_cookie=False)
 
+    def bulk_add_accounts(self, accounts: List[Dict[str, Any]]) -> List[str]:
+        """
+        批量新增账号：单条 executemany，一次提交
+        accounts 每项含 cookie，可选 name / is_default；返回按输入顺序生成的新账号ID
+        """
+        rows = []
+        now = _now_iso()
+        base_ms = self._allocate_id_ms(len(accounts))
+        for i, acc in enumerate(accounts):
+            cookie = (acc.get("cookie") or "").strip()
+            if not cookie:
+                raise ValueError("cookie cannot be empty")
+            id_ms = base_ms + i
+            rows.append((
+                f"acc_{id_ms}",
+                acc.get("name") or f"账号{id_ms % 10000}",
+                cookie,
+                1 if acc.get("is_default") else 0,
+                now,
+            ))
+        if not rows:
+            return []
+
+        with self.transaction():
+            self.cursor.executemany(
+                """
+                INSERT INTO accounts (id, name, cookie, is_default, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        return [row[0] for row in rows]
+
     def delete_account(self, account_id: str) -> bool:
         """删除账号，同时清理映射"""
         with _lock:
-            # 检查账号是否存在
-            account = self.get_account_by_id(account_id)
-            if not account:
-                return False
-
-            # 删除账号（级联删除映射）
+            # 删除账号（级联删除映射）；影响行数即可判断账号是否存在
             self.cursor.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
-            self.conn.commit()
-            return True
+            self._commit()
+            return self.cursor.rowcount > 0
+
+    def clear_all_accounts(self) -> int:
+        """清空全部账号及群组映射（同一事务内，先子表后主表），返回删除的账号数"""
+        with self.transaction():
+            self.cursor.execute("DELETE FROM group_account_map")
+            self.cursor.execute("DELETE FROM accounts")
+            return self.cursor.rowcount
 
     def get_first_account(self, mask_cookie: bool = False) -> Optional[Dict[str, Any]]:
         """获取第一个账号（按创建时间排序）"""
@@ -216,14 +374,39 @@ class AccountsSQLManager:
             return False, "group_id cannot be empty"
 
         with _lock:
-            # 检查账号是否存在
-            account = self.get_account_by_id(account_id)
-            if not account:
+            # 插入或更新映射；账号不存在时由外键约束拒绝，无需预先查询
+            now = _now_iso()
+            try:
+                self.cursor.execute(
+                    """
+                    INSERT INTO group_account_map (group_id, account_id, assigned_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(group_id) DO UPDATE SET
+                        account_id = excluded.account_id,
+                        assigned_at = excluded.assigned_at
+                    """,
+                    (str(group_id), account_id, now),
+                )
+            except sqlite3.IntegrityError:
+                # 约束失败只回退该语句；事务外回滚以释放隐式事务
+                if not self._tx_depth:
+                    self.conn.rollback()
                 return False, "Account does not exist"
+            self._commit()
+            return True, "Assignment successful"
 
-            # 插入或更新映射
-            now = _now_iso()
-            self.cursor.execute(
+    def bulk_assign_group_accounts(self, pairs: List[Tuple[str, str]]) -> int:
+        """
+        批量写入群组账号映射：单条 executemany，一次提交
+        pairs 为 [(group_id, account_id), ...]；任一账号不存在时外键约束使整批回滚
+        """
+        now = _now_iso()
+        rows = [(str(group_id), account_id, now) for group_id, account_id in pairs]
+        if not rows:
+            return 0
+
+        with self.transaction():
+            self.cursor.executemany(
                 """
                 INSERT INTO group_account_map (group_id, account_id, assigned_at)
                 VALUES (?, ?, ?)
@@ -231,10 +414,9 @@ class AccountsSQLManager:
                     account_id = excluded.account_id,
                     assigned_at = excluded.assigned_at
                 """,
-                (str(group_id), account_id, now),
+                rows,
             )
-            self.conn.commit()
-            return True, "Assignment successful"
+        return len(rows)
 
     def get_group_account_mapping(self) -> Dict[str, str]:
         """获取群组与账号ID映射"""
@@ -246,23 +428,27 @@ class AccountsSQLManager:
     def get_account_for_group(self, group_id: str, mask_cookie: bool = False) -> Optional[Dict[str, Any]]:
         """获取某群组使用的账号（优先映射，其次第一个账号）"""
         with _lock:
-            # 先查询映射
+            # 单条查询：映射账号排最前（按主键探测 group_account_map），无映射或账号已删除时退回最早创建的账号
             self.cursor.execute(
                 """
-                SELECT account_id FROM group_account_map
-                WHERE group_id = ?
+                SELECT id, name, cookie, created_at, updated_at
+                FROM accounts
+                ORDER BY id = (SELECT account_id FROM group_account_map WHERE group_id = ?) DESC,
+                         created_at ASC
+                LIMIT 1
                 """,
                 (str(group_id),),
             )
             row = self.cursor.fetchone()
-
-            if row:
-                account = self.get_account_by_id(row[0], mask_cookie=mask_cookie)
-                if account:
-                    return account
-
-            # 否则返回第一个账号
-            return self.get_first_account(mask_cookie=mask_cookie)
+            if not row:
+                return None
+            return {
+                "id": row[0],
+                "name": row[1],
+                "cookie": _mask_cookie(row[2]) if mask_cookie else row[2],
+                "created_at": row[3],
+                "updated_at": row[4],
+            }
 
     def get_account_summary_for_group(self, group_id: str) -> Optional[Dict[str, Any]]:
         """获取群组所属账号的摘要信息"""
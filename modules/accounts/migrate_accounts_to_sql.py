@@ -6,15 +6,45 @@
 将 config/accounts.json 中的账号数据迁移到 SQL 数据库
 """
 
-import json
+import argparse
+import shutil
+import sys
+from contextlib import nullcontext
 from modules.accounts.accounts_manager import get_accounts, get_group_account_mapping
 from modules.accounts.accounts_sql_manager import get_accounts_sql_manager
 from modules.shared.paths import get_config_path
 from loguru import logger
 
 
-def migrate_accounts():
-    """迁移账号数据"""
+def _bulk_add_bisect(sql_manager, accounts) -> dict:
+    """
+    批量写入账号，返回 {旧ID: 新ID}
+    整批失败时对半拆分递归重试（失败批次由保存点回滚），直至定位到单个问题账号并记录错误；
+    正常路径只有一次 executemany，没有逐行异常处理
+    """
+    if not accounts:
+        return {}
+    try:
+        new_ids = sql_manager.bulk_add_accounts(accounts)
+        return dict(zip((acc['id'] for acc in accounts), new_ids))
+    except Exception as e:
+        if len(accounts) == 1:
+            acc = accounts[0]
+            logger.error(f"迁移账号失败 {acc.get('name', acc['id'])}: {e}")
+            return {}
+    mid = len(accounts) // 2
+    id_mapping = _bulk_add_bisect(sql_manager, accounts[:mid])
+    id_mapping.update(_bulk_add_bisect(sql_manager, accounts[mid:]))
+    return id_mapping
+
+
+def migrate_accounts(reset_mode: str = "prompt", fast_unsafe: bool = False):
+    """
+    迁移账号数据
+    reset_mode: SQL 中已有账号时的处理方式；yes 清空后重新迁移，no 取消迁移，
+                prompt 交互询问（标准输入非终端时按 no 处理，避免无人值守时阻塞）
+    fast_unsafe: 迁移期间关闭 fsync（见 AccountsSQLManager.fast_bulk_load），结束后恢复
+    """
     logger.info("开始迁移账号数据...")
 
     try:
@@ -26,73 +56,65 @@ def migrate_accounts():
         group_mapping = get_group_account_mapping()
         logger.info(f"从 JSON 读取到 {len(group_mapping)} 个群组映射")
 
+        # 无账号可迁移时直接结束：群组映射均依赖新账号ID，不打开数据库、不开启事务
+        if not json_accounts:
+            logger.info("JSON 中没有账号，无需迁移")
+            return
+
         # 获取SQL管理器
         sql_manager = get_accounts_sql_manager()
 
         # 检查SQL中是否已有账号
-        existing_accounts = sql_manager.get_accounts(mask_cookie=False)
-        if existing_accounts:
-            logger.warning(f"SQL 数据库中已存在 {len(existing_accounts)} 个账号")
-            choice = input("是否清空现有账号并重新迁移? (y/N): ").strip().lower()
-            if choice != 'y':
-                logger.info("取消迁移")
+        wipe_existing = False
+        existing_count = sql_manager.count_accounts()
+        if existing_count:
+            logger.warning(f"SQL 数据库中已存在 {existing_count} 个账号")
+            if reset_mode == "prompt" and sys.stdin.isatty():
+                choice = input("是否清空现有账号并重新迁移? (y/N): ").strip().lower()
+                wipe_existing = choice == 'y'
+            else:
+                wipe_existing = reset_mode == "yes"
+            if not wipe_existing:
+                logger.info("取消迁移（如需清空后重新迁移，请使用 --reset yes）")
                 return
 
-            # 清空现有账号
-            logger.info("清空现有账号...")
-            for acc in existing_accounts:
-                sql_manager.delete_account(acc['id'])
-
-        # 迁移账号
-        migrated_count = 0
-        id_mapping = {}  # 保存旧ID到新ID的映射
-
-        for acc in json_accounts:
+        # 清空、账号与群组映射在同一事务内写入：中途失败时数据库保持迁移前状态
+        bulk_mode = sql_manager.fast_bulk_load() if fast_unsafe else nullcontext()
+        # 二级索引在导入结束后整体重建，代替逐行维护
+        with bulk_mode, sql_manager.transaction(), sql_manager.suspended_indexes():
+            if wipe_existing:
+                logger.info("清空现有账号...")
+                sql_manager.clear_all_accounts()
+
+            # 迁移账号：整批一次写入；失败时二分定位问题账号，其余账号照常写入
+            id_mapping = _bulk_add_bisect(sql_manager, json_accounts)  # 旧ID -> 新ID
+            migrated_count = len(id_mapping)
+
+            # 迁移群组映射：先换算新账号ID并剔除无对应账号的映射（汇总告警一次），再整批写入
+            pairs = [(g, id_mapping[a]) for g, a in group_mapping.items() if a in id_mapping]
+            orphans = [g for g, a in group_mapping.items() if a not in id_mapping]
+            if orphans:
+                logger.warning(f"跳过 {len(orphans)} 个映射账号未找到的群组: {orphans}")
+
+            mapped_count = 0
             try:
-                # 添加账号到SQL
-                new_acc = sql_manager.add_account(
-                    cookie=acc.get('cookie', ''),
-                    name=acc.get('name'),
-                    make_default=acc.get('is_default', False)
-                )
-                id_mapping[acc['id']] = new_acc['id']
-                logger.success(f"迁移账号: {acc.get('name', acc['id'])} -> {new_acc['id']}")
-                migrated_count += 1
+                mapped_count = sql_manager.bulk_assign_group_accounts(pairs)
             except Exception as e:
-                logger.error(f"迁移账号失败 {acc.get('name', acc['id'])}: {e}")
+                logger.error(f"迁移群组映射失败: {e}")
 
         logger.info(f"成功迁移 {migrated_count}/{len(json_accounts)} 个账号")
-
-        # 迁移群组映射
-        mapped_count = 0
-        for group_id, old_account_id in group_mapping.items():
-            try:
-                # 查找新的账号ID
-                new_account_id = id_mapping.get(old_account_id)
-                if not new_account_id:
-                    logger.warning(f"群组 {group_id} 映射的账号 {old_account_id} 未找到，跳过")
-                    continue
-
-                ok, msg = sql_manager.assign_group_account(group_id, new_account_id)
-                if ok:
-                    logger.success(f"迁移群组映射: group={group_id} -> account={new_account_id}")
-                    mapped_count += 1
-                else:
-                    logger.error(f"迁移群组映射失败: {msg}")
-            except Exception as e:
-                logger.error(f"迁移群组映射失败 group={group_id}: {e}")
-
         logger.info(f"成功迁移 {mapped_count}/{len(group_mapping)} 个群组映射")
+        # 逐条明细只在 DEBUG 级别输出；参数惰性求值，级别关闭时不做格式化
+        logger.opt(lazy=True).debug("账号ID映射: {}", lambda: id_mapping)
+        logger.opt(lazy=True).debug("群组映射: {}", lambda: pairs)
 
         # 备份JSON文件
         json_file = get_config_path("accounts.json")
         if json_file.exists():
             backup_file = json_file.with_suffix(".json.backup")
             logger.info(f"备份 JSON 文件到 {backup_file}")
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            with open(backup_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # 备份即原样复制：无需解析再序列化，copyfile 在 Linux 上走内核零拷贝
+            shutil.copyfile(json_file, backup_file)
 
         logger.success("迁移完成！")
         logger.info("提示：旧的 config/accounts.json 文件已备份为 config/accounts.json.backup")
@@ -103,5 +125,22 @@ def migrate_accounts():
         raise
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="将 config/accounts.json 中的账号迁移到 SQL 数据库")
+    parser.add_argument(
+        "--reset",
+        choices=("yes", "no", "prompt"),
+        default="prompt",
+        help="SQL 中已有账号时：yes 清空后重新迁移，no 取消，prompt 交互询问（默认）",
+    )
+    parser.add_argument(
+        "--fast-unsafe",
+        action="store_true",
+        help="迁移期间关闭 fsync 以加速写入（掉电可能丢失本次迁移，结束后自动恢复）",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    migrate_accounts()
+    args = parse_args()
+    migrate_accounts(reset_mode=args.reset, fast_unsafe=args.fast_unsafe)
@@ -5,26 +5,101 @@
 跨群组聚合股票提及、胜率、板块热度等数据
 """
 
+import atexit
 import sqlite3
 import os
+import sys
 import json
 import hashlib
+import operator
 import threading
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Any, Optional, Tuple, Set, TypedDict
-from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Any, Optional, Tuple, Set, TypedDict
+from collections import Counter, OrderedDict, defaultdict
 import concurrent.futures
 import time
+from contextlib import contextmanager
+from functools import lru_cache
 
 from modules.shared.db_path_manager import get_db_path_manager
 from modules.shared.logger_config import log_info, log_warning, log_error
-from modules.shared.stock_exclusion import is_excluded_stock
+from modules.shared.stock_exclusion import build_sql_exclusion_clause, is_excluded_stock
 from modules.shared.paths import get_config_path
 from modules.shared.market_data_store import MarketDataStore
 from modules.shared.t0_board import compute_session_trade_date, build_t0_dual_board
-from modules.analyzers.sector_heat import build_topic_time_filter, aggregate_sector_heat, match_sector_keywords
+from modules.analyzers.sector_heat import (
+    SectorMatcher,
+    aggregate_matched_sectors,
+    build_sector_matcher,
+    build_topic_time_filter,
+)
 
 BEIJING_TZ = timezone(timedelta(hours=8))
+# 缓存未命中哨兵（缓存值本身可能为 None/空列表）
+_CACHE_MISS = object()
+# 胜率排行可排序字段 -> C 实现的取值器（汇总字段均非空，无需 lambda 兜底 None）
+_WIN_RATE_SORT_KEYS = {
+    name: operator.itemgetter(name)
+    for name in ('win_rate', 'avg_return', 'mention_count', 'stock_code', 'avg_benchmark_return', 'latest_mention')
+}
+# 收益周期白名单：列名会拼进 SQL，必须限定在 mention_performance 的已知列内
+VALID_RETURN_PERIODS = ('return_1d', 'return_3d', 'return_5d', 'return_10d', 'return_20d')
+
+
+def normalize_return_period(return_period: Optional[str]) -> str:
+    """非法收益周期统一回落到 return_5d（与 StockAnalyzer 口径一致）"""
+    return return_period if return_period in VALID_RETURN_PERIODS else 'return_5d'
+
+
+@lru_cache(maxsize=64)
+def _win_rate_agg_sql(return_period: str, has_start: bool, has_end: bool, schema: str = '') -> str:
+    """按 (周期, 日期条件形态, 库别名) 生成并缓存单群胜率聚合 SQL，保证同形态语句文本稳定以命中语句缓存
+
+    每行为一个 (stock_code, stock_name) 的部分和，跨群合并在 Python 中完成。
+    schema 为 ATTACH 别名前缀（如 "g0."），默认查询主库。
+    """
+    excess_col = return_period.replace('return_', 'excess_return_')
+    date_clause = ''
+    if has_start:
+        date_clause += ' AND sm.mention_date >= ?'
+    if has_end:
+        date_clause += ' AND sm.mention_date <= ?'
+    return f'''
+                SELECT
+                    sm.stock_code,
+                    sm.stock_name,
+                    COUNT(*),
+                    SUM(CASE WHEN mp.{return_period} > 0 THEN 1 ELSE 0 END),
+                    SUM(mp.{return_period}),
+                    COUNT(mp.{excess_col}),
+                    SUM(mp.{return_period} - mp.{excess_col}),
+                    MAX(sm.mention_date)
+                FROM {schema}stock_mentions sm
+                JOIN {schema}mention_performance mp ON sm.id = mp.mention_id
+                WHERE mp.{return_period} IS NOT NULL{date_clause}
+                GROUP BY sm.stock_code, sm.stock_name
+            '''
+
+
+@lru_cache(maxsize=16)
+def _hot_words_agg_sql(schema: str = '', exclude_clause: str = '') -> str:
+    """单群热词聚合 SQL：同一话题下同一股票（代码缺失时按名称）仅计一次，每行为 (股票名, 话题数)
+
+    mention_time 为写入端的北京时间 ISO 串，截取到秒并统一日期时间分隔符后直接按字符串比较。
+    schema 为 ATTACH 别名前缀（如 "g0."），默认查询主库；参数为 (截止日期, 截止时刻 ISO 串)，
+    exclude_clause 为 build_sql_exclusion_clause 生成的排除条件，其参数紧随其后。
+    """
+    return f'''
+        SELECT name, COUNT(*) AS cnt FROM (
+            SELECT MIN(stock_name) AS name
+            FROM {schema}stock_mentions
+            WHERE mention_date >= ? AND stock_name != '' AND stock_name IS NOT NULL
+              AND REPLACE(SUBSTR(COALESCE(NULLIF(TRIM(mention_time), ''), mention_date), 1, 19), ' ', 'T') >= ?{exclude_clause}
+            GROUP BY topic_id, UPPER(TRIM(COALESCE(NULLIF(stock_code, ''), stock_name)))
+        )
+        GROUP BY name
+    '''
 
 
 class StockSignal(TypedDict):
@@ -36,12 +111,6 @@ class StockSignal(TypedDict):
     valid_returns: int
     positive_returns: int
 
-class StockData(TypedDict):
-    stock_name: str
-    detail_returns: List[float]
-    detail_dates: List[str]
-    detail_groups: List[str]
-
 class GlobalAnalyzer:
     """跨群组全局数据聚合引擎"""
     _init_lock = threading.RLock()
@@ -49,29 +118,159 @@ class GlobalAnalyzer:
     _events_refresh_state_lock = threading.RLock()
     _events_refresh_state: Dict[str, Dict[str, Any]] = {}
 
+    # 结果缓存条目上限（LRU 淘汰），避免不同参数组合无限累积
+    CACHE_MAX_ENTRIES = int(os.environ.get("GLOBAL_ANALYZER_CACHE_MAX_ENTRIES", "128"))
+    # 按群组库版本失效的缓存条目的兜底 TTL（秒）
+    FINALIZED_CACHE_TTL_SECONDS = int(os.environ.get("GLOBAL_ANALYZER_FINALIZED_CACHE_TTL_SECONDS", "900"))
+    # 群组列表（目录扫描 + 白黑名单过滤）的复用时长（秒）
+    GROUP_LIST_TTL_SECONDS = float(os.environ.get("GLOBAL_ANALYZER_GROUP_LIST_TTL_SECONDS", "30"))
+    # 单条连接 ATTACH 的群组库数量（SQLITE_LIMIT_ATTACHED 默认上限为 10）
+    ATTACH_BATCH_SIZE = 10
+    # 库文件存在性判定的复用时长（秒），免去每次遍历群组的 stat 系统调用
+    DB_EXISTS_TTL_SECONDS = float(os.environ.get("GLOBAL_ANALYZER_DB_EXISTS_TTL_SECONDS", "60"))
+    # 股票别名文件变更检查的间隔（秒），间隔内的搜索直接复用已加载索引
+    ALIAS_STAT_TTL_SECONDS = float(os.environ.get("GLOBAL_ANALYZER_ALIAS_STAT_TTL_SECONDS", "5"))
+    # 大结果集按批 fetchmany，减少逐行跨越 C/Python 边界的次数
+    FETCH_ARRAYSIZE = int(os.environ.get("GLOBAL_ANALYZER_FETCH_ARRAYSIZE", "2048"))
+    # 池化连接的页缓存上限（KiB）；连接常驻复用，缓存按需分配
+    CONN_CACHE_SIZE_KIB = int(os.environ.get("GLOBAL_ANALYZER_CONN_CACHE_KIB", "16384"))
+    # 常驻池化连接数上限（LRU 淘汰空闲连接）；页缓存总量不超过 CONN_POOL_MAX_ENTRIES * CONN_CACHE_SIZE_KIB
+    CONN_POOL_MAX_ENTRIES = int(os.environ.get("GLOBAL_ANALYZER_CONN_POOL_MAX_ENTRIES", "16"))
+    # IN (...) 单条语句的参数个数上限（兼容 SQLITE_MAX_VARIABLE_NUMBER=999 的旧版本）
+    IN_QUERY_CHUNK_SIZE = 900
+    # 跨群扫描共享线程池的工作线程数；SQLite 查询期间释放 GIL，I/O 密集可适度超配
+    IO_WORKERS = int(os.environ.get("GLOBAL_ANALYZER_IO_WORKERS", "32"))
+    # 话题板块分类记忆的条目上限（LRU 淘汰）
+    SECTOR_CACHE_MAX_ENTRIES = int(os.environ.get("GLOBAL_ANALYZER_SECTOR_CACHE_MAX_ENTRIES", "200000"))
+
     def __init__(self):
         self.db_path_manager = get_db_path_manager()
         self.market_store = MarketDataStore()
-        self._cache = {}
-        self._cache_time = {}
-        self._cache_ttl = 60  # 兼容旧路径默认TTL（秒）
-        self._cache_ttl_finalized = 900  # 非详情分析口径缓存（15分钟）
+        # 单表缓存：key -> (写入时刻 monotonic, TTL 秒, 群组库版本或 None, 数据)，一次查找取全条目
+        # 非详情分析口径缓存记录查询前的群组库版本，库有变更即失效，另有兜底 TTL
+        self._cache: "OrderedDict[str, Tuple[float, int, Optional[Tuple], Any]]" = OrderedDict()
+        self._cache_lock = threading.RLock()
+        self._cache_ttl = 60  # 随时间滑动的口径（热词）默认TTL（秒）
         self._cache_ttl_live = 60  # 详情实时口径缓存（60秒）
-        self._cache_ttl_by_key: Dict[str, int] = {}
         self._alias_mtime: float = -1.0
-        self._alias_to_std: Dict[str, str] = {}
-        self._std_to_aliases: Dict[str, Set[str]] = {}
+        # 上次检查别名文件的时刻 monotonic
+        self._alias_checked_at: float = float("-inf")
+        # 搜索词 -> 完整同义词集合（标准名与全部别名），加载时一次建好，查询仅一次字典查找
+        self._alias_expand: Dict[str, frozenset] = {}
+        # 按库复用的只读连接池（LRU）：db_key -> (conn, lock)，同一连接同一时刻仅一个线程使用
+        self._conn_pool: "OrderedDict[str, Tuple[sqlite3.Connection, threading.RLock]]" = OrderedDict()
+        self._conn_pool_lock = threading.Lock()
+        # 池化连接的借用计数：db_key -> 当前持有层数，仅在持有该连接锁时修改
+        self._conn_busy: Dict[str, int] = {}
+        # 话题板块分类记忆：(group_id, topic_id) -> 命中板块，跨时间窗口重算时免去重复扫描；LRU 限长
+        # 扫描线程只做无锁读取，写入与淘汰经 _remember_sectors 在锁内按批进行
+        self._sector_cache: "OrderedDict[Tuple[str, Any], Tuple[str, ...]]" = OrderedDict()
+        self._sector_cache_lock = threading.Lock()
+        # 作用域群组列表记忆：(口径指纹, 生成时刻, 群组列表)
+        self._group_list_cache: Optional[Tuple[str, float, List[Dict]]] = None
+        # 库文件存在性记忆：db_path -> (判定时刻 monotonic, 是否存在)
+        self._db_exists_cache: Dict[str, Tuple[float, bool]] = {}
+        # 群名记忆：group_id -> 群名，随 invalidate_cache 清空
+        self._group_name_cache: Dict[str, str] = {}
+        # 口径指纹记忆：(配置文件签名, 指纹)，签名不变时免去读文件与哈希
+        self._scope_fp_cache: Optional[Tuple[Tuple[int, int], str]] = None
+        # 上次 invalidate_if_stale 时各群库版本：group_id -> (db_path, 库签名, WAL 签名)
+        self._group_db_versions_seen: Dict[str, Tuple] = {}
+        # 跨群扫描共享线程池：避免每次调用重建线程；工作线程按需惰性创建
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, self.IO_WORKERS),
+            thread_name_prefix="global-analyzer",
+        )
 
-    def _is_cache_valid(self, key: str) -> bool:
-        if key not in self._cache_time:
-            return False
-        ttl = int(self._cache_ttl_by_key.get(key, self._cache_ttl))
-        return (datetime.now() - self._cache_time[key]).total_seconds() < ttl
+    @staticmethod
+    def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _get_group_db_versions(self) -> Dict[str, Tuple]:
+        """各群组库版本：group_id -> (db_path, 库签名, WAL 签名)。WAL 模式下提交先落在 -wal 文件，故两者都记录。"""
+        versions: Dict[str, Tuple] = {}
+        for group in self._get_all_group_dbs():
+            db_path = group.get('topics_db')
+            if not db_path:
+                continue
+            db_path = str(db_path)
+            signature = self._stat_signature(db_path)
+            if signature is not None and os.path.abspath(db_path) not in self._initialized_dbs:
+                # 首次访问的补表/补索引会改写库文件，先完成再取签名，避免版本快照刚取即过期
+                self._ensure_db_runtime_schema(db_path)
+                signature = self._stat_signature(db_path)
+            wal_signature = self._stat_signature(f"{db_path}-wal")
+            if wal_signature is not None and wal_signature[1] == 0:
+                # 空 WAL（读连接打开时创建或检查点截断后）不含未合并数据，与不存在等价
+                wal_signature = None
+            versions[str(group.get('group_id', ''))] = (db_path, signature, wal_signature)
+        return versions
+
+    def _get_db_version(self) -> Tuple:
+        """作用域内群组库的整体版本指纹"""
+        return tuple(sorted(self._get_group_db_versions().values()))
+
+    def _get_cached(self, key: str, db_version: Optional[Tuple] = None) -> Any:
+        """读取有效缓存，未命中或已失效返回 _CACHE_MISS。检查与读取合为一次查找，避免中途被淘汰。
+
+        db_version 为调用方已取得的当前群组库版本，传入时免去重复 stat。
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return _CACHE_MISS
+        stored_at, ttl, stored_version, data = entry
+        if time.monotonic() - stored_at >= ttl:
+            return _CACHE_MISS
+        if stored_version is not None:
+            current = db_version if db_version is not None else self._get_db_version()
+            if stored_version != current:
+                return _CACHE_MISS
+        # 命中即视为最近使用
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+        return data
 
-    def _set_cache(self, key: str, data: Any, ttl_seconds: Optional[int] = None):
-        self._cache[key] = data
-        self._cache_time[key] = datetime.now()
-        self._cache_ttl_by_key[key] = int(ttl_seconds if ttl_seconds is not None else self._cache_ttl)
+    def _set_cache(
+        self,
+        key: str,
+        data: Any,
+        ttl_seconds: Optional[int] = None,
+        db_version: Optional[Tuple] = None,
+    ):
+        """写入缓存。
+
+        db_version 须为查询开始前取得的群组库版本快照：查询期间若有写入，结果记在旧版本下，
+        下次读取即失效。带版本的条目另以 FINALIZED_CACHE_TTL_SECONDS 兜底过期，
+        防止 stat 签名未能反映的变更（如 mtime 精度不足）导致长期读到旧结果。
+        """
+        if ttl_seconds is None:
+            ttl_seconds = self.FINALIZED_CACHE_TTL_SECONDS if db_version is not None else self._cache_ttl
+        ttl = int(ttl_seconds)
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), ttl, db_version, data)
+            self._cache.move_to_end(key)
+            while len(self._cache) > max(1, self.CACHE_MAX_ENTRIES):
+                self._cache.popitem(last=False)
+
+    def _remember_sectors(self, fresh: Dict[Tuple[str, Any], Tuple[str, ...]], touched: List[Tuple[str, Any]]) -> None:
+        """并入一次扫描的板块分类：命中的键移到队尾，新分类追加，超出上限淘汰最久未用"""
+        with self._sector_cache_lock:
+            cache = self._sector_cache
+            for key in touched:
+                if key in cache:
+                    cache.move_to_end(key)
+            cache.update(fresh)
+            for _ in range(len(cache) - max(1, self.SECTOR_CACHE_MAX_ENTRIES)):
+                cache.popitem(last=False)
+
+    def _drop_cache(self, key: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(key, None)
 
     def _with_cache_hit(self, data: Any, cache_hit: bool) -> Any:
         if isinstance(data, dict):
@@ -81,10 +280,57 @@ class GlobalAnalyzer:
         return data
 
     def invalidate_cache(self):
-        """清除全部缓存（调度器每轮结束后调用）"""
-        self._cache.clear()
-        self._cache_time.clear()
-        self._cache_ttl_by_key.clear()
+        """清除全部缓存（调度器每轮结束后调用），并释放池化连接以感知库文件变更。"""
+        with self._cache_lock:
+            self._cache.clear()
+        with self._sector_cache_lock:
+            self._sector_cache.clear()
+        self._group_list_cache = None
+        self._group_name_cache.clear()
+        self._db_exists_cache.clear()
+        self._alias_checked_at = float("-inf")
+        self.close()
+
+    def invalidate_if_stale(self) -> int:
+        """按库版本精确失效：仅清除读集已变化的缓存，未变化的定稿结果保留。返回清除条目数。
+
+        定稿结果读取全部作用域群组，任一群组库变化即失效；TTL 类（实时）条目一并清除。
+        板块分类与群名记忆只丢弃库发生变化的群组。
+        """
+        self._group_list_cache = None
+        self._db_exists_cache.clear()
+        versions = self._get_group_db_versions()
+        current = tuple(sorted(versions.values()))
+        with self._cache_lock:
+            stale = [key for key, entry in self._cache.items() if entry[2] != current]
+            for key in stale:
+                self._drop_cache(key)
+
+        changed = {gid for gid, version in versions.items() if self._group_db_versions_seen.get(gid) != version}
+        # 已移出作用域的群组同样视为变化
+        changed |= set(self._group_db_versions_seen) - set(versions)
+        if changed:
+            with self._sector_cache_lock:
+                for key in [key for key in self._sector_cache if key[0] in changed]:
+                    del self._sector_cache[key]
+            for gid in changed:
+                self._group_name_cache.pop(gid, None)
+        self._group_db_versions_seen = versions
+        if stale or changed:
+            log_info(f"全局缓存按版本失效: 清除 {len(stale)} 条, 变化群组 {len(changed)} 个")
+        return len(stale)
+
+    def close(self) -> None:
+        """关闭全部池化连接；正在使用中的连接会等待其归还后再关闭。"""
+        with self._conn_pool_lock:
+            entries = list(self._conn_pool.values())
+            self._conn_pool.clear()
+        for conn, lock in entries:
+            with lock:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
 
     def get_data_anchor_date(self) -> str:
         """返回最近已固化交易日；若暂无固化数据则回退今天。"""
@@ -143,15 +389,21 @@ class GlobalAnalyzer:
         return payload
 
     def _get_scan_filter_fingerprint(self) -> str:
-        """基于 group_scan_filter 配置生成口径指纹。"""
+        """基于 group_scan_filter 配置生成口径指纹；按文件 (mtime, size) 记忆，仅配置变化时重读并哈希。"""
         try:
             from modules.shared.group_scan_filter import CONFIG_FILE
-            if not os.path.exists(CONFIG_FILE):
+            signature = self._stat_signature(CONFIG_FILE)
+            if signature is None:
                 return "nofile"
-            mtime = os.path.getmtime(CONFIG_FILE)
+            cached = self._scope_fp_cache
+            if cached is not None and cached[0] == signature:
+                return cached[1]
             with open(CONFIG_FILE, "rb") as f:
-                digest = hashlib.sha1(f.read()).hexdigest()[:12]
-            return f"{int(mtime)}-{digest}"
+                # 仅作内容变化判定，无需密码学强度；blake2b 为标准库中更快的哈希，6 字节即 12 位十六进制
+                digest = hashlib.blake2b(f.read(), digest_size=6).hexdigest()
+            fingerprint = f"{signature[0] // 1_000_000_000}-{digest}"
+            self._scope_fp_cache = (signature, fingerprint)
+            return fingerprint
         except Exception:
             return "unknown"
 
@@ -169,62 +421,83 @@ class GlobalAnalyzer:
             return groups
 
     def _get_all_group_dbs(self) -> List[Dict]:
-        """获取当前分析作用域群组信息（默认应用白黑名单）。"""
-        return self._get_scoped_group_dbs()
+        """获取当前分析作用域群组信息（默认应用白黑名单）。
+
+        目录扫描结果按口径指纹短时复用，避免每次请求/每次缓存校验都 listdir + stat。
+        """
+        fingerprint = self._get_scan_filter_fingerprint()
+        cached = self._group_list_cache
+        now = time.monotonic()
+        if cached and cached[0] == fingerprint and now - cached[1] < self.GROUP_LIST_TTL_SECONDS:
+            return list(cached[2])
+        groups = self._get_scoped_group_dbs()
+        self._group_list_cache = (fingerprint, now, groups)
+        return list(groups)
+
+    def _db_exists(self, db_path: str) -> bool:
+        """带短时记忆的库文件存在性判定；新建库最迟在 TTL 或下一次失效后可见。"""
+        now = time.monotonic()
+        cached = self._db_exists_cache.get(db_path)
+        if cached is not None and now - cached[0] < self.DB_EXISTS_TTL_SECONDS:
+            return cached[1]
+        exists = os.path.exists(db_path)
+        self._db_exists_cache[db_path] = (now, exists)
+        return exists
 
     def _load_stock_aliases(self):
-        """加载 config/stock_aliases.json，并构建别名/标准名双向索引。"""
+        """加载 config/stock_aliases.json，并构建 搜索词 -> 同义词集合 的展开索引。
+
+        文件变更按 ALIAS_STAT_TTL_SECONDS 间隔检查，每次检查仅一次 stat。
+        """
+        now = time.monotonic()
+        if now - self._alias_checked_at < self.ALIAS_STAT_TTL_SECONDS:
+            return
+        self._alias_checked_at = now
+
         alias_file = get_config_path("stock_aliases.json")
-        if not alias_file.exists():
+        try:
+            mtime = os.stat(alias_file).st_mtime
+        except OSError:
             self._alias_mtime = -1.0
-            self._alias_to_std = {}
-            self._std_to_aliases = {}
+            self._alias_expand = {}
             return
 
-        mtime = os.path.getmtime(alias_file)
         if mtime == self._alias_mtime:
             return
 
-        alias_to_std: Dict[str, str] = {}
         std_to_aliases: Dict[str, Set[str]] = defaultdict(set)
         try:
             with open(alias_file, "r", encoding="utf-8") as f:
                 raw = json.load(f)
             if isinstance(raw, dict):
                 for alias, std_name in raw.items():
-                    alias_norm = str(alias or "").strip().lower()
-                    std_norm = str(std_name or "").strip().lower()
+                    alias_norm = str(alias or "").strip().casefold()
+                    std_norm = str(std_name or "").strip().casefold()
                     if not alias_norm or not std_norm:
                         continue
-                    alias_to_std[alias_norm] = std_norm
                     std_to_aliases[std_norm].add(alias_norm)
         except Exception as e:
             log_warning(f"加载股票别名失败: {e}")
-            alias_to_std = {}
             std_to_aliases = defaultdict(set)
 
+        # 标准名与其每个别名都展开为同一组；某词同时是别名和标准名时取两组并集
+        alias_expand: Dict[str, Set[str]] = defaultdict(set)
+        for std_norm, aliases in std_to_aliases.items():
+            group = {std_norm, *aliases}
+            for term in group:
+                alias_expand[term] |= group
+
         self._alias_mtime = mtime
-        self._alias_to_std = alias_to_std
-        self._std_to_aliases = dict(std_to_aliases)
+        self._alias_expand = {term: frozenset(terms) for term, terms in alias_expand.items()}
 
     def _expand_stock_search_terms(self, keyword: str) -> Set[str]:
         """若搜索词是股票标准名/别名，扩展出同义词集合。"""
-        base = str(keyword or "").strip().lower()
+        base = str(keyword or "").strip().casefold()
         if not base:
             return set()
 
         self._load_stock_aliases()
-        terms: Set[str] = {base}
-
-        std_name = self._alias_to_std.get(base)
-        if std_name:
-            terms.add(std_name)
-            terms.update(self._std_to_aliases.get(std_name, set()))
-
-        if base in self._std_to_aliases:
-            terms.update(self._std_to_aliases.get(base, set()))
-
-        return {t for t in terms if t}
+        return {base, *self._alias_expand.get(base, ())}
 
     def _get_whitelist_group_ids(self) -> List[str]:
         """读取全局扫描白名单群组 ID 列表"""
@@ -238,19 +511,111 @@ class GlobalAnalyzer:
         except Exception:
             return []
 
-    def _get_conn(self, db_path: str):
-        """获取带 WAL 模式和超时的数据库连接。读路径优先只读连接。"""
-        self._ensure_db_runtime_schema(db_path)
+    def _open_conn(self, db_path: str) -> sqlite3.Connection:
+        """创建带 WAL 模式和超时的数据库连接。读路径优先只读连接。"""
         conn = None
         try:
             readonly_uri = f"file:{db_path}?mode=ro"
-            conn = sqlite3.connect(readonly_uri, uri=True, check_same_thread=False, timeout=30)
+            conn = sqlite3.connect(readonly_uri, uri=True, check_same_thread=False, timeout=30, isolation_level=None)
         except Exception:
-            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
         conn.execute('PRAGMA journal_mode=WAL')
         conn.execute('PRAGMA busy_timeout=30000')
+        conn.execute(f'PRAGMA cache_size=-{max(1, int(self.CONN_CACHE_SIZE_KIB))}')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA temp_store=MEMORY')
         return conn
 
+    @contextmanager
+    def _get_conn(self, db_path: str) -> Iterator[sqlite3.Connection]:
+        """借用池化连接：每个库仅建连并执行 PRAGMA 一次，语句缓存随连接复用。"""
+        self._ensure_db_runtime_schema(db_path)
+        db_key = os.path.abspath(db_path)
+        while True:
+            evicted: List[Tuple[sqlite3.Connection, threading.RLock]] = []
+            with self._conn_pool_lock:
+                entry = self._conn_pool.get(db_key)
+                if entry is None:
+                    entry = (self._open_conn(db_path), threading.RLock())
+                    self._conn_pool[db_key] = entry
+                    evicted = self._evict_idle_conns(keep=db_key)
+                else:
+                    self._conn_pool.move_to_end(db_key)
+            for old_conn, old_lock in evicted:
+                try:
+                    old_conn.close()
+                except Exception:
+                    pass
+                finally:
+                    old_lock.release()
+            conn, lock = entry
+            lock.acquire()
+            # close() 或淘汰可能在取到连接后、加锁前将其关闭，此时重新取
+            if self._conn_pool.get(db_key) is entry:
+                break
+            lock.release()
+        # 持锁期间计数，同一线程嵌套借用（RLock 可重入）时淘汰也不会误关
+        self._conn_busy[db_key] = self._conn_busy.get(db_key, 0) + 1
+        try:
+            yield conn
+        finally:
+            remaining = self._conn_busy[db_key] - 1
+            if remaining:
+                self._conn_busy[db_key] = remaining
+            else:
+                del self._conn_busy[db_key]
+            lock.release()
+
+    def _evict_idle_conns(self, keep: str) -> List[Tuple[sqlite3.Connection, threading.RLock]]:
+        """超出 CONN_POOL_MAX_ENTRIES 时从最久未用端移出空闲连接（调用方持有 _conn_pool_lock），keep 为刚建的连接。
+
+        返回的条目已加锁，由调用方在池锁外关闭并释放；使用中的连接跳过，池可暂时超出上限。
+        """
+        evicted: List[Tuple[sqlite3.Connection, threading.RLock]] = []
+        overflow = len(self._conn_pool) - max(1, self.CONN_POOL_MAX_ENTRIES)
+        if overflow <= 0:
+            return evicted
+        for key, (conn, lock) in list(self._conn_pool.items()):
+            if len(evicted) >= overflow:
+                break
+            if key == keep or self._conn_busy.get(key):
+                continue
+            if lock.acquire(blocking=False):
+                del self._conn_pool[key]
+                evicted.append((conn, lock))
+        return evicted
+
+    def _iter_group_batches(self, groups: List[Dict]) -> Iterator[List[Dict]]:
+        """按 ATTACH_BATCH_SIZE 切分群组列表"""
+        batch_size = max(1, int(self.ATTACH_BATCH_SIZE))
+        for offset in range(0, len(groups), batch_size):
+            yield groups[offset:offset + batch_size]
+
+    def _run_per_group(self, fn, items: List[Any]) -> List[Any]:
+        """在共享线程池中对每个群组（或群组批次）并行执行 fn，结果顺序与 items 一致；单项时直接在当前线程执行"""
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        return list(self._executor.map(fn, items))
+
+    @contextmanager
+    def _attached_group_batch(self, batch: List[Dict]) -> Iterator[Tuple[sqlite3.Connection, List[str]]]:
+        """内存连接只读 ATTACH 一批群组库，产出 (连接, 别名列表)；别名顺序与 batch 一致"""
+        for group in batch:
+            self._ensure_db_runtime_schema(group['topics_db'])
+
+        conn = sqlite3.connect('file::memory:', uri=True, check_same_thread=False, timeout=30, isolation_level=None)
+        try:
+            conn.execute('PRAGMA busy_timeout=30000')
+            aliases = []
+            for idx, group in enumerate(batch):
+                alias = f"g{idx}"
+                db_uri = f"{Path(os.path.abspath(group['topics_db'])).as_uri()}?mode=ro"
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (db_uri,))
+                aliases.append(alias)
+            yield conn, aliases
+        finally:
+            conn.close()
+
     def _ensure_db_runtime_schema(self, db_path: str) -> None:
         """每个数据库仅初始化一次：补齐表和索引，避免读路径重复 DDL。"""
         db_key = os.path.abspath(db_path)
@@ -266,7 +631,14 @@ class GlobalAnalyzer:
                 conn.execute('PRAGMA journal_mode=WAL')
                 conn.execute('PRAGMA busy_timeout=30000')
                 cursor = conn.cursor()
-                cursor.execute('''
+                # 先查 sqlite_master，只对缺失的表/索引执行 DDL；全部就绪时不写库、不提交
+                existing = {
+                    row[0] for row in cursor.execute(
+                        "SELECT name FROM sqlite_master WHERE type IN ('table', 'index')"
+                    )
+                }
+                table_sqls = {
+                    'stock_mentions': '''
                     CREATE TABLE IF NOT EXISTS stock_mentions (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         topic_id INTEGER NOT NULL,
@@ -278,8 +650,8 @@ class GlobalAnalyzer:
                         sentiment TEXT DEFAULT 'neutral',
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
-                ''')
-                cursor.execute('''
+                ''',
+                    'mention_performance': '''
                     CREATE TABLE IF NOT EXISTS mention_performance (
                         mention_id INTEGER PRIMARY KEY,
                         stock_code TEXT NOT NULL,
@@ -305,7 +677,13 @@ class GlobalAnalyzer:
                         max_drawdown REAL,
                         freeze_level INTEGER DEFAULT 0
                     )
-                ''')
+                ''',
+                }
+                ddl_ran = False
+                for name, stmt in table_sqls.items():
+                    if name not in existing:
+                        cursor.execute(stmt)
+                        ddl_ran = True
                 # 非破坏性索引补强
                 index_sqls = [
                     'CREATE INDEX IF NOT EXISTS idx_topics_create_time ON topics(create_time)',
@@ -313,13 +691,32 @@ class GlobalAnalyzer:
                     'CREATE INDEX IF NOT EXISTS idx_sm_mention_date ON stock_mentions(mention_date)',
                     'CREATE INDEX IF NOT EXISTS idx_sm_topic_stock ON stock_mentions(topic_id, stock_code)',
                     'CREATE INDEX IF NOT EXISTS idx_mp_mention_id ON mention_performance(mention_id)',
+                    # 覆盖索引：信号窗口聚合 (mention_date → stock_code) 不回表；
+                    # 单股事件按 stock_code 过滤并按 mention_time 倒序直接走索引序
+                    'CREATE INDEX IF NOT EXISTS idx_sm_date_code ON stock_mentions(mention_date, stock_code)',
+                    'CREATE INDEX IF NOT EXISTS idx_sm_code_time ON stock_mentions(stock_code, mention_time)',
+                    # 5 日收益是信号/概览的默认口径，宽表行不必整行读出
+                    'CREATE INDEX IF NOT EXISTS idx_mp_mention_ret5d ON mention_performance(mention_id, return_5d)',
+                    # 热词窗口聚合所读列全部在索引内，按日期范围只扫索引不回表
+                    'CREATE INDEX IF NOT EXISTS idx_sm_date_hotword ON stock_mentions'
+                    '(mention_date, topic_id, stock_code, stock_name, mention_time)',
                 ]
                 for stmt in index_sqls:
+                    # 语句形如 CREATE INDEX IF NOT EXISTS <name> ON ...
+                    if stmt.split()[5] in existing:
+                        continue
                     try:
                         cursor.execute(stmt)
+                        ddl_ran = True
                     except Exception:
                         pass
-                conn.commit()
+                if ddl_ran:
+                    conn.commit()
+                # 池化读连接为只读，规划器统计只能在这条可写初始化连接上刷新
+                try:
+                    cursor.execute('PRAGMA optimize')
+                except Exception:
+                    pass
             except Exception as e:
                 log_warning(f"初始化全局分析库失败(db={db_path}): {e}")
             finally:
@@ -328,37 +725,50 @@ class GlobalAnalyzer:
             self._initialized_dbs.add(db_key)
 
     def _query_all_groups(self, query: str, params: tuple = ()) -> List[tuple]:
-        """对所有群组数据库执行相同查询，合并结果"""
-        all_results = []
-        for group in self._get_all_group_dbs():
-            db_path = group['topics_db']
-            if not os.path.exists(db_path):
-                continue
+        """对所有群组数据库执行相同查询（各库并行），合并结果"""
+        def _query_group(group: Dict) -> List[tuple]:
             try:
-                conn = self._get_conn(db_path)
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                # 给每行添加 group_id
-                for row in rows:
-                    all_results.append((group['group_id'],) + row)
-                conn.close()
+                group_key = (group['group_id'],)
+                with self._get_conn(group['topics_db']) as conn:
+                    return [group_key + row for row in conn.execute(query, params)]
             except Exception as e:
                 log_warning(f"查询群组 {group['group_id']} 失败: {e}")
+                return []
+
+        groups = [g for g in self._get_all_group_dbs() if self._db_exists(g['topics_db'])]
+        all_results: List[tuple] = []
+        for rows in self._run_per_group(_query_group, groups):
+            all_results.extend(rows)
         return all_results
 
     def _get_group_name(self, conn, group_id: str) -> str:
         """获取群组名称（优先 topics DB，其次 group_meta.json）"""
+        cached = self._group_name_cache.get(str(group_id))
+        if cached is not None:
+            return cached
+        db_name = None
         try:
             cursor = conn.cursor()
             cursor.execute('SELECT name FROM groups WHERE group_id = ?', (group_id,))
             row = cursor.fetchone()
-            if row and row[0]:
-                name = str(row[0]).strip()
-                if name and name != str(group_id):
-                    return name
+            if row:
+                db_name = row[0]
         except Exception:
             pass
+        return self._resolve_group_name(group_id, db_name)
+
+    def _resolve_group_name(self, group_id: str, db_name: Any) -> str:
+        """由 topics DB 中读到的群名解析最终群名并记忆"""
+        name = self._lookup_group_name(group_id, db_name)
+        self._group_name_cache[str(group_id)] = name
+        return name
+
+    def _lookup_group_name(self, group_id: str, db_name: Any) -> str:
+        """群名解析：库内群名缺失或等于 group_id 时回退 group_meta.json"""
+        if db_name:
+            name = str(db_name).strip()
+            if name and name != str(group_id):
+                return name
 
         try:
             group_dir = self.db_path_manager.get_group_data_dir(str(group_id))
@@ -375,84 +785,47 @@ class GlobalAnalyzer:
 
     # ========== 全局统计 ==========
 
-    def _parse_mention_datetime(self, mention_time: Any, mention_date: Any) -> Optional[datetime]:
-        """尽量将提及时间解析为北京时间 datetime，失败返回 None。"""
-        if isinstance(mention_time, str) and mention_time.strip():
-            raw = mention_time.strip()
-            try:
-                if raw.endswith('+0800'):
-                    raw = raw[:-5] + '+08:00'
-                dt = datetime.fromisoformat(raw)
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=BEIJING_TZ)
-                else:
-                    dt = dt.astimezone(BEIJING_TZ)
-                return dt
-            except Exception:
-                pass
-
-        if isinstance(mention_date, str) and mention_date.strip():
-            raw_date = mention_date.strip()[:10]
-            try:
-                d = datetime.strptime(raw_date, "%Y-%m-%d")
-                return d.replace(tzinfo=BEIJING_TZ)
-            except Exception:
-                return None
-        return None
-
     def _collect_hot_words_for_window(self, window_hours: int, limit: int, normalize: bool) -> Dict[str, Any]:
         now = datetime.now(BEIJING_TZ)
         cutoff = now - timedelta(hours=window_hours)
         cutoff_date = cutoff.strftime('%Y-%m-%d')
+        cutoff_iso = cutoff.strftime('%Y-%m-%dT%H:%M:%S')
+        # 排除规则在去重计数前由 SQL 逐行过滤，被排除的提及不跨出 SQLite；
+        # 热词历来只按名称规则排除（is_excluded_stock(None, name)），代码规则不参与
+        exclude_clause, exclude_params = build_sql_exclusion_clause(None, 'stock_name')
+        window_params = (cutoff_date, cutoff_iso, *exclude_params)
 
-        word_counts: Dict[str, int] = defaultdict(int)
-        # 同一群组内同一话题下同一股票仅计一次，避免重复提及抬高热度
-        seen_topic_stock: set[tuple[str, Any, str]] = set()
-        query = '''
-            SELECT topic_id, stock_code, stock_name, mention_time, mention_date
-            FROM stock_mentions
-            WHERE mention_date >= ? AND stock_name != '' AND stock_name IS NOT NULL
-        '''
-        for group in self._get_all_group_dbs():
-            group_id = str(group.get('group_id', '')).strip()
-            db_path = group.get('topics_db')
-            if not group_id or not db_path or not os.path.exists(db_path):
-                continue
-
-            conn = None
+        def _group_word_counts(group: Dict) -> Dict[str, int]:
             try:
-                conn = self._get_conn(db_path)
-                cursor = conn.cursor()
-                cursor.execute(query, (cutoff_date,))
-                rows = cursor.fetchall()
-
-                for row in rows:
-                    topic_id = row[0] if len(row) > 0 else None
-                    stock_code = row[1] if len(row) > 1 else None
-                    stock_name = row[2] if len(row) > 2 else None
-                    mention_time = row[3] if len(row) > 3 else None
-                    mention_date = row[4] if len(row) > 4 else None
-
-                    dt = self._parse_mention_datetime(mention_time, mention_date)
-                    if dt is None or dt < cutoff:
-                        continue
-                    if is_excluded_stock(None, stock_name):
-                        continue
+                with self._get_conn(group['topics_db']) as conn:
+                    return dict(conn.execute(_hot_words_agg_sql('', exclude_clause), window_params))
+            except Exception as e:
+                log_warning(f"热词统计失败(group={group.get('group_id')}): {e}")
+                return {}
 
-                    dedup_key = (
-                        group_id,
-                        topic_id,
-                        str(stock_code or stock_name or '').strip().upper(),
-                    )
-                    if dedup_key in seen_topic_stock:
-                        continue
-                    seen_topic_stock.add(dedup_key)
-                    word_counts[str(stock_name)] += 1
+        def _batch_word_counts(batch: List[Dict]) -> Dict[str, int]:
+            # 一批群组库 ATTACH 后单条 UNION ALL：各群先在库内去重计数，再由外层按股票名合计
+            try:
+                with self._attached_group_batch(batch) as (conn, aliases):
+                    union_sql = ' UNION ALL '.join(_hot_words_agg_sql(f"{alias}.", exclude_clause) for alias in aliases)
+                    return dict(conn.execute(
+                        f"SELECT name, SUM(cnt) FROM ({union_sql}) GROUP BY name",
+                        window_params * len(aliases),
+                    ))
             except Exception as e:
-                log_warning(f"热词统计失败(group={group_id}): {e}")
-            finally:
-                if conn:
-                    conn.close()
+                log_warning(f"热词批量统计失败，逐库回退: {e}")
+                counts: Counter = Counter()
+                for group in batch:
+                    counts.update(_group_word_counts(group))
+                return counts
+
+        groups = [
+            g for g in self._get_all_group_dbs()
+            if str(g.get('group_id', '')).strip() and g.get('topics_db') and self._db_exists(g['topics_db'])
+        ]
+        word_counts: Counter = Counter()
+        for batch_counts in self._run_per_group(_batch_word_counts, list(self._iter_group_batches(groups))):
+            word_counts.update(batch_counts)
 
         words: List[Dict[str, Any]] = []
         all_points_total = int(sum(word_counts.values()))
@@ -506,13 +879,11 @@ class GlobalAnalyzer:
             f"global_hot_words_wh_{requested_window}_limit_{limit}_norm_{int(normalize)}_fb_{int(fallback)}_fws_{','.join(str(w) for w in windows_to_try)}"
         )
         if force_refresh:
-            if cache_key in self._cache:
-                del self._cache[cache_key]
-            if cache_key in self._cache_time:
-                del self._cache_time[cache_key]
+            self._drop_cache(cache_key)
 
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        cached = self._get_cached(cache_key)
+        if cached is not _CACHE_MISS:
+            return cached
 
         chosen_window = requested_window
         chosen_payload: Optional[Dict[str, Any]] = None
@@ -550,9 +921,11 @@ class GlobalAnalyzer:
         """全局统计概览"""
         anchor_date = self.get_data_anchor_date()
         cache_key = self._scoped_cache_key(f'global_stats_anchor_{anchor_date}')
-        if self._is_cache_valid(cache_key):
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
             return self._with_meta(
-                self._cache[cache_key],
+                cached,
                 cache_hit=True,
                 data_mode="finalized",
                 anchor_date=anchor_date,
@@ -560,50 +933,46 @@ class GlobalAnalyzer:
             )
 
         groups = self._get_all_group_dbs()
-        total_topics = 0
-        total_mentions = 0
-        total_stocks = set()
-        total_performance = 0
         group_count = len(groups)
+        existing = [g for g in groups if self._db_exists(g['topics_db'])]
+        batches = list(self._iter_group_batches(existing))
+        exact_count = len(batches) == 1
 
-        for group in groups:
-            db_path = group['topics_db']
-            if not os.path.exists(db_path):
-                continue
+        def _stats_batch(batch: List[Dict]) -> Tuple[List[int], Optional[int], Set[str]]:
+            # 各批次独立收集股票代码，并行执行时互不共享可变状态
+            batch_stocks: Set[str] = set()
             try:
-                conn = self._get_conn(db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('SELECT COUNT(*) FROM topics')
-                total_topics += cursor.fetchone()[0]
-
-                try:
-                    cursor.execute('SELECT COUNT(*) FROM stock_mentions')
-                    row = cursor.fetchone()
-                    total_mentions += row[0] if row else 0
-
-                    cursor.execute('SELECT DISTINCT stock_code FROM stock_mentions')
-                    for row in cursor.fetchall():
-                        total_stocks.add(row[0])
-
-                    cursor.execute('SELECT COUNT(*) FROM mention_performance')
-                    row = cursor.fetchone()
-                    total_performance += row[0] if row else 0
-                except Exception:
-                    pass  # stock_mentions 表可能不存在
-
-                conn.close()
+                counts, batch_unique = self._stats_attached_batch(batch, batch_stocks, exact_count=exact_count)
+                return counts, batch_unique, batch_stocks
             except Exception as e:
-                log_warning(f"统计群组 {group['group_id']} 失败: {e}")
+                log_warning(f"全局统计批量查询失败，逐库回退: {e}")
+                counts = [0, 0, 0]
+                for group in batch:
+                    group_counts = self._stats_single_group(group, batch_stocks)
+                    for idx, value in enumerate(group_counts):
+                        counts[idx] += value
+                return counts, None, batch_stocks
+
+        totals = [0, 0, 0]  # topics, mentions, performance
+        total_stocks: Set[str] = set()
+        unique_count: Optional[int] = None
+        for counts, batch_unique, batch_stocks in self._run_per_group(_stats_batch, batches):
+            for idx, value in enumerate(counts):
+                totals[idx] += value
+            unique_count = batch_unique
+            total_stocks |= batch_stocks
+        total_topics, total_mentions, total_performance = totals
+        if unique_count is None:
+            unique_count = len(total_stocks)
 
         result: Dict[str, Any] = {
             'group_count': group_count,
             'total_topics': total_topics,
             'total_mentions': total_mentions,
-            'unique_stocks': len(total_stocks),
+            'unique_stocks': unique_count,
             'total_performance': total_performance
         }
-        self._set_cache(cache_key, result, ttl_seconds=self._cache_ttl_finalized)
+        self._set_cache(cache_key, result, db_version=db_version)
         return self._with_meta(
             result,
             cache_hit=False,
@@ -612,6 +981,76 @@ class GlobalAnalyzer:
             effective_end_date=anchor_date,
         )
 
+    def _stats_attached_batch(
+        self,
+        batch: List[Dict],
+        total_stocks: Set[str],
+        exact_count: bool,
+    ) -> Tuple[List[int], Optional[int]]:
+        """ATTACH 一批群组库：一条语句取三项计数合计，一条 UNION 由 SQLite 去重股票代码。
+
+        exact_count=True（仅一批）时直接返回去重后的股票数；否则把本批去重结果并入 total_stocks。
+        """
+        with self._attached_group_batch(batch) as (conn, aliases):
+            count_parts = []
+            code_parts = []
+            for alias in aliases:
+                # 建库时已补齐提及/收益表；此处按 sqlite_master 判定表是否存在，热路径不靠异常分支
+                tables = {
+                    row[0] for row in conn.execute(
+                        f"SELECT name FROM {alias}.sqlite_master WHERE type='table' "
+                        "AND name IN ('topics', 'stock_mentions', 'mention_performance')"
+                    )
+                }
+                topics_expr = f"(SELECT COUNT(*) FROM {alias}.topics)" if 'topics' in tables else "0"
+                mentions_expr = f"(SELECT COUNT(*) FROM {alias}.stock_mentions)" if 'stock_mentions' in tables else "0"
+                perf_expr = (
+                    f"(SELECT COUNT(*) FROM {alias}.mention_performance)" if 'mention_performance' in tables else "0"
+                )
+                count_parts.append(f"SELECT {topics_expr} AS t, {mentions_expr} AS m, {perf_expr} AS p")
+                if 'stock_mentions' in tables:
+                    code_parts.append(f"SELECT stock_code FROM {alias}.stock_mentions")
+
+            topics_count, mentions_count, perf_count = conn.execute(
+                f"SELECT SUM(t), SUM(m), SUM(p) FROM ({' UNION ALL '.join(count_parts)})"
+            ).fetchone()
+            counts = [topics_count or 0, mentions_count or 0, perf_count or 0]
+
+            if not code_parts:
+                return counts, (0 if exact_count else None)
+            codes_sql = ' UNION '.join(code_parts)
+            if exact_count:
+                return counts, conn.execute(f"SELECT COUNT(*) FROM ({codes_sql})").fetchone()[0]
+            cursor = conn.execute(codes_sql)
+            cursor.arraysize = self.FETCH_ARRAYSIZE
+            while rows := cursor.fetchmany():
+                total_stocks.update(row[0] for row in rows)
+            return counts, None
+
+    def _stats_single_group(self, group: Dict, total_stocks: Set[str]) -> List[int]:
+        """单库统计（批量 ATTACH 失败时的回退路径），返回 [话题数, 提及数, 收益记录数]"""
+        try:
+            with self._get_conn(group['topics_db']) as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute('''
+                        SELECT
+                            (SELECT COUNT(*) FROM topics),
+                            (SELECT COUNT(*) FROM stock_mentions),
+                            (SELECT COUNT(*) FROM mention_performance)
+                    ''')
+                    topics_count, mentions_count, performance_count = cursor.fetchone()
+                except sqlite3.OperationalError:
+                    # stock_mentions / mention_performance 表可能不存在
+                    cursor.execute('SELECT COUNT(*) FROM topics')
+                    return [cursor.fetchone()[0], 0, 0]
+                cursor.execute('SELECT DISTINCT stock_code FROM stock_mentions')
+                total_stocks.update(row[0] for row in cursor)
+                return [topics_count, mentions_count, performance_count]
+        except Exception as e:
+            log_warning(f"统计群组 {group['group_id']} 失败: {e}")
+            return [0, 0, 0]
+
     # ========== 全局胜率排行 ==========
 
     def get_global_win_rate(self, min_mentions: int = 2,
@@ -627,6 +1066,7 @@ class GlobalAnalyzer:
         跨群组胜率排行 (支持过滤、排序、分页)
         优化：并行查询 + 内存过滤/排序
         """
+        return_period = normalize_return_period(return_period)
         effective_start, effective_end, anchor_date = self._normalize_finalized_date_window(
             start_date=start_date,
             end_date=end_date,
@@ -634,9 +1074,11 @@ class GlobalAnalyzer:
         cache_key = self._scoped_cache_key(
             f"global_win_rate_anchor_{anchor_date}_{min_mentions}_{return_period}_{limit}_{effective_start or ''}_{effective_end or ''}_{sort_by}_{order}_{page}_{page_size}"
         )
-        if self._is_cache_valid(cache_key):
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
             return self._with_meta(
-                self._cache[cache_key],
+                cached,
                 cache_hit=True,
                 data_mode="finalized",
                 anchor_date=anchor_date,
@@ -644,98 +1086,25 @@ class GlobalAnalyzer:
                 effective_end_date=effective_end,
             )
 
-        # 1. 获取全量数据 (仅按 min_mentions 缓存)
-        # return_period 也作为 key，因为 SQL 查询依赖它
-        raw_data = self._get_cached_raw_win_rate(
-            min_mentions,
+        # 1. 获取按排序字段排好序的全量汇总（与原始汇总同口径缓存，翻页/换阈值不再重排）
+        sorted_rows = self._get_sorted_raw_win_rate(
             return_period,
             effective_start,
             effective_end,
             anchor_date,
+            sort_by,
+            order,
         )
 
-        # 2. 内存过滤 (Date)
-        filtered_results = []
-        for item in raw_data:
-            if is_excluded_stock(item.get('stock_code'), item.get('stock_name')):
-                continue
-            # 检查日期过滤
-            # raw_data item 结构: {'stock_code':..., 'returns': [r1, r2...], 'dates': [d1, d2...]}
-            # 注意: 为了支持 date filter，我们需要在 raw data 里保留 mention_date
-            # 如果 start_date 存在，我们需要重新计算该股票在范围内的 win_rate
-            
-            if not effective_start and not effective_end:
-                # 无时间过滤，直接使用预计算好的统计值
-                filtered_results.append(item)
-                continue
-
-            # 有时间过滤：需要重新聚合该股票的 returns
-            valid_returns = []
-            valid_benchmark_returns = []
-            mention_count = 0
-            groups = set()
-            
-            for ret, date_str, gid, benchmark_ret in zip(
-                item.get('detail_returns', []),
-                item.get('detail_dates', []),
-                item.get('detail_groups', []),
-                item.get('detail_benchmark_returns', []),
-            ):
-                if effective_start and date_str < effective_start:
-                    continue
-                if effective_end and date_str > effective_end:
-                    continue
-                if ret is None:
-                    continue
-                valid_returns.append(ret)
-                mention_count += 1
-                groups.add(gid)
-                if benchmark_ret is not None:
-                    valid_benchmark_returns.append(benchmark_ret)
-            
-            if mention_count < min_mentions:
-                continue
-
-            positive = sum(1 for r in valid_returns if r > 0)
-            win_rate = positive / mention_count * 100 if mention_count > 0 else 0.0
-            avg_return = sum(valid_returns) / len(valid_returns) if valid_returns else 0.0
-            avg_benchmark_return = (
-                sum(valid_benchmark_returns) / len(valid_benchmark_returns)
-                if valid_benchmark_returns
-                else 0.0
-            )
+        # 2. 按提及阈值过滤并剔除排除股票（日期窗口已在 SQL 中生效，原始数据即窗口内统计）；过滤保持排序
+        filtered_results = [
+            item
+            for item in sorted_rows
+            if item['mention_count'] >= min_mentions
+            and not is_excluded_stock(item.get('stock_code'), item.get('stock_name'))
+        ]
 
-            filtered_results.append({
-                'stock_code': item['stock_code'],
-                'stock_name': item['stock_name'],
-                'mention_count': mention_count,
-                'total_mentions': mention_count,
-                'win_rate': round(win_rate, 1),
-                'avg_return': round(avg_return, 2),
-                'avg_benchmark_return': round(avg_benchmark_return, 2),
-                'latest_mention': item['latest_mention'],
-                'group_count': len(groups),
-                'groups': list(groups)
-            })
-
-        # 3. 排序
-        reverse = (order == 'desc')
-        key_map = {
-            'win_rate': 'win_rate', 
-            'avg_return': 'avg_return', 
-            'mention_count': 'mention_count',
-            'stock_code': 'stock_code',
-            'avg_benchmark_return': 'avg_benchmark_return',
-            'latest_mention': 'latest_mention'
-        }
-        sort_key = key_map.get(sort_by, 'win_rate')
-        
-        try:
-            filtered_results.sort(key=lambda x: x.get(sort_key, 0) if x.get(sort_key) is not None else 0, reverse=reverse)
-        except Exception:
-            filtered_results.sort(key=lambda x: x['win_rate'], reverse=True)
-
-        # 4. 分页
+        # 3. 分页窗口
         total_count = len(filtered_results)
         # 若设置了 limit，则对总数和分页窗口进行裁剪，避免翻页不生效
         if limit and limit > 0:
@@ -744,11 +1113,14 @@ class GlobalAnalyzer:
         if page < 1:
             page = 1
         start_idx = (page - 1) * page_size
-        if start_idx >= total_count:
-            paginated_data = []
-        else:
-            end_idx = min(start_idx + page_size, total_count)
-            paginated_data = filtered_results[start_idx:end_idx]
+        end_idx = min(start_idx + page_size, total_count)
+
+        # 4. 缓存中的原始行共享，仅复制当前页并把群组集合转为 list
+        paginated_data = []
+        for item in filtered_results[start_idx:end_idx]:
+            row = dict(item)
+            row['groups'] = list(row.get('groups') or ())
+            paginated_data.append(row)
 
         result = {
             'data': paginated_data,
@@ -756,7 +1128,7 @@ class GlobalAnalyzer:
             'page': page,
             'page_size': page_size
         }
-        self._set_cache(cache_key, result, ttl_seconds=self._cache_ttl_finalized)
+        self._set_cache(cache_key, result, db_version=db_version)
         return self._with_meta(
             result,
             cache_hit=False,
@@ -766,116 +1138,186 @@ class GlobalAnalyzer:
             effective_end_date=effective_end,
         )
 
+    def _get_sorted_raw_win_rate(
+        self,
+        return_period: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        anchor_date: Optional[str],
+        sort_by: str,
+        order: str,
+    ) -> List[Dict]:
+        """原始胜率汇总按 (排序字段, 方向) 全量排序一次并缓存，与原始汇总同按群组库版本失效
+
+        稳定排序，与 heapq.nlargest/nsmallest 取前 n 行的结果一致；各阈值、各页共用同一排序结果。
+        """
+        if sort_by not in _WIN_RATE_SORT_KEYS:
+            sort_by = 'win_rate'
+        descending = order == 'desc'
+        cache_key = self._scoped_cache_key(
+            f"raw_win_rate_sorted_anchor_{anchor_date or ''}_{return_period}_{start_date or ''}_{end_date or ''}"
+            f"_{sort_by}_{int(descending)}"
+        )
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return cached
+
+        raw_data = self._get_cached_raw_win_rate(return_period, start_date, end_date, anchor_date)
+        try:
+            rows = sorted(raw_data, key=_WIN_RATE_SORT_KEYS[sort_by], reverse=descending)
+        except Exception:
+            rows = sorted(raw_data, key=_WIN_RATE_SORT_KEYS['win_rate'], reverse=True)
+        self._set_cache(cache_key, rows, db_version=db_version)
+        return rows
+
     def _get_cached_raw_win_rate(
         self,
-        min_mentions: int,
         return_period: str,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         anchor_date: Optional[str] = None,
     ) -> List[Dict]:
-        """获取并缓存原始胜率数据（包含所有详细记录以便二次过滤）"""
+        """获取并缓存窗口内的逐股胜率汇总（聚合在各群 SQL 中完成，仅合并部分和）
+
+        汇总不含提及阈值，同一窗口下不同 min_mentions 的请求共用一份缓存。
+        """
         cache_key = self._scoped_cache_key(
-            f"raw_win_rate_anchor_{anchor_date or ''}_{return_period}_{min_mentions}_{start_date or ''}_{end_date or ''}"
+            f"raw_win_rate_anchor_{anchor_date or ''}_{return_period}_{start_date or ''}_{end_date or ''}"
         )
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return cached
 
         start_time = time.time()
         groups = self._get_all_group_dbs()
         
-        # 并行查询所有群组
+        # 按 ATTACH 批次并行查询，每批一条 UNION ALL
         all_rows = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_group = {
-                executor.submit(self._fetch_group_win_rate_data, g, return_period, start_date, end_date): g  # type: ignore
-                for g in groups
-            }
-            for future in concurrent.futures.as_completed(future_to_group):
-                try:
-                    rows = future.result()
-                    all_rows.extend(rows)
-                except Exception as e:
-                    g = future_to_group.get(future, {})
-                    log_warning(f"读取群组胜率数据失败: group={g.get('group_id')}, error={e}")
-
-        # Aggregate data and store details for in-memory processing
-        stock_map: Dict[str, StockData] = {}
-        
-        for r in all_rows:
-            # row: (code, name, return, date, excess_ret, group_id)
-            if not r: continue
-            code, name, ret, date_str, excess_ret, gid = r
-            
-            if code not in stock_map:
-                stock_map[code] = {
-                    'stock_name': '', 
-                    'latest_mention': '',
-                    'detail_returns': [], 
-                    'detail_dates': [],
-                    'detail_groups': [],
-                    'detail_benchmark_returns': []
-                } # type: ignore
-            d = stock_map[code]
-            
-            if not d['stock_name'] or (name and len(name) > len(d['stock_name'])):
-                d['stock_name'] = name
-            
-            if not d['latest_mention'] or date_str > d['latest_mention']: # type: ignore
-                d['latest_mention'] = date_str # type: ignore
-            
-            # 仅保留数值收益，避免 None/脏数据污染后续聚合
-            if ret is None:
-                continue
-            ret = float(ret)
-            d['detail_returns'].append(ret)
-            d['detail_dates'].append(date_str)
-            d['detail_groups'].append(gid)
-            d['detail_benchmark_returns'].append((ret - excess_ret) if (ret is not None and excess_ret is not None) else None) # type: ignore
+        future_to_batch = {
+            self._executor.submit(self._fetch_batch_win_rate_data, batch, return_period, start_date, end_date): batch  # type: ignore
+            for batch in self._iter_group_batches(groups)
+        }
+        for future in concurrent.futures.as_completed(future_to_batch):
+            try:
+                rows = future.result()
+                all_rows.extend(rows)
+            except Exception as e:
+                batch = future_to_batch.get(future, [])
+                log_warning(f"读取群组胜率数据失败: groups={[g.get('group_id') for g in batch]}, error={e}")
+
+        # 合并各群 SQL 部分和：(count, positive, ret_sum, benchmark_count, benchmark_sum)
+        names: Dict[str, str] = {}
+        latest: Dict[str, str] = {}
+        groups_by_code: Dict[str, Set[str]] = defaultdict(set)
+        totals: Dict[str, List[float]] = {}
+        names_get = names.get
+        latest_get = latest.get
+        intern = sys.intern
+
+        for code, name, count, positive, ret_sum, bench_count, bench_sum, latest_date, gid in all_rows:
+            # 各群库返回的同一代码/名称是独立字符串对象，驻留后缓存共享一份并走指针比较
+            code = intern(code)
+            cur_name = names_get(code)
+            if not cur_name or (name and len(name) > len(cur_name)):
+                names[code] = intern(name) if name else name
+
+            cur_latest = latest_get(code)
+            if not cur_latest or latest_date > cur_latest:
+                latest[code] = latest_date
+
+            groups_by_code[code].add(gid)
+            # WHERE 已排除空收益，COUNT/正收益数/收益和必非 NULL；仅基准和在无超额数据时为 NULL
+            acc = totals.get(code)
+            if acc is None:
+                totals[code] = [count, positive, ret_sum, bench_count, bench_sum or 0.0]
+            else:
+                acc[0] += count
+                acc[1] += positive
+                acc[2] += ret_sum
+                acc[3] += bench_count
+                acc[4] += bench_sum or 0.0
 
-        # 转换为列表
         results = []
-        for code, d in stock_map.items():
-            # 这里先不做 min_mentions 过滤，因为 date filter 后 mention 可能减少
-            # 但为了缓存不过大，可以先过滤掉极其冷门的（比如 total < min_mentions）
-            # 不过为了准确性，全量保留最稳妥
-            
-            # 计算无过滤时的默认值
-            valid_returns = [x for x in d['detail_returns'] if x is not None]
-            total = len(valid_returns)
-            if total < min_mentions:
+        for code, stock_name in names.items():
+            total, positive, ret_sum, bench_count, bench_sum = totals[code]
+            if is_excluded_stock(code, stock_name):
                 continue
-            if is_excluded_stock(code, d.get('stock_name')):
-                continue
-                
-            positive = sum(1 for x in valid_returns if x > 0)
-            win_rate = float(positive) / total * 100 if total > 0 else 0.0
-            avg_return = float(sum(valid_returns)) / len(valid_returns) if total > 0 else 0.0
-            avg_benchmark_return = float(sum([x for x in d['detail_benchmark_returns'] if x is not None])) / len([x for x in d['detail_benchmark_returns'] if x is not None]) if len([x for x in d['detail_benchmark_returns'] if x is not None]) > 0 else 0.0 # type: ignore
-            
+
+            win_rate, avg_return, avg_benchmark_return = self._summarize_returns(
+                total, positive, ret_sum, bench_count, bench_sum
+            )
+            groups = groups_by_code[code]
             results.append({
                 'stock_code': code,
-                'stock_name': d['stock_name'],
+                'stock_name': stock_name,
                 'mention_count': total,
                 'total_mentions': total,
                 'win_rate': round(float(win_rate), 1),
                 'avg_return': round(float(avg_return), 2),
                 'avg_benchmark_return': round(float(avg_benchmark_return), 2),
-                'latest_mention': d['latest_mention'], # type: ignore
-                'group_count': len(set(d['detail_groups'])),
-                # 保留详情供后续过滤
-                'detail_returns': d['detail_returns'],
-                'detail_dates': d['detail_dates'],
-                'detail_groups': d['detail_groups'],
-                'detail_benchmark_returns': d['detail_benchmark_returns'] # type: ignore
+                'latest_mention': latest[code],
+                'group_count': len(groups),
+                # 保留集合，分页切片后再转 list
+                'groups': groups,
             })
 
         duration = time.time() - start_time
         log_info(f"Global Win Rate Raw Data Loaded: {len(results)} stocks in {duration:.2f}s")
         
-        self._set_cache(cache_key, results, ttl_seconds=self._cache_ttl_finalized)
+        self._set_cache(cache_key, results, db_version=db_version)
         return results
 
+    @staticmethod
+    def _summarize_returns(
+        count: int,
+        positive: int,
+        ret_sum: float,
+        benchmark_count: int,
+        benchmark_sum: float,
+    ) -> Tuple[float, float, float]:
+        """由单遍累加的统计量汇总：返回 (胜率%, 平均收益, 平均基准收益)。"""
+        if count <= 0:
+            return 0.0, 0.0, 0.0
+        avg_benchmark = benchmark_sum / benchmark_count if benchmark_count > 0 else 0.0
+        return positive / count * 100, ret_sum / count, avg_benchmark
+
+    def _fetch_batch_win_rate_data(
+        self,
+        batch: List[Dict],
+        return_period: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ) -> List[Tuple]:
+        """一批群组库 ATTACH 后单条 UNION ALL 取回各群部分和（批量失败时逐库回退）"""
+        batch = [g for g in batch if self._db_exists(g['topics_db'])]
+        if not batch:
+            return []
+        return_period = normalize_return_period(return_period)
+        date_params = [d for d in (start_date, end_date) if d]
+        try:
+            with self._attached_group_batch(batch) as (conn, aliases):
+                selects = []
+                params: List[Any] = []
+                for alias, group in zip(aliases, batch):
+                    inner = _win_rate_agg_sql(return_period, bool(start_date), bool(end_date), f"{alias}.")
+                    selects.append(f"SELECT agg.*, ? FROM ({inner}) agg")
+                    params.append(group['group_id'])
+                    params.extend(date_params)
+                cursor = conn.execute(' UNION ALL '.join(selects), params)
+                cursor.arraysize = self.FETCH_ARRAYSIZE
+                rows: List[Tuple] = []
+                while batch_rows := cursor.fetchmany():
+                    rows.extend(batch_rows)
+                return rows
+        except Exception as e:
+            log_warning(f"胜率批量查询失败，逐库回退: {e}")
+            rows = []
+            for group in batch:
+                rows.extend(self._fetch_group_win_rate_data(group, return_period, start_date, end_date))
+            return rows
+
     def _fetch_group_win_rate_data(
         self,
         group: Dict,
@@ -885,33 +1327,28 @@ class GlobalAnalyzer:
     ) -> List[Tuple]:
         """单个群组的数据获取函数 (供线程池调用)"""
         db_path = group['topics_db']
-        if not os.path.exists(db_path):
+        if not self._db_exists(db_path):
             return []
         
         try:
-            conn = self._get_conn(db_path)
-            cursor = conn.cursor()
-            excess_col = return_period.replace('return_', 'excess_return_')
-            # 增加 mention_date, excess_col 查询
-            query = f'''
-                SELECT sm.stock_code, sm.stock_name, mp.{return_period}, sm.mention_date, mp.{excess_col}
-                FROM stock_mentions sm
-                JOIN mention_performance mp ON sm.id = mp.mention_id
-                WHERE mp.{return_period} IS NOT NULL
-            '''
+            query = _win_rate_agg_sql(
+                normalize_return_period(return_period), bool(start_date), bool(end_date)
+            )
             params: List[Any] = []
             if start_date:
-                query += ' AND sm.mention_date >= ?'
                 params.append(start_date)
             if end_date:
-                query += ' AND sm.mention_date <= ?'
                 params.append(end_date)
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
-            conn.close()
-            
-            # 附加 group_id
-            return [r + (group['group_id'],) for r in rows]
+            # 每群每股仅一行部分和，附加 group_id 后交由上层合并
+            group_key = (group['group_id'],)
+            rows: List[Tuple] = []
+            extend = rows.extend
+            with self._get_conn(db_path) as conn:
+                cursor = conn.execute(query, params)
+                cursor.arraysize = self.FETCH_ARRAYSIZE
+                while batch := cursor.fetchmany():
+                    extend(r + group_key for r in batch)
+            return rows
         except Exception:
             return []
 
@@ -1003,9 +1440,10 @@ class GlobalAnalyzer:
         cache_key = self._scoped_cache_key(
             f"global_stock_events_{stock_code}_mode_{normalized_detail_mode}_p_{page}_s_{per_page}_f_{int(include_full_text)}"
         )
-        if (not refresh_realtime) and self._is_cache_valid(cache_key):
+        cached = _CACHE_MISS if refresh_realtime else self._get_cached(cache_key)
+        if cached is not _CACHE_MISS:
             return self._with_meta(
-                self._cache[cache_key],
+                cached,
                 cache_hit=True,
                 data_mode="live",
                 anchor_date=self.get_data_anchor_date(),
@@ -1024,124 +1462,122 @@ class GlobalAnalyzer:
         stock_name = ""
         t0_enriched_groups: Set[str] = set()
 
+        # 查询事件（默认不取全文，降低首屏 IO）；T+0 回补后以同一语句重读
+        full_text_col = "tk.text as full_text" if include_full_text else "'' as full_text"
+        talks_join = "LEFT JOIN talks tk ON sm.topic_id = tk.topic_id" if include_full_text else ""
+        events_sql = f'''
+            SELECT sm.id, sm.topic_id, sm.context_snippet as context,
+                   sm.mention_date, sm.mention_time, sm.stock_name,
+                   mp.return_1d, mp.return_3d, mp.return_5d, mp.return_10d, mp.return_20d,
+                   mp.t0_buy_price, mp.t0_buy_ts, mp.t0_buy_source,
+                   mp.t0_end_price_rt, mp.t0_end_price_rt_ts,
+                   mp.t0_end_price_close, mp.t0_end_price_close_ts,
+                   mp.t0_return_rt, mp.t0_return_close, mp.t0_status, mp.t0_note, {full_text_col}
+            FROM stock_mentions sm
+            LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
+            {talks_join}
+            WHERE sm.stock_code = ?
+            ORDER BY sm.mention_time DESC
+        '''
+
         for group in self._get_all_group_dbs():
             db_path = group['topics_db']
-            if not os.path.exists(db_path):
+            if not self._db_exists(db_path):
                 continue
             try:
-                conn = self._get_conn(db_path)
-                # 获取群名
-                group_name = self._get_group_name(conn, group['group_id'])
-                
-                # 查询事件（默认不取全文，降低首屏 IO）
-                cursor = conn.cursor()
-                full_text_col = "tk.text as full_text" if include_full_text else "'' as full_text"
-                talks_join = "LEFT JOIN talks tk ON sm.topic_id = tk.topic_id" if include_full_text else ""
-                cursor.execute(f'''
-                    SELECT sm.id, sm.topic_id, sm.context_snippet as context,
-                           sm.mention_date, sm.mention_time, sm.stock_name,
-                           mp.return_1d, mp.return_3d, mp.return_5d, mp.return_10d, mp.return_20d,
-                           mp.t0_buy_price, mp.t0_buy_ts, mp.t0_buy_source,
-                           mp.t0_end_price_rt, mp.t0_end_price_rt_ts,
-                           mp.t0_end_price_close, mp.t0_end_price_close_ts,
-                           mp.t0_return_rt, mp.t0_return_close, mp.t0_status, mp.t0_note, {full_text_col}
-                    FROM stock_mentions sm
-                    LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
-                    {talks_join}
-                    WHERE sm.stock_code = ?
-                    ORDER BY sm.mention_time DESC
-                ''', (stock_code,))
-                
-                rows = cursor.fetchall()
-                if rows:
-                    if not stock_name:
-                        stock_name = rows[0][5]  # stock_name
-
-                    today = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d")
-                    close_finalize_time = str(self.market_store.close_finalize_time or "15:05")
-                    # full 模式下，若当前群组该股票的 t0 尚未生成，则借助分群 analyzer 补算后再读取。
-                    need_t0_backfill = any(
-                        (
-                            row[11] is None
-                            or str(row[20] or "").strip().lower() in {"", "unavailable"}
-                            or str(row[13] or "").strip().lower() == "pending_open"
-                        )
-                        for row in rows
-                    )
-                    stale_future_finalized = any(
-                        (
-                            str(row[20] or "") == "finalized"
-                            and compute_session_trade_date(
-                                mention_time=str(row[4] or ""),
-                                mention_date=str(row[3] or ""),
-                                close_finalize_time=close_finalize_time,
-                                open_time="09:30",
-                            )[0] > today
-                        )
-                        for row in rows
+                with self._get_conn(db_path) as conn:
+                    group_name = self._get_group_name(conn, group['group_id'])
+                    rows = conn.execute(events_sql, (stock_code,)).fetchall()
+                if not rows:
+                    continue
+                if not stock_name:
+                    stock_name = rows[0][5]  # stock_name
+
+                today = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d")
+                close_finalize_time = str(self.market_store.close_finalize_time or "15:05")
+                # full 模式下，若当前群组该股票的 t0 尚未生成，则借助分群 analyzer 补算后再读取。
+                need_t0_backfill = any(
+                    (
+                        row[11] is None
+                        or str(row[20] or "").strip().lower() in {"", "unavailable"}
+                        or str(row[13] or "").strip().lower() == "pending_open"
                     )
-                    stale_legacy_t0 = any(
-                        (
-                            str(row[20] or "") == "finalized"
-                            and str(row[21] or "").find("历史提及使用最近成交价近似") >= 0
-                            and compute_session_trade_date(
-                                mention_time=str(row[4] or ""),
-                                mention_date=str(row[3] or ""),
-                                close_finalize_time=close_finalize_time,
-                                open_time="09:30",
-                            )[0] > str(row[3] or "")
-                        )
-                        for row in rows
+                    for row in rows
+                )
+                stale_future_finalized = any(
+                    (
+                        str(row[20] or "") == "finalized"
+                        and compute_session_trade_date(
+                            mention_time=str(row[4] or ""),
+                            mention_date=str(row[3] or ""),
+                            close_finalize_time=close_finalize_time,
+                            open_time="09:30",
+                        )[0] > today
                     )
-                    gid = str(group.get("group_id", ""))
-                    should_recompute_t0 = bool(
-                        normalized_detail_mode == "full"
-                        and (need_t0_backfill or stale_future_finalized or stale_legacy_t0 or refresh_realtime)
+                    for row in rows
+                )
+                stale_legacy_t0 = any(
+                    (
+                        str(row[20] or "") == "finalized"
+                        and str(row[21] or "").find("历史提及使用最近成交价近似") >= 0
+                        and compute_session_trade_date(
+                            mention_time=str(row[4] or ""),
+                            mention_date=str(row[3] or ""),
+                            close_finalize_time=close_finalize_time,
+                            open_time="09:30",
+                        )[0] > str(row[3] or "")
                     )
-                    if should_recompute_t0 and gid and gid not in t0_enriched_groups:
-                        try:
-                            from modules.analyzers.stock_analyzer import StockAnalyzer
-
-                            StockAnalyzer(gid).get_stock_events(
-                                stock_code,
-                                refresh_realtime=bool(refresh_realtime or stale_future_finalized or stale_legacy_t0),
-                                detail_mode="full",
-                                page=1,
-                                per_page=200,
-                                include_full_text=False,
-                            )
-                            t0_enriched_groups.add(gid)
-                            cursor.execute(f'''
-                                SELECT sm.id, sm.topic_id, sm.context_snippet as context,
-                                       sm.mention_date, sm.mention_time, sm.stock_name,
-                                       mp.return_1d, mp.return_3d, mp.return_5d, mp.return_10d, mp.return_20d,
-                                       mp.t0_buy_price, mp.t0_buy_ts, mp.t0_buy_source,
-                                       mp.t0_end_price_rt, mp.t0_end_price_rt_ts,
-                                       mp.t0_end_price_close, mp.t0_end_price_close_ts,
-                                       mp.t0_return_rt, mp.t0_return_close, mp.t0_status, mp.t0_note, {full_text_col}
-                                FROM stock_mentions sm
-                                LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
-                                {talks_join}
-                                WHERE sm.stock_code = ?
-                                ORDER BY sm.mention_time DESC
-                            ''', (stock_code,))
-                            rows = cursor.fetchall()
-                        except Exception as e:
-                            log_warning(f"全局详情 T+0 回补失败: group={gid}, stock={stock_code}, error={e}")
+                    for row in rows
+                )
+                gid = str(group.get("group_id", ""))
+                should_recompute_t0 = bool(
+                    normalized_detail_mode == "full"
+                    and (need_t0_backfill or stale_future_finalized or stale_legacy_t0 or refresh_realtime)
+                )
+                # T+0 回补含行情请求与写库，须在归还池化连接后执行，避免长时间占住连接锁阻塞其他读请求
+                backfilled = False
+                if should_recompute_t0 and gid and gid not in t0_enriched_groups:
+                    try:
+                        from modules.analyzers.stock_analyzer import StockAnalyzer
+
+                        StockAnalyzer(gid).get_stock_events(
+                            stock_code,
+                            refresh_realtime=bool(refresh_realtime or stale_future_finalized or stale_legacy_t0),
+                            detail_mode="full",
+                            page=1,
+                            per_page=200,
+                            include_full_text=False,
+                        )
+                        t0_enriched_groups.add(gid)
+                        backfilled = True
+                    except Exception as e:
+                        log_warning(f"全局详情 T+0 回补失败: group={gid}, stock={stock_code}, error={e}")
+
+                with self._get_conn(db_path) as conn:
+                    cursor = conn.cursor()
+                    if backfilled:
+                        cursor.execute(events_sql, (stock_code,))
+                        rows = cursor.fetchall()
 
                     # 批量查询该群组中这些 topic 下的关联股票
                     topic_ids = list(set(row[1] for row in rows if row[1]))
                     stocks_by_topic: Dict[int, List[Dict[str, str]]] = {}
-                    if topic_ids:
-                        placeholders = ','.join('?' * len(topic_ids))
+                    related_rows: List[Tuple] = []
+                    # 按参数上限分块，每块一条 IN 查询；各块话题互不相交，块内顺序即话题内顺序
+                    chunk_size = max(1, int(self.IN_QUERY_CHUNK_SIZE))
+                    for chunk_start in range(0, len(topic_ids), chunk_size):
+                        chunk = topic_ids[chunk_start:chunk_start + chunk_size]
+                        placeholders = ','.join('?' * len(chunk))
                         cursor.execute(f'''
                             SELECT topic_id, stock_code, stock_name
                             FROM stock_mentions
                             WHERE topic_id IN ({placeholders})
                             ORDER BY mention_time DESC
-                        ''', topic_ids)
+                        ''', chunk)
+                        related_rows.extend(cursor)
+                    if related_rows:
                         seen: Dict[int, set] = {}
-                        for r in cursor.fetchall():
+                        for r in related_rows:
                             tid = r[0]
                             code = r[1]
                             if is_excluded_stock(code, r[2]):
@@ -1156,50 +1592,49 @@ class GlobalAnalyzer:
                                     'stock_name': r[2],
                                 })
 
-                    for row in rows:
-                        if is_excluded_stock(stock_code, row[5]):
-                            continue
-                        session_trade_date, window_tag = compute_session_trade_date(
-                            mention_time=str(row[4] or ""),
-                            mention_date=str(row[3] or ""),
-                            close_finalize_time=str(self.market_store.close_finalize_time or "15:05"),
-                            open_time="09:30",
-                        )
-                        full_text = (row[22] or '') if include_full_text else ''
-                        text_snippet = full_text[:500] + ('...' if len(full_text) > 500 else '')
-                        topic_id = row[1]
-                        all_events.append({
-                            'mention_id': row[0],
-                            'topic_id': str(topic_id) if topic_id is not None else None,
-                            'group_id': group['group_id'],
-                            'group_name': group_name,
-                            'context': row[2],
-                            'full_text': full_text,
-                            'text_snippet': text_snippet,
-                            'stocks': stocks_by_topic.get(topic_id, []),
-                            'mention_date': row[3],
-                            'mention_time': row[4],
-                            'stock_name': row[5],
-                            'return_1d': row[6],
-                            'return_3d': row[7],
-                            'return_5d': row[8],
-                            'return_10d': row[9],
-                            'return_20d': row[10],
-                            't0_buy_price': row[11],
-                            't0_buy_ts': row[12],
-                            't0_buy_source': row[13],
-                            't0_end_price_rt': row[14],
-                            't0_end_price_rt_ts': row[15],
-                            't0_end_price_close': row[16],
-                            't0_end_price_close_ts': row[17],
-                            't0_return_rt': row[18],
-                            't0_return_close': row[19],
-                            't0_status': row[20],
-                            't0_note': row[21],
-                            't0_session_trade_date': session_trade_date,
-                            't0_window_tag': window_tag,
-                        })
-                conn.close()
+                for row in rows:
+                    if is_excluded_stock(stock_code, row[5]):
+                        continue
+                    session_trade_date, window_tag = compute_session_trade_date(
+                        mention_time=str(row[4] or ""),
+                        mention_date=str(row[3] or ""),
+                        close_finalize_time=str(self.market_store.close_finalize_time or "15:05"),
+                        open_time="09:30",
+                    )
+                    full_text = (row[22] or '') if include_full_text else ''
+                    text_snippet = full_text[:500] + ('...' if len(full_text) > 500 else '')
+                    topic_id = row[1]
+                    all_events.append({
+                        'mention_id': row[0],
+                        'topic_id': str(topic_id) if topic_id is not None else None,
+                        'group_id': group['group_id'],
+                        'group_name': group_name,
+                        'context': row[2],
+                        'full_text': full_text,
+                        'text_snippet': text_snippet,
+                        'stocks': stocks_by_topic.get(topic_id, []),
+                        'mention_date': row[3],
+                        'mention_time': row[4],
+                        'stock_name': row[5],
+                        'return_1d': row[6],
+                        'return_3d': row[7],
+                        'return_5d': row[8],
+                        'return_10d': row[9],
+                        'return_20d': row[10],
+                        't0_buy_price': row[11],
+                        't0_buy_ts': row[12],
+                        't0_buy_source': row[13],
+                        't0_end_price_rt': row[14],
+                        't0_end_price_rt_ts': row[15],
+                        't0_end_price_close': row[16],
+                        't0_end_price_close_ts': row[17],
+                        't0_return_rt': row[18],
+                        't0_return_close': row[19],
+                        't0_status': row[20],
+                        't0_note': row[21],
+                        't0_session_trade_date': session_trade_date,
+                        't0_window_tag': window_tag,
+                    })
             except Exception as e:
                 log_warning(f"查询群组 {group['group_id']} 事件失败: {e}")
 
@@ -1259,39 +1694,41 @@ class GlobalAnalyzer:
         cache_key = self._scoped_cache_key(
             f'global_sector_heat_posts_v2_anchor_{anchor_date}_{effective_start or ""}_{effective_end or ""}'
         )
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return cached
 
         start_at = time.time()
         groups = self._get_all_group_dbs()
-        merged_daily: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
-        merged_total: Dict[str, int] = defaultdict(int)
+        # 各群结果整表合并：Counter.update 一次合并一个映射，免去逐键 += 的 Python 循环
+        merged_daily: Dict[str, Counter] = defaultdict(Counter)
+        merged_total: Counter = Counter()
         scanned_topics = 0
         matched_mentions = 0
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [
-                executor.submit(
-                    self._compute_group_sector_heat,
-                    group,
-                    effective_start,
-                    effective_end,
-                    SECTOR_KEYWORDS,
-                )
-                for group in groups
-            ]
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    payload = future.result()
-                    scanned_topics += payload['scanned_topics']
-                    matched_mentions += payload['matched_mentions']
-                    for sector, total in payload['sector_total'].items():
-                        merged_total[sector] += int(total)
-                    for sector, day_map in payload['sector_daily'].items():
-                        for date_key, count in day_map.items():
-                            merged_daily[sector][date_key] += int(count)
-                except Exception as e:
-                    log_warning(f"全局板块热度聚合任务失败: {e}")
+        # 自动机每次请求只解析一次，各群扫描线程共用
+        match_sectors = build_sector_matcher(SECTOR_KEYWORDS)
+        futures = [
+            self._executor.submit(
+                self._compute_group_sector_heat,
+                group,
+                effective_start,
+                effective_end,
+                match_sectors,
+            )
+            for group in groups
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                payload = future.result()
+                scanned_topics += payload['scanned_topics']
+                matched_mentions += payload['matched_mentions']
+                merged_total.update(payload['sector_total'])
+                for sector, day_map in payload['sector_daily'].items():
+                    merged_daily[sector].update(day_map)
+            except Exception as e:
+                log_warning(f"全局板块热度聚合任务失败: {e}")
 
         results: List[Dict[str, Any]] = []
         for sector, total in merged_total.items():
@@ -1322,7 +1759,7 @@ class GlobalAnalyzer:
             f"sectors={len(results)}, start={effective_start or '-'}, end={effective_end or '-'}, "
             f"duration={duration:.2f}s)"
         )
-        self._set_cache(cache_key, results, ttl_seconds=self._cache_ttl_finalized)
+        self._set_cache(cache_key, results, db_version=db_version)
         return results
 
     def _compute_group_sector_heat(
@@ -1330,10 +1767,10 @@ class GlobalAnalyzer:
         group: Dict[str, Any],
         start_date: Optional[str],
         end_date: Optional[str],
-        sector_keywords: Dict[str, List[str]],
+        match_sectors: SectorMatcher,
     ) -> Dict[str, Any]:
         db_path = group.get('topics_db')
-        if not db_path or not os.path.exists(db_path):
+        if not db_path or not self._db_exists(db_path):
             return {
                 'scanned_topics': 0,
                 'matched_mentions': 0,
@@ -1341,23 +1778,44 @@ class GlobalAnalyzer:
                 'sector_daily': {},
             }
 
+        group_id = str(group.get('group_id', ''))
+        sector_cache_get = self._sector_cache.get
+        # 本次新分类的话题与命中记忆的话题，扫描结束后一次并入记忆
+        fresh_sectors: Dict[Tuple[str, Any], Tuple[str, ...]] = {}
+        touched_keys: List[Tuple[str, Any]] = []
+        touched_append = touched_keys.append
+        scanned_topics = 0
+        # 流式扫描帖子，仅保留命中板块与时间，不在内存中持有全部正文
+        matched_rows: List[Tuple[Tuple[str, ...], Any]] = []
+        matched_append = matched_rows.append
         try:
-            conn = self._get_conn(db_path)
-            cursor = conn.cursor()
             date_clause, params = build_topic_time_filter(
                 start_date=start_date,
                 end_date=end_date,
                 column='t.create_time',
             )
-            cursor.execute(f'''
-                SELECT tk.text, t.create_time
-                FROM topics t
-                JOIN talks tk ON t.topic_id = tk.topic_id
-                WHERE tk.text IS NOT NULL AND tk.text != ''
-                {date_clause}
-            ''', params)
-            rows = cursor.fetchall()
-            conn.close()
+            with self._get_conn(db_path) as conn:
+                cursor = conn.execute(f'''
+                    SELECT t.topic_id, tk.text, t.create_time
+                    FROM topics t
+                    JOIN talks tk ON t.topic_id = tk.topic_id
+                    WHERE tk.text IS NOT NULL AND tk.text != ''
+                    {date_clause}
+                ''', params)
+                cursor.arraysize = self.FETCH_ARRAYSIZE
+                while batch := cursor.fetchmany():
+                    scanned_topics += len(batch)
+                    for topic_id, text, create_time in batch:
+                        cache_key = (group_id, topic_id)
+                        sectors = sector_cache_get(cache_key)
+                        if sectors is None:
+                            sectors = tuple(match_sectors(text.lower()).keys())
+                            fresh_sectors[cache_key] = sectors
+                        else:
+                            touched_append(cache_key)
+                        if sectors:
+                            matched_append((sectors, create_time))
+            self._remember_sectors(fresh_sectors, touched_keys)
         except Exception as e:
             log_warning(f"读取群组板块热度失败(group={group.get('group_id')}): {e}")
             return {
@@ -1367,12 +1825,12 @@ class GlobalAnalyzer:
                 'sector_daily': {},
             }
 
-        group_heat = aggregate_sector_heat(rows, sector_keywords)
+        group_heat = aggregate_matched_sectors(matched_rows)
         sector_total = {item['sector']: int(item['total_mentions']) for item in group_heat}
         sector_daily = {item['sector']: item['daily_mentions'] for item in group_heat}
         matched_mentions = sum(sector_total.values())
         return {
-            'scanned_topics': len(rows),
+            'scanned_topics': scanned_topics,
             'matched_mentions': matched_mentions,
             'sector_total': sector_total,
             'sector_daily': sector_daily,
@@ -1395,66 +1853,42 @@ class GlobalAnalyzer:
         cache_key = self._scoped_cache_key(
             f'signals_anchor_{anchor_date}_{lookback_days}_{min_mentions}_{effective_start or ""}_{effective_end or ""}'
         )
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return cached
 
         since_date = effective_start or (datetime.now(BEIJING_TZ) - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
 
         stock_signals: Dict[str, StockSignal] = {}
 
-        for group in self._get_all_group_dbs():
-            db_path = group['topics_db']
-            if not os.path.exists(db_path):
-                continue
-            try:
-                conn = self._get_conn(db_path)
-                cursor = conn.cursor()
-                group_name = self._get_group_name(conn, group['group_id'])
-                window_cond = 'sm.mention_date >= ?'
-                params: List[Any] = [since_date]
-                if effective_end:
-                    window_cond += ' AND sm.mention_date <= ?'
-                    params.append(effective_end)
-
-                # 近期提及使用时间窗过滤；历史收益统计使用全历史，避免信号面板大量空值。
-                query = f'''
-                    SELECT
-                        sm.stock_code,
-                        MAX(sm.stock_name) AS stock_name,
-                        SUM(CASE WHEN {window_cond} THEN 1 ELSE 0 END) AS mention_count,
-                        MAX(CASE WHEN {window_cond} THEN sm.mention_date ELSE NULL END) AS latest_mention_date,
-                        AVG(mp.return_5d) AS avg_return_5d,
-                        SUM(CASE WHEN mp.return_5d > 0 THEN 1 ELSE 0 END) AS positive_returns,
-                        SUM(CASE WHEN mp.return_5d IS NOT NULL THEN 1 ELSE 0 END) AS valid_returns
-                    FROM stock_mentions sm
-                    LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
-                    GROUP BY sm.stock_code
-                    HAVING SUM(CASE WHEN {window_cond} THEN 1 ELSE 0 END) >= ?
-                '''
-                # window_cond 在 SELECT/HAVING 中共出现 3 次，参数也要重复 3 次。
-                cursor.execute(query, params + params + params + [min_mentions])
-                for code, name, mention_count, latest_date, avg_ret, positive_returns, valid_returns in cursor.fetchall():
-                    if is_excluded_stock(code, name):
-                        continue
-                    if code not in stock_signals:
-                        stock_signals[code] = {
-                            'mentions': 0, 'group_names': set(), 'stock_name': '',
-                            'latest_date': '', 'return_sum': 0.0, 'valid_returns': 0, 'positive_returns': 0
-                        }
-                    s: StockSignal = stock_signals[code]
-                    s['mentions'] += int(mention_count or 0)
-                    s['group_names'].add(group_name)
-                    if name:
-                        s['stock_name'] = name
-                    if str(latest_date) > str(s['latest_date']):
-                        s['latest_date'] = latest_date
-                    if avg_ret is not None and valid_returns:
-                        s['return_sum'] += float(avg_ret) * int(valid_returns)
-                        s['valid_returns'] += int(valid_returns)
-                        s['positive_returns'] += int(positive_returns or 0)
-                conn.close()
-            except Exception:
-                pass
+        # 各群 SQL 已按股票聚合，Python 侧只需合并每群每股一行；I/O 在共享线程池中并行
+        group_results = self._executor.map(
+            lambda g: self._fetch_group_signal_rows(g, since_date, effective_end, min_mentions),
+            self._get_all_group_dbs(),
+        )
+        for group_name, rows in group_results:
+            for code, name, mention_count, latest_date, avg_ret, positive_returns, valid_returns in rows:
+                if is_excluded_stock(code, name):
+                    continue
+                code = sys.intern(code)
+                if code not in stock_signals:
+                    stock_signals[code] = {
+                        'mentions': 0, 'group_names': set(), 'stock_name': '',
+                        'latest_date': '', 'return_sum': 0.0, 'valid_returns': 0, 'positive_returns': 0
+                    }
+                s: StockSignal = stock_signals[code]
+                s['mentions'] += int(mention_count or 0)
+                s['group_names'].add(group_name)
+                if name:
+                    s['stock_name'] = sys.intern(name)
+                # latest_date 由 SQL 的 MAX(mention_date) 给出，这里仅做跨群合并（每群每股一次）
+                if latest_date and latest_date > s['latest_date']:
+                    s['latest_date'] = latest_date
+                if avg_ret is not None and valid_returns:
+                    s['return_sum'] += float(avg_ret) * int(valid_returns)
+                    s['valid_returns'] += int(valid_returns)
+                    s['positive_returns'] += int(positive_returns or 0)
 
         results = []
         for code, s in stock_signals.items():
@@ -1479,10 +1913,65 @@ class GlobalAnalyzer:
                 'weight': weight
             })
 
-        results.sort(key=lambda x: -x['weight'])
-        self._set_cache(cache_key, results, ttl_seconds=self._cache_ttl_finalized)
+        # 稳定排序：reverse=True 下同权重保持原有先后，与按 -weight 升序一致
+        results.sort(key=operator.itemgetter('weight'), reverse=True)
+        self._set_cache(cache_key, results, db_version=db_version)
         return results
 
+    def _fetch_group_signal_rows(
+        self,
+        group: Dict,
+        since_date: str,
+        end_date: Optional[str],
+        min_mentions: int,
+    ) -> Tuple[str, List[Tuple]]:
+        """单个群组的信号聚合行 (供线程池调用)，失败或库不存在时返回空行"""
+        db_path = group['topics_db']
+        if not self._db_exists(db_path):
+            return '', []
+        try:
+            with self._get_conn(db_path) as conn:
+                group_name = self._get_group_name(conn, group['group_id'])
+                window_cond = 'sm.mention_date >= ?'
+                params: List[Any] = [since_date]
+                if end_date:
+                    window_cond += ' AND sm.mention_date <= ?'
+                    params.append(end_date)
+
+                # 近期提及使用时间窗过滤；历史收益统计使用全历史，避免信号面板大量空值。
+                # 先在窗口内按股票聚合并做阈值过滤，仅对入选股票回看全历史收益。
+                query = f'''
+                    WITH recent AS (
+                        SELECT sm.stock_code,
+                               COUNT(*) AS mention_count,
+                               MAX(sm.mention_date) AS latest_mention_date
+                        FROM stock_mentions sm
+                        WHERE {window_cond}
+                        GROUP BY sm.stock_code
+                        HAVING COUNT(*) >= ?
+                    )
+                    SELECT
+                        r.stock_code,
+                        MAX(sm.stock_name) AS stock_name,
+                        r.mention_count,
+                        r.latest_mention_date,
+                        AVG(mp.return_5d) AS avg_return_5d,
+                        SUM(CASE WHEN mp.return_5d > 0 THEN 1 ELSE 0 END) AS positive_returns,
+                        COUNT(mp.return_5d) AS valid_returns
+                    FROM recent r
+                    JOIN stock_mentions sm ON sm.stock_code = r.stock_code
+                    LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
+                    GROUP BY r.stock_code
+                '''
+                cursor = conn.execute(query, params + [min_mentions])
+                cursor.arraysize = self.FETCH_ARRAYSIZE
+                rows: List[Tuple] = []
+                while batch := cursor.fetchmany():
+                    rows.extend(batch)
+                return group_name, rows
+        except Exception:
+            return '', []
+
     def get_global_sector_topics(self, sector: str, start_date: Optional[str] = None,
                                  end_date: Optional[str] = None, page: int = 1,
                                  page_size: int = 20) -> Dict[str, Any]:
@@ -1496,9 +1985,11 @@ class GlobalAnalyzer:
         cache_key = self._scoped_cache_key(
             f"global_sector_topics_anchor_{anchor_date}_{sector}_{effective_start or ''}_{effective_end or ''}_{page}_{page_size}"
         )
-        if self._is_cache_valid(cache_key):
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
             return self._with_meta(
-                self._cache[cache_key],
+                cached,
                 cache_hit=True,
                 data_mode="finalized",
                 anchor_date=anchor_date,
@@ -1511,90 +2002,93 @@ class GlobalAnalyzer:
 
         page = max(1, int(page or 1))
         page_size = max(1, min(int(page_size or 20), 100))
+        # 只需判定目标板块：单板块自动机更小；已分类话题直接查 memo 跳过不命中的
+        match_sector = build_sector_matcher({sector: SECTOR_KEYWORDS[sector]})
+        sector_cache_get = self._sector_cache.get
 
         matched_topics: List[Dict[str, Any]] = []
         for group in self._get_all_group_dbs():
             db_path = group['topics_db']
-            if not os.path.exists(db_path):
+            if not self._db_exists(db_path):
                 continue
 
             try:
-                conn = self._get_conn(db_path)
-                cursor = conn.cursor()
-                group_name = self._get_group_name(conn, group['group_id'])
-
-                date_clause, params = build_topic_time_filter(
-                    start_date=effective_start,
-                    end_date=effective_end,
-                    column='t.create_time',
-                )
-                cursor.execute(f'''
-                    SELECT
-                        t.topic_id,
-                        t.create_time,
-                        tk.text as talk_text
-                    FROM topics t
-                    JOIN talks tk ON t.topic_id = tk.topic_id
-                    WHERE tk.text IS NOT NULL AND tk.text != ''
-                    {date_clause}
-                    ORDER BY t.create_time DESC
-                ''', params)
-                rows = cursor.fetchall()
-
-                topic_ids: List[str] = []
-                topic_texts: Dict[str, str] = {}
-                for row in rows:
-                    topic_id = str(row[0])
-                    full_text = row[2] or ''
-                    if not full_text:
-                        continue
-                    topic_ids.append(topic_id)
-                    topic_texts[topic_id] = full_text
-
-                stocks_by_topic: Dict[str, List[Dict[str, str]]] = {}
-                if topic_ids:
-                    placeholders = ','.join('?' * len(topic_ids))
+                with self._get_conn(db_path) as conn:
+                    cursor = conn.cursor()
+                    group_name = self._get_group_name(conn, group['group_id'])
+
+                    date_clause, params = build_topic_time_filter(
+                        start_date=effective_start,
+                        end_date=effective_end,
+                        column='t.create_time',
+                    )
                     cursor.execute(f'''
-                        SELECT topic_id, stock_code, stock_name
-                        FROM stock_mentions
-                        WHERE topic_id IN ({placeholders})
-                        ORDER BY mention_time DESC
-                    ''', topic_ids)
-                    for topic_id_raw, stock_code, stock_name in cursor.fetchall():
-                        topic_id_str = str(topic_id_raw)
-                        if is_excluded_stock(stock_code, stock_name):
-                            continue
-                        if topic_id_str not in stocks_by_topic:
-                            stocks_by_topic[topic_id_str] = []
-                        if stock_code not in [x['stock_code'] for x in stocks_by_topic[topic_id_str]]:
-                            stocks_by_topic[topic_id_str].append({
-                                'stock_code': stock_code,
-                                'stock_name': stock_name
-                            })
-
-                for row in rows:
-                    topic_id_str = str(row[0])
-                    create_time = row[1]
-                    full_text = topic_texts.get(topic_id_str, '')
-                    if not full_text:
-                        continue
-
-                    matches = match_sector_keywords(full_text, SECTOR_KEYWORDS)
-                    matched_keywords = matches.get(sector, [])
-                    if not matched_keywords:
-                        continue
+                        SELECT
+                            t.topic_id,
+                            t.create_time,
+                            tk.text as talk_text
+                        FROM topics t
+                        JOIN talks tk ON t.topic_id = tk.topic_id
+                        WHERE tk.text IS NOT NULL AND tk.text != ''
+                        {date_clause}
+                        ORDER BY t.create_time DESC
+                    ''', params)
+                    group_id = str(group.get('group_id', ''))
+                    matched_rows: List[Tuple[str, Any, str, List[str]]] = []
+                    # 正文按批读取，未命中的话题文本随批次释放，不整体驻留内存
+                    cursor.arraysize = self.FETCH_ARRAYSIZE
+                    while batch := cursor.fetchmany():
+                        for topic_id_raw, create_time, full_text in batch:
+                            if not full_text:
+                                continue
+                            cached_sectors = sector_cache_get((group_id, topic_id_raw))
+                            if cached_sectors is not None and sector not in cached_sectors:
+                                continue
+                            matched_keywords = match_sector(full_text.lower()).get(sector)
+                            if not matched_keywords:
+                                continue
+                            matched_rows.append((str(topic_id_raw), create_time, full_text, matched_keywords))
+
+                    # 仅为命中话题加载关联股票
+                    stocks_by_topic: Dict[str, List[Dict[str, str]]] = {}
+                    if matched_rows:
+                        topic_ids = [row[0] for row in matched_rows]
+                        seen_topic_stock: Set[Tuple[str, str]] = set()
+                        # 按参数上限分块，每块一条 IN 查询；各块话题互不相交，块内顺序即话题内顺序
+                        chunk_size = max(1, int(self.IN_QUERY_CHUNK_SIZE))
+                        for chunk_start in range(0, len(topic_ids), chunk_size):
+                            chunk = topic_ids[chunk_start:chunk_start + chunk_size]
+                            placeholders = ','.join('?' * len(chunk))
+                            cursor.execute(f'''
+                                SELECT topic_id, stock_code, stock_name
+                                FROM stock_mentions
+                                WHERE topic_id IN ({placeholders})
+                                ORDER BY mention_time DESC
+                            ''', chunk)
+                            # 直接迭代游标逐批取行，不物化整份结果列表
+                            for topic_id_raw, stock_code, stock_name in cursor:
+                                topic_id_str = str(topic_id_raw)
+                                if is_excluded_stock(stock_code, stock_name):
+                                    continue
+                                if (topic_id_str, stock_code) in seen_topic_stock:
+                                    continue
+                                seen_topic_stock.add((topic_id_str, stock_code))
+                                stocks_by_topic.setdefault(topic_id_str, []).append({
+                                    'stock_code': stock_code,
+                                    'stock_name': stock_name
+                                })
 
-                    matched_topics.append({
-                        'group_id': int(group['group_id']),
-                        'group_name': group_name,
-                        'topic_id': topic_id_str,
-                        'create_time': create_time,
-                        'full_text': full_text,
-                        'text_snippet': full_text[:280] + ('...' if len(full_text) > 280 else ''),
-                        'matched_keywords': matched_keywords,
-                        'stocks': stocks_by_topic.get(topic_id_str, []),
-                    })
-                conn.close()
+                    for topic_id_str, create_time, full_text, matched_keywords in matched_rows:
+                        matched_topics.append({
+                            'group_id': int(group['group_id']),
+                            'group_name': group_name,
+                            'topic_id': topic_id_str,
+                            'create_time': create_time,
+                            'full_text': full_text,
+                            'text_snippet': full_text[:280] + ('...' if len(full_text) > 280 else ''),
+                            'matched_keywords': matched_keywords,
+                            'stocks': stocks_by_topic.get(topic_id_str, []),
+                        })
             except Exception as e:
                 log_warning(f"全局板块话题查询失败(group={group.get('group_id')}): {e}")
 
@@ -1608,7 +2102,7 @@ class GlobalAnalyzer:
             'page_size': page_size,
             'items': matched_topics[start_idx:end_idx]
         }
-        self._set_cache(cache_key, result, ttl_seconds=self._cache_ttl_finalized)
+        self._set_cache(cache_key, result, db_version=db_version)
         return self._with_meta(
             result,
             cache_hit=False,
@@ -1623,16 +2117,68 @@ class GlobalAnalyzer:
     def get_groups_overview(self) -> List[Dict]:
         """各群组摘要统计"""
         cache_key = self._scoped_cache_key('groups_overview')
-        if self._is_cache_valid(cache_key):
-            return self._cache[cache_key]
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return cached
 
+        groups = [g for g in self._get_all_group_dbs() if self._db_exists(g['topics_db'])]
         results = []
-        for group in self._get_all_group_dbs():
-            db_path = group['topics_db']
-            if not os.path.exists(db_path):
-                continue
+        for batch in self._iter_group_batches(groups):
             try:
-                conn = self._get_conn(db_path)
+                results.extend(self._overview_attached_batch(batch))
+            except Exception as e:
+                # 任一库缺表/损坏会让整条 UNION 失败，此时该批逐库回退
+                log_warning(f"群组概览批量查询失败，逐库回退: {e}")
+                for group in batch:
+                    row = self._overview_single_group(group)
+                    if row is not None:
+                        results.append(row)
+
+        results.sort(key=lambda x: x.get('latest_topic') or '', reverse=True)
+        self._set_cache(cache_key, results, db_version=db_version)
+        return results
+
+    def _overview_attached_batch(self, batch: List[Dict]) -> List[Dict]:
+        """一条内存连接 ATTACH 一批群组库（只读），单条 UNION ALL 语句取回全部摘要"""
+        with self._attached_group_batch(batch) as (conn, aliases):
+            selects = []
+            params: List[Any] = []
+            for idx, (alias, group) in enumerate(zip(aliases, batch)):
+                selects.append(f'''
+                    SELECT {idx},
+                        (SELECT COUNT(*) FROM {alias}.topics),
+                        (SELECT MAX(create_time) FROM {alias}.topics),
+                        (SELECT COUNT(*) FROM {alias}.stock_mentions),
+                        (SELECT COUNT(DISTINCT stock_code) FROM {alias}.stock_mentions),
+                        (SELECT COUNT(*) FROM {alias}.mention_performance WHERE return_5d IS NOT NULL),
+                        (SELECT SUM(CASE WHEN return_5d > 0 THEN 1 ELSE 0 END)
+                         FROM {alias}.mention_performance WHERE return_5d IS NOT NULL),
+                        (SELECT name FROM {alias}.groups WHERE group_id = ?)
+                ''')
+                params.append(group['group_id'])
+
+            results = []
+            for idx, topic_count, latest_time, mention_count, stock_count, total, positive, db_name in conn.execute(
+                ' UNION ALL '.join(selects), params
+            ):
+                group = batch[idx]
+                results.append({
+                    'group_id': group['group_id'],
+                    'group_name': self._resolve_group_name(group['group_id'], db_name),
+                    'total_topics': topic_count or 0,
+                    'latest_topic': latest_time,
+                    'total_mentions': mention_count or 0,
+                    'unique_stocks': stock_count or 0,
+                    'win_rate': round((positive or 0) / total * 100, 1) if total else None,
+                })
+            return results
+
+    def _overview_single_group(self, group: Dict) -> Optional[Dict]:
+        """单库摘要统计（批量 ATTACH 失败时的回退路径）"""
+        db_path = group['topics_db']
+        try:
+            with self._get_conn(db_path) as conn:
                 cursor = conn.cursor()
 
                 # 话题数和最新更新
@@ -1664,29 +2210,26 @@ class GlobalAnalyzer:
                 # 获取群名
                 group_name = self._get_group_name(conn, group['group_id'])
 
-                conn.close()
-
-                results.append({
-                    'group_id': group['group_id'],
-                    'group_name': group_name,
-                    'total_topics': topic_count or 0,
-                    'latest_topic': latest_time,
-                    'total_mentions': mention_count,
-                    'unique_stocks': stock_count,
-                    'win_rate': win_rate
-                })
-            except Exception as e:
-                log_warning(f"概览群组 {group['group_id']} 失败: {e}")
-
-        results.sort(key=lambda x: x.get('latest_topic') or '', reverse=True)
-        self._set_cache(cache_key, results)
-        return results
+            return {
+                'group_id': group['group_id'],
+                'group_name': group_name,
+                'total_topics': topic_count or 0,
+                'latest_topic': latest_time,
+                'total_mentions': mention_count,
+                'unique_stocks': stock_count,
+                'win_rate': win_rate
+            }
+        except Exception as e:
+            log_warning(f"概览群组 {group['group_id']} 失败: {e}")
+            return None
 
     def get_whitelist_topic_mentions(self, page: int = 1, per_page: int = 20, search: Optional[str] = None) -> Dict[str, Any]:
         """聚合白名单群组内的话题列表（不依赖股票分析结果）"""
         cache_key = self._scoped_cache_key(f"whitelist_topic_mentions_{page}_{per_page}_{search or ''}")
-        if self._is_cache_valid(cache_key):
-            return self._with_cache_hit(self._cache[cache_key], True)
+        db_version = self._get_db_version()
+        cached = self._get_cached(cache_key, db_version)
+        if cached is not _CACHE_MISS:
+            return self._with_cache_hit(cached, True)
 
         page = max(1, int(page or 1))
         per_page = max(1, min(100, int(per_page or 20)))
@@ -1713,107 +2256,103 @@ class GlobalAnalyzer:
                 continue
 
             db_path = group.get("topics_db")
-            if not db_path or not os.path.exists(db_path):
+            if not db_path or not self._db_exists(db_path):
                 continue
 
-            conn = None
             try:
-                conn = self._get_conn(db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                group_name = self._get_group_name(conn, group_id)
-
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                table_names = {str(row[0]) for row in cursor.fetchall()}
-                has_talks = "talks" in table_names
-                has_questions = "questions" in table_names
-                has_answers = "answers" in table_names
-                has_mentions = "stock_mentions" in table_names
-
-                cursor.execute('''
-                    SELECT topic_id, create_time, type, title, comments_count, likes_count, reading_count
-                    FROM topics
-                    ORDER BY create_time DESC
-                ''')
+                with self._get_conn(db_path) as conn:
+                    cursor = conn.cursor()
+                    cursor.row_factory = sqlite3.Row
+                    group_name = self._get_group_name(conn, group_id)
+
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+                    table_names = {str(row[0]) for row in cursor.fetchall()}
+                    has_talks = "talks" in table_names
+                    has_questions = "questions" in table_names
+                    has_answers = "answers" in table_names
+                    has_mentions = "stock_mentions" in table_names
 
-                topic_rows = cursor.fetchall()
-                for row in topic_rows:
-                    topic_id = str(row["topic_id"])
-                    topic_text = ""
-                    if has_talks:
-                        cursor.execute("SELECT text FROM talks WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
-                        talk_row = cursor.fetchone()
-                        if talk_row and talk_row[0]:
-                            topic_text = str(talk_row[0])
-
-                    if not topic_text and has_questions:
-                        cursor.execute("SELECT text FROM questions WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
-                        q_row = cursor.fetchone()
-                        q_text = str(q_row[0]) if (q_row and q_row[0]) else ""
-                        a_text = ""
-                        if has_answers:
-                            cursor.execute("SELECT text FROM answers WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
-                            a_row = cursor.fetchone()
-                            a_text = str(a_row[0]) if (a_row and a_row[0]) else ""
-                        topic_text = (q_text + ("\n" + a_text if a_text else "")).strip()
-
-                    if not topic_text:
-                        topic_text = str(row["title"] or "").strip()
-
-                    mention_search_blob = ""
-                    if search_terms and has_mentions:
-                        cursor.execute('''
-                            SELECT stock_code, stock_name
-                            FROM stock_mentions
-                            WHERE topic_id = ?
-                        ''', (row["topic_id"],))
-                        mention_search_blob = "\n".join(
-                            f"{m[0] or ''} {m[1] or ''}" for m in cursor.fetchall() if not is_excluded_stock(m[0], m[1])
-                        )
+                    cursor.execute('''
+                        SELECT topic_id, create_time, type, title, comments_count, likes_count, reading_count
+                        FROM topics
+                        ORDER BY create_time DESC
+                    ''')
 
-                    haystack = f"{topic_id}\n{group_name}\n{row['title'] or ''}\n{topic_text}\n{mention_search_blob}".lower()
-                    if search_terms and not any(term in haystack for term in search_terms):
-                        continue
+                    topic_rows = cursor.fetchall()
+                    for row in topic_rows:
+                        topic_id = str(row["topic_id"])
+                        topic_text = ""
+                        if has_talks:
+                            cursor.execute("SELECT text FROM talks WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
+                            talk_row = cursor.fetchone()
+                            if talk_row and talk_row[0]:
+                                topic_text = str(talk_row[0])
+
+                        if not topic_text and has_questions:
+                            cursor.execute("SELECT text FROM questions WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
+                            q_row = cursor.fetchone()
+                            q_text = str(q_row[0]) if (q_row and q_row[0]) else ""
+                            a_text = ""
+                            if has_answers:
+                                cursor.execute("SELECT text FROM answers WHERE topic_id = ? LIMIT 1", (row["topic_id"],))
+                                a_row = cursor.fetchone()
+                                a_text = str(a_row[0]) if (a_row and a_row[0]) else ""
+                            topic_text = (q_text + ("\n" + a_text if a_text else "")).strip()
+
+                        if not topic_text:
+                            topic_text = str(row["title"] or "").strip()
+
+                        mention_search_blob = ""
+                        if search_terms and has_mentions:
+                            cursor.execute('''
+                                SELECT stock_code, stock_name
+                                FROM stock_mentions
+                                WHERE topic_id = ?
+                            ''', (row["topic_id"],))
+                            mention_search_blob = "\n".join(
+                                f"{m[0] or ''} {m[1] or ''}" for m in cursor.fetchall() if not is_excluded_stock(m[0], m[1])
+                            )
 
-                    mentions: List[Dict[str, Any]] = []
-                    latest_mention = row["create_time"]
-                    if has_mentions:
-                        cursor.execute('''
-                            SELECT sm.stock_code, sm.stock_name,
-                                   mp.return_1d, mp.return_3d, mp.return_5d, mp.return_10d, mp.return_20d,
-                                   mp.max_return, sm.mention_time
-                            FROM stock_mentions sm
-                            LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
-                            WHERE sm.topic_id = ?
-                            ORDER BY sm.mention_time DESC
-                        ''', (row["topic_id"],))
-                        raw_mentions = [dict(m) for m in cursor.fetchall() if not is_excluded_stock(m[0], m[1])]
-                        if raw_mentions:
-                            latest_mention = raw_mentions[0].get("mention_time") or latest_mention
-                            mentions = [
-                                {k: v for k, v in m.items() if k != "mention_time"}
-                                for m in raw_mentions
-                            ]
-
-                    all_topics.append({
-                        "group_id": group_id,
-                        "group_name": group_name,
-                        "topic_id": str(topic_id) if topic_id is not None else None,
-                        "create_time": row["create_time"],
-                        "latest_mention": latest_mention,
-                        "type": row["type"],
-                        "title": row["title"],
-                        "comments_count": row["comments_count"] or 0,
-                        "likes_count": row["likes_count"] or 0,
-                        "reading_count": row["reading_count"] or 0,
-                        "text": topic_text,
-                        "mentions": mentions,
-                    })
+                        haystack = f"{topic_id}\n{group_name}\n{row['title'] or ''}\n{topic_text}\n{mention_search_blob}".lower()
+                        if search_terms and not any(term in haystack for term in search_terms):
+                            continue
+
+                        mentions: List[Dict[str, Any]] = []
+                        latest_mention = row["create_time"]
+                        if has_mentions:
+                            cursor.execute('''
+                                SELECT sm.stock_code, sm.stock_name,
+                                       mp.return_1d, mp.return_3d, mp.return_5d, mp.return_10d, mp.return_20d,
+                                       mp.max_return, sm.mention_time
+                                FROM stock_mentions sm
+                                LEFT JOIN mention_performance mp ON sm.id = mp.mention_id
+                                WHERE sm.topic_id = ?
+                                ORDER BY sm.mention_time DESC
+                            ''', (row["topic_id"],))
+                            raw_mentions = [dict(m) for m in cursor.fetchall() if not is_excluded_stock(m[0], m[1])]
+                            if raw_mentions:
+                                latest_mention = raw_mentions[0].get("mention_time") or latest_mention
+                                mentions = [
+                                    {k: v for k, v in m.items() if k != "mention_time"}
+                                    for m in raw_mentions
+                                ]
+
+                        all_topics.append({
+                            "group_id": group_id,
+                            "group_name": group_name,
+                            "topic_id": str(topic_id) if topic_id is not None else None,
+                            "create_time": row["create_time"],
+                            "latest_mention": latest_mention,
+                            "type": row["type"],
+                            "title": row["title"],
+                            "comments_count": row["comments_count"] or 0,
+                            "likes_count": row["likes_count"] or 0,
+                            "reading_count": row["reading_count"] or 0,
+                            "text": topic_text,
+                            "mentions": mentions,
+                        })
             except Exception as e:
                 log_warning(f"白名单话题聚合失败(group={group_id}): {e}")
-            finally:
-                if conn:
-                    conn.close()
 
         all_topics.sort(key=lambda x: x.get("latest_mention") or x.get("create_time") or '', reverse=True)
         total = len(all_topics)
@@ -1828,7 +2367,7 @@ class GlobalAnalyzer:
             "whitelist_group_count": len(whitelist_ids),
             "items": all_topics[start_idx:end_idx]
         }
-        self._set_cache(cache_key, result)
+        self._set_cache(cache_key, result, db_version=db_version)
         return self._with_cache_hit(result, False)
 
 
@@ -1841,4 +2380,6 @@ def get_global_analyzer() -> GlobalAnalyzer:
     global _global_analyzer_instance
     if _global_analyzer_instance is None:
         _global_analyzer_instance = GlobalAnalyzer()
+        # 进程退出时关闭池化的常驻连接，WAL 读端干净释放
+        atexit.register(_global_analyzer_instance.close)
     return _global_analyzer_instance
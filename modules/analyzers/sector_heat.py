@@ -10,7 +10,12 @@ from __future__ import annotations
 
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import ahocorasick
+
+SectorMatcher = Callable[[str], Dict[str, List[str]]]
 
 
 def _normalize_date_str(day: Optional[str]) -> Optional[str]:
@@ -67,6 +72,52 @@ def build_topic_time_filter(
     return f"AND {' AND '.join(clauses)}", params
 
 
+# 全量板块表 + 各单板块表共用缓存，容量需覆盖全部板块
+@lru_cache(maxsize=32)
+def _compile_sector_matcher(frozen_keywords: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> SectorMatcher:
+    """把全部板块关键词编译为一个 Aho-Corasick 自动机，单次扫描文本即可命中所有板块。"""
+    sectors = [sector for sector, _ in frozen_keywords]
+    # 同一关键词可能属于多个板块，值记录 (板块序号, 关键词序号) 以还原原始顺序
+    positions: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for sector_idx, (_, keywords) in enumerate(frozen_keywords):
+        for kw_idx, kw in enumerate(keywords):
+            if kw:
+                positions[kw].append((sector_idx, kw_idx))
+
+    if not positions:
+        return lambda _text: {}
+
+    automaton = ahocorasick.Automaton()
+    for kw, pos in positions.items():
+        automaton.add_word(kw, tuple(pos))
+    automaton.make_automaton()
+
+    def _match(text_lower: str) -> Dict[str, List[str]]:
+        found = set()
+        for _, pos in automaton.iter(text_lower):
+            found.update(pos)
+        if not found:
+            return {}
+        hits: Dict[str, List[str]] = {}
+        for sector_idx, kw_idx in sorted(found):
+            hits.setdefault(sectors[sector_idx], []).append(frozen_keywords[sector_idx][1][kw_idx])
+        return hits
+
+    return _match
+
+
+def build_sector_matcher(sector_keywords: Dict[str, Sequence[str]]) -> SectorMatcher:
+    """返回板块关键词匹配函数（入参为已小写文本），相同关键词表复用同一自动机。
+
+    关键词在此统一小写一次，命中结果返回小写关键词。
+    """
+    frozen = tuple(
+        (str(sector), tuple(str(kw).lower() for kw in keywords))
+        for sector, keywords in sector_keywords.items()
+    )
+    return _compile_sector_matcher(frozen)
+
+
 def match_sector_keywords(
     text: str,
     sector_keywords: Dict[str, Sequence[str]],
@@ -75,34 +126,24 @@ def match_sector_keywords(
     text_lower = (text or "").lower()
     if not text_lower:
         return {}
+    return build_sector_matcher(sector_keywords)(text_lower)
 
-    hits: Dict[str, List[str]] = {}
-    for sector, keywords in sector_keywords.items():
-        matched = [kw for kw in keywords if kw in text_lower]
-        if matched:
-            hits[sector] = matched
-    return hits
 
-
-def aggregate_sector_heat(
-    topics: Iterable[Tuple[str, Any]],
-    sector_keywords: Dict[str, Sequence[str]],
+def aggregate_matched_sectors(
+    matched_topics: Iterable[Tuple[Iterable[str], Any]],
 ) -> List[Dict[str, Any]]:
-    """按帖子聚合板块热度。每条帖子命中某板块计 1 次。"""
+    """按帖子聚合已分类的板块命中 (sectors, create_time)。每条帖子命中某板块计 1 次。"""
     totals: Dict[str, int] = defaultdict(int)
     daily: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
 
-    for text, create_time in topics:
-        if not text:
+    for sectors, create_time in matched_topics:
+        if not sectors:
             continue
         date_key = str(create_time or "")[:10]
         if not date_key:
             continue
-        matched = match_sector_keywords(text, sector_keywords)
-        if not matched:
-            continue
 
-        for sector in matched.keys():
+        for sector in sectors:
             totals[sector] += 1
             daily[sector][date_key] += 1
 
@@ -126,3 +167,16 @@ def aggregate_sector_heat(
 
     results.sort(key=lambda x: (-int(x["total_mentions"]), str(x["sector"])))
     return results
+
+
+def aggregate_sector_heat(
+    topics: Iterable[Tuple[str, Any]],
+    sector_keywords: Dict[str, Sequence[str]],
+) -> List[Dict[str, Any]]:
+    """按帖子聚合板块热度。每条帖子命中某板块计 1 次。"""
+    matcher = build_sector_matcher(sector_keywords)
+    return aggregate_matched_sectors(
+        (matcher(text.lower()).keys(), create_time)
+        for text, create_time in topics
+        if text
+    )
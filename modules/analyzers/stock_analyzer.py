@@ -31,7 +31,7 @@ from modules.shared.trading_calendar import TradingCalendar
 from modules.shared.t0_board import compute_session_trade_date, build_t0_dual_board
 from modules.analyzers.market_data_providers import normalize_code
 from modules.analyzers.market_data_sync import MarketDataSyncService
-from modules.analyzers.sector_heat import build_topic_time_filter, aggregate_sector_heat
+from modules.analyzers.sector_heat import build_topic_time_filter, aggregate_sector_heat, build_sector_matcher
 
 
 # ========== 常量 ==========
@@ -3531,6 +3531,8 @@ class StockAnalyzer:
         page = max(1, int(page or 1))
         page_size = max(1, min(int(page_size or 20), 100))
         keywords = [kw.lower() for kw in SECTOR_KEYWORDS[sector]]
+        # 单板块自动机（按关键词表缓存），每篇正文只扫描一遍
+        match_sector = build_sector_matcher({sector: keywords})
 
         conn = self._get_conn()
         conn.row_factory = sqlite3.Row
@@ -3555,8 +3557,7 @@ class StockAnalyzer:
         matched_topics: List[Dict[str, Any]] = []
         for row in candidates:
             text = row['text'] or ''
-            text_lower = text.lower()
-            matched_keywords = [kw for kw in keywords if kw in text_lower]
+            matched_keywords = match_sector(text.lower()).get(sector)
             if not matched_keywords:
                 continue
 
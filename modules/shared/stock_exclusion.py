@@ -11,7 +11,7 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -115,27 +115,42 @@ def is_excluded_stock(stock_code: str | None, stock_name: str | None) -> bool:
     return False
 
 
-def build_sql_exclusion_clause(code_col: str, name_col: str) -> Tuple[str, List[Any]]:
+# 与 str.strip() 对齐的 SQL TRIM 字符集：空格、制表、换行、回车、垂直制表、换页与全角空格
+_SQL_TRIM_CHARS = "char(32, 9, 10, 13, 11, 12, 12288)"
+
+
+def _escape_like(text: str) -> str:
+    """转义 LIKE 通配符，配合 ESCAPE '\\' 按字面匹配"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def build_sql_exclusion_clause(code_col: Optional[str], name_col: str) -> Tuple[str, List[Any]]:
     """
     返回适用于 SQL WHERE 的排除子句（前置带 AND）
+
+    判定口径与 is_excluded_stock 一致：代码/名称去除首尾空白后比较，NULL 视为空串，
+    关键词按字面子串匹配（% 与 _ 不作通配符）。code_col 为 None 时只按名称规则过滤，
+    对应 is_excluded_stock(None, name)。
     """
     rules = _load_rules()
     parts: List[str] = []
     params: List[Any] = []
+    code_expr = f"UPPER(TRIM(COALESCE({code_col}, ''), {_SQL_TRIM_CHARS}))"
+    name_expr = f"LOWER(TRIM(COALESCE({name_col}, ''), {_SQL_TRIM_CHARS}))"
 
-    if rules["stock_codes"]:
+    if code_col is not None and rules["stock_codes"]:
         placeholders = ",".join(["?"] * len(rules["stock_codes"]))
-        parts.append(f"UPPER({code_col}) NOT IN ({placeholders})")
+        parts.append(f"{code_expr} NOT IN ({placeholders})")
         params.extend(sorted(rules["stock_codes"]))
 
     if rules["stock_names"]:
         placeholders = ",".join(["?"] * len(rules["stock_names"]))
-        parts.append(f"LOWER({name_col}) NOT IN ({placeholders})")
+        parts.append(f"{name_expr} NOT IN ({placeholders})")
         params.extend(sorted(rules["stock_names"]))
 
     for kw in sorted(rules["keywords"]):
-        parts.append(f"LOWER({name_col}) NOT LIKE ?")
-        params.append(f"%{kw}%")
+        parts.append(f"{name_expr} NOT LIKE ? ESCAPE '\\'")
+        params.append(f"%{_escape_like(kw)}%")
 
     if not parts:
         return "", []
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sqlite3
+
+from modules.accounts.account_info_db import AccountInfoDB
+
+
+def test_upsert_self_info_many_writes_and_updates_in_one_batch(tmp_path):
+    db = AccountInfoDB(str(tmp_path / "config.db"))
+    db.upsert_self_info("acc_1", {"name": "旧名"})
+
+    written = db.upsert_self_info_many([
+        ("acc_1", {"uid": "1", "name": "新名"}, {"resp_data": {}}),
+        ("acc_2", {"uid": "2", "name": "账号2"}, None),
+    ])
+
+    assert written == 2
+    assert db.get_self_info("acc_1")["name"] == "新名"
+    assert db.get_self_info("acc_1")["raw_json"] == {"resp_data": {}}
+    assert db.get_self_info("acc_2")["uid"] == "2"
+    assert db.upsert_self_info_many([]) == 0
+    db.close()
+
+
+def test_get_self_info_reads_on_thread_local_connections(tmp_path):
+    import threading
+
+    db = AccountInfoDB(str(tmp_path / "config.db"))
+    db.upsert_self_info("acc_1", {"name": "账号1"})
+
+    names = []
+    threads = [threading.Thread(target=lambda: names.append(db.get_self_info("acc_1")["name"])) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert names == ["账号1"] * 3
+    db.get_self_info("acc_1")
+    assert len(db._readers) == 1
+    db.close()
+    assert db._readers == []
+
+
+def test_reader_connections_are_closed_when_short_lived_threads_exit(tmp_path):
+    import gc
+    import threading
+
+    db = AccountInfoDB(str(tmp_path / "config.db"))
+    db.upsert_self_info("acc_1", {"name": "账号1"})
+
+    opened = []
+    original_reader = db._reader
+
+    def tracking_reader():
+        conn = original_reader()
+        if conn not in opened:
+            opened.append(conn)
+        return conn
+
+    db._reader = tracking_reader
+    for _ in range(50):
+        t = threading.Thread(target=lambda: db.get_self_info("acc_1"))
+        t.start()
+        t.join()
+    gc.collect()
+
+    assert len(opened) == 50
+    assert db._readers == []
+    for conn in opened:
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            continue
+        raise AssertionError("线程退出后读连接仍处于打开状态")
+    db.close()
+
+
+def test_raw_response_body_is_stored_verbatim(tmp_path):
+    db = AccountInfoDB(str(tmp_path / "config.db"))
+    body = '{"succeeded": true, "resp_data": {"user": {"name": "星球"}}}'.encode("utf-8")
+
+    db.upsert_self_info("acc_1", {"name": "星球"}, raw_json=body)
+
+    stored = db.conn.execute("SELECT raw_json FROM accounts_self").fetchone()[0]
+    assert stored == body.decode("utf-8")
+    assert db.get_self_info("acc_1")["raw_json"]["resp_data"]["user"]["name"] == "星球"
+    db.close()
+
+
+def test_non_utf8_raw_response_is_decoded_or_flagged(tmp_path, monkeypatch):
+    import modules.accounts.account_info_db as account_info_db
+
+    warnings = []
+    monkeypatch.setattr(account_info_db, "log_warning", warnings.append)
+    db = AccountInfoDB(str(tmp_path / "config.db"))
+
+    db.upsert_self_info("acc_1", {"name": "星球"}, raw_json='{"resp_data": {"name": "星球"}}'.encode("utf-16"))
+    assert db.get_self_info("acc_1")["raw_json"] == {"resp_data": {"name": "星球"}}
+    assert len(warnings) == 1
+
+    db.upsert_self_info("acc_2", {"name": "乱码"}, raw_json=b'{"name": "\xff\xfe\xfa"')
+    stored = db.conn.execute("SELECT raw_json FROM accounts_self WHERE account_id = 'acc_2'").fetchone()[0]
+    assert "\ufffd" in stored
+    assert len(warnings) == 2
+    db.close()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import pytest
+
+import modules.accounts.accounts_manager as accounts_manager
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    path = tmp_path / "accounts.json"
+    monkeypatch.setattr(accounts_manager, "_ACCOUNTS_FILE", str(path))
+    monkeypatch.setattr(accounts_manager, "_LEGACY_ACCOUNTS_FILE", str(tmp_path / "legacy.json"))
+    return path
+
+
+def test_returned_objects_do_not_mutate_store(store):
+    account = accounts_manager.add_account("cookie-aaaaaaaa", name="A")
+
+    accounts_manager.get_account_by_id(account["id"])["name"] = "dirty"
+
+    assert accounts_manager.get_account_by_id(account["id"])["name"] == "A"
+
+
+def test_masked_getters_hide_cookie_without_touching_store(store):
+    account = accounts_manager.add_account("abc", name="short")
+
+    assert accounts_manager.get_accounts()[0]["cookie"] == "***abc"
+    assert accounts_manager.get_account_for_group("1", mask_cookie=True)["cookie"] == "***abc"
+    assert accounts_manager.get_account_by_id(account["id"])["cookie"] == "abc"
+    assert accounts_manager._mask_cookie("") == ""
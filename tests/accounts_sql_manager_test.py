@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import time
+
+from modules.accounts.accounts_sql_manager import AccountsSQLManager
+
+
+def _add(manager: AccountsSQLManager, cookie: str) -> str:
+    account = manager.add_account(cookie)
+    time.sleep(0.002)  # 账号ID按毫秒生成
+    return account["id"]
+
+
+def test_account_for_group_prefers_mapping_then_first_account(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    assert manager.get_account_for_group("1") is None
+
+    first = _add(manager, "cookie-first-0001")
+    second = _add(manager, "cookie-second-002")
+    assert manager.get_account_for_group("1")["id"] == first
+
+    manager.assign_group_account("1", second)
+    assert manager.get_account_for_group("1")["id"] == second
+    assert manager.get_account_for_group("1", mask_cookie=True)["cookie"] == "***cond-002"
+    assert manager.get_account_for_group("2")["id"] == first
+
+    manager.delete_account(second)
+    assert manager.get_account_for_group("1")["id"] == first
+    manager.close()
+
+
+def test_schema_upgrade_adds_updated_at_once_and_records_version(tmp_path):
+    import sqlite3
+
+    db_path = tmp_path / "config.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE accounts (id TEXT PRIMARY KEY, name TEXT, cookie TEXT NOT NULL, "
+        "is_default INTEGER DEFAULT 0, created_at TEXT NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    AccountsSQLManager(str(db_path)).close()
+    manager = AccountsSQLManager(str(db_path))
+
+    columns = [row[1] for row in manager.conn.execute("PRAGMA table_info(accounts)")]
+    assert "updated_at" in columns
+    assert manager.conn.execute("PRAGMA user_version").fetchone()[0] == AccountsSQLManager.SCHEMA_VERSION
+    manager.close()
+
+
+def test_schema_init_skips_write_transaction_when_version_is_current(tmp_path, monkeypatch):
+    import sqlite3
+
+    import modules.accounts.accounts_sql_manager as accounts_sql_manager
+
+    db_path = str(tmp_path / "config.db")
+    AccountsSQLManager(db_path).close()
+
+    statements = []
+    real_connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(accounts_sql_manager.sqlite3, "connect", traced_connect)
+    manager = AccountsSQLManager(db_path)
+    manager.close()
+
+    assert not any(s.startswith(("BEGIN", "CREATE", "COMMIT")) for s in statements)
+
+
+def test_delete_and_assign_report_missing_accounts(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    account_id = _add(manager, "cookie-only-00001")
+
+    assert manager.assign_group_account("1", "acc_missing") == (False, "Account does not exist")
+    assert manager.get_group_account_mapping() == {}
+    assert manager.assign_group_account("1", account_id) == (True, "Assignment successful")
+
+    assert manager.delete_account("acc_missing") is False
+    assert manager.delete_account(account_id) is True
+    assert manager.get_group_account_mapping() == {}
+    manager.close()
+
+
+def test_transaction_commits_once_and_rolls_back_on_error(tmp_path):
+    import pytest
+
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    with manager.transaction():
+        first = _add(manager, "cookie-first-0001")
+        assert manager.assign_group_account("1", "acc_missing")[0] is False
+        manager.assign_group_account("1", first)
+        assert manager.conn.in_transaction
+    assert not manager.conn.in_transaction
+    assert manager.get_group_account_mapping() == {"1": first}
+
+    with pytest.raises(RuntimeError):
+        with manager.transaction():
+            manager.delete_account(first)
+            raise RuntimeError("boom")
+    assert manager.get_account_by_id(first) is not None
+    manager.close()
+
+
+def test_bulk_add_accounts_returns_ids_in_input_order(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+
+    ids = manager.bulk_add_accounts([
+        {"cookie": " cookie-a-000001 ", "name": "A", "is_default": True},
+        {"cookie": "cookie-b-000002"},
+    ])
+
+    assert len(set(ids)) == 2
+    assert manager.get_account_by_id(ids[0])["cookie"] == "cookie-a-000001"
+    assert manager.get_account_by_id(ids[1])["name"]
+    assert manager.bulk_add_accounts([]) == []
+    assert manager.count_accounts() == len(ids)
+    manager.close()
+
+
+def test_bulk_assign_group_accounts_upserts_all_pairs(tmp_path):
+    import sqlite3
+
+    import pytest
+
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    first, second = manager.bulk_add_accounts([{"cookie": "cookie-a-000001"}, {"cookie": "cookie-b-000002"}])
+    manager.assign_group_account("1", first)
+
+    assert manager.bulk_assign_group_accounts([("1", second), (2, first)]) == 2
+    assert manager.get_group_account_mapping() == {"1": second, "2": first}
+
+    with pytest.raises(sqlite3.IntegrityError):
+        manager.bulk_assign_group_accounts([("3", first), ("4", "acc_missing")])
+    assert "3" not in manager.get_group_account_mapping()
+    manager.close()
+
+
+def test_clear_all_accounts_removes_accounts_and_mappings(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    first, _ = manager.bulk_add_accounts([{"cookie": "cookie-a-000001"}, {"cookie": "cookie-b-000002"}])
+    manager.assign_group_account("1", first)
+
+    assert manager.clear_all_accounts() == 2
+    assert manager.get_accounts() == []
+    assert manager.get_group_account_mapping() == {}
+    manager.close()
+
+
+def test_nested_transaction_failure_only_rolls_back_inner_writes(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+
+    with manager.transaction():
+        kept = manager.bulk_add_accounts([{"cookie": "cookie-kept-0001"}])
+        try:
+            manager.bulk_add_accounts([{"cookie": "cookie-x-0000001"}, {"cookie": " "}])
+        except ValueError:
+            pass
+        try:
+            # executemany 中途违反外键：保存点回退本批已写入的行
+            manager.bulk_assign_group_accounts([("1", kept[0]), ("2", "acc_missing")])
+        except Exception:
+            pass
+
+    assert [acc["id"] for acc in manager.get_accounts()] == kept
+    assert manager.get_group_account_mapping() == {}
+    manager.close()
+
+
+def test_fast_bulk_load_restores_pragmas(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    before = manager.conn.execute("PRAGMA synchronous").fetchone()[0]
+
+    with manager.fast_bulk_load(), manager.transaction():
+        assert manager.conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        manager.bulk_add_accounts([{"cookie": "cookie-fast-0001"}])
+
+    assert manager.conn.execute("PRAGMA synchronous").fetchone()[0] == before
+    assert manager.count_accounts() == 1
+    manager.close()
+
+
+def test_suspended_indexes_are_recreated_after_bulk_load(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    query = "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name"
+    before = manager.conn.execute(query).fetchall()
+
+    with manager.transaction(), manager.suspended_indexes():
+        assert manager.conn.execute(query).fetchall() == []
+        manager.bulk_add_accounts([{"cookie": "cookie-idx-00001"}])
+
+    assert manager.conn.execute(query).fetchall() == before
+    assert manager.count_accounts() == 1
+    manager.close()
+
+
+def test_back_to_back_inserts_never_reuse_account_ids(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+
+    ids = []
+    for i in range(20):
+        ids += manager.bulk_add_accounts([{"cookie": f"cookie-burst-{i:04d}"}])
+    ids.append(manager.add_account("cookie-single-0001")["id"])
+
+    assert len(set(ids)) == len(ids) == manager.count_accounts()
+    manager.close()
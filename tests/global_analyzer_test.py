@@ -0,0 +1,830 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sqlite3
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+if "akshare" not in sys.modules:
+    sys.modules["akshare"] = types.ModuleType("akshare")
+
+from modules.analyzers.global_analyzer import _CACHE_MISS, GlobalAnalyzer, _hot_words_agg_sql
+
+
+def _prepare_group_db(db_path: str, group_id: str, mentions: list[tuple], talks: dict[int, str] | None = None) -> None:
+    """mentions: (topic_id, stock_code, stock_name, mention_date, return_5d)"""
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute("CREATE TABLE IF NOT EXISTS groups (group_id INTEGER PRIMARY KEY, name TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS topics (topic_id INTEGER PRIMARY KEY, create_time TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS talks (topic_id INTEGER PRIMARY KEY, text TEXT)")
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS stock_mentions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic_id INTEGER NOT NULL,
+            stock_code TEXT NOT NULL,
+            stock_name TEXT NOT NULL,
+            mention_date TEXT NOT NULL,
+            mention_time TEXT NOT NULL,
+            context_snippet TEXT
+        )
+        """
+    )
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS mention_performance (
+            mention_id INTEGER PRIMARY KEY,
+            stock_code TEXT NOT NULL,
+            mention_date TEXT NOT NULL,
+            return_5d REAL,
+            excess_return_5d REAL
+        )
+        """
+    )
+    cur.execute("INSERT INTO groups(group_id, name) VALUES(?, ?)", (int(group_id), f"群{group_id}"))
+    for topic_id, code, name, mention_date, ret in mentions:
+        cur.execute(
+            "INSERT OR IGNORE INTO topics(topic_id, create_time) VALUES(?, ?)",
+            (topic_id, f"{mention_date}T10:00:00.000+0800"),
+        )
+        cur.execute(
+            "INSERT INTO stock_mentions(topic_id, stock_code, stock_name, mention_date, mention_time) VALUES(?,?,?,?,?)",
+            (topic_id, code, name, mention_date, f"{mention_date}T10:00:00.000+0800"),
+        )
+        if ret is not None:
+            cur.execute(
+                "INSERT INTO mention_performance(mention_id, stock_code, mention_date, return_5d, excess_return_5d) VALUES(?,?,?,?,?)",
+                (cur.lastrowid, code, mention_date, ret, ret - 1.0),
+            )
+    for topic_id, text in (talks or {}).items():
+        cur.execute("INSERT INTO talks(topic_id, text) VALUES(?, ?)", (topic_id, text))
+    conn.commit()
+    conn.close()
+
+
+def _make_analyzer(
+    monkeypatch,
+    tmp_path,
+    group_mentions: dict[str, list[tuple]],
+    group_talks: dict[str, dict[int, str]] | None = None,
+) -> GlobalAnalyzer:
+    groups = []
+    for group_id, mentions in group_mentions.items():
+        db_path = str(tmp_path / f"zsxq_topics_{group_id}.db")
+        _prepare_group_db(db_path, group_id, mentions, (group_talks or {}).get(group_id))
+        groups.append({"group_id": group_id, "group_dir": str(tmp_path), "topics_db": db_path})
+
+    analyzer = GlobalAnalyzer()
+    monkeypatch.setattr(analyzer, "_get_all_group_dbs", lambda: list(groups))
+    monkeypatch.setattr(analyzer, "get_data_anchor_date", lambda: "2026-03-01")
+    return analyzer
+
+
+def test_pooled_connections_are_reused_until_invalidate(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)],
+            "1002": [(1, "600519.SH", "贵州茅台", "2026-02-21", -1.0)],
+        },
+    )
+    opened = []
+    real_open = analyzer._open_conn
+
+    def _counting_open(db_path):
+        opened.append(db_path)
+        return real_open(db_path)
+
+    monkeypatch.setattr(analyzer, "_open_conn", _counting_open)
+
+    first = analyzer.get_global_signals(min_mentions=1, start_date="2026-02-01")
+    analyzer._cache.clear()
+    second = analyzer.get_global_signals(min_mentions=1, start_date="2026-02-01")
+
+    assert len(first) == len(second) == 2
+    assert len(opened) == 2
+
+    analyzer.invalidate_cache()
+    assert analyzer._conn_pool == {}
+    analyzer.get_global_signals(min_mentions=1, start_date="2026-02-01")
+    assert len(opened) == 4
+    analyzer.close()
+
+
+def test_sector_heat_reuses_topic_classification_across_windows(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2026-02-20", 2.0),
+                (2, "000001.SZ", "平安银行", "2026-02-21", 1.0),
+            ],
+        },
+        {"1001": {1: "人形机器人订单落地", 2: "白酒提价"}},
+    )
+    scanned = []
+    import modules.analyzers.global_analyzer as global_analyzer_module
+
+    real_build = global_analyzer_module.build_sector_matcher
+
+    def _tracking_build(sector_keywords):
+        matcher = real_build(sector_keywords)
+
+        def _match(text_lower):
+            scanned.append(text_lower)
+            return matcher(text_lower)
+
+        return _match
+
+    monkeypatch.setattr(global_analyzer_module, "build_sector_matcher", _tracking_build)
+
+    heat = {item["sector"]: item for item in analyzer.get_global_sector_heat("2026-02-01", "2026-02-28")}
+    assert heat["机器人"]["mention_count"] == 1
+    assert heat["消费"]["daily_mentions"] == {"2026-02-21": 1}
+    assert len(scanned) == 2
+
+    analyzer.get_global_sector_heat("2026-02-15", "2026-02-28")
+    assert len(scanned) == 2
+    analyzer.close()
+
+
+def test_global_signals_counts_window_mentions_and_full_history_returns(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2025-12-01", 4.0),
+                (2, "000001.SZ", "平安银行", "2026-02-25", None),
+                (3, "000001.SZ", "平安银行", "2026-02-26", -2.0),
+                (3, "600519.SH", "贵州茅台", "2026-02-26", 1.0),
+            ],
+            "1002": [
+                (7, "000001.SZ", "平安银行", "2026-02-27", 3.0),
+                (8, "000001.SZ", "平安银行", "2026-02-28", None),
+            ],
+        },
+    )
+
+    signals = analyzer.get_global_signals(lookback_days=7, min_mentions=2, start_date="2026-02-20")
+
+    assert [s["stock_code"] for s in signals] == ["000001.SZ"]
+    top = signals[0]
+    assert top["mention_count"] == 4
+    assert top["group_count"] == 2
+    assert top["latest_mention"] == "2026-02-28"
+    assert top["historical_avg_return"] == round((4.0 - 2.0 + 3.0) / 3, 2)
+    assert top["historical_win_rate"] == round(2 / 3 * 100, 1)
+    assert top["weight"] == 8
+    analyzer.close()
+
+
+def test_finalized_cache_is_invalidated_by_group_db_changes(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]},
+    )
+
+    first = analyzer.get_global_stats()
+    cached = analyzer.get_global_stats()
+    assert first["_meta"]["cache_hit"] is False
+    assert cached["_meta"]["cache_hit"] is True
+
+    conn = sqlite3.connect(str(tmp_path / "zsxq_topics_1001.db"))
+    conn.execute(
+        "INSERT INTO stock_mentions(topic_id, stock_code, stock_name, mention_date, mention_time) VALUES(2,'600519.SH','贵州茅台','2026-02-21','2026-02-21T10:00:00.000+0800')"
+    )
+    conn.commit()
+    conn.close()
+
+    refreshed = analyzer.get_global_stats()
+    assert refreshed["_meta"]["cache_hit"] is False
+    assert refreshed["total_mentions"] == 2
+    analyzer.close()
+
+
+def test_finalized_cache_snapshots_db_version_before_query(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]},
+    )
+    original_get_db_version = analyzer._get_db_version
+    calls = {"n": 0}
+
+    def get_db_version_then_write():
+        version = original_get_db_version()
+        calls["n"] += 1
+        if calls["n"] == 1:
+            # 取得版本快照之后、查询完成之前发生写入
+            conn = sqlite3.connect(str(tmp_path / "zsxq_topics_1001.db"))
+            conn.execute(
+                "INSERT INTO stock_mentions(topic_id, stock_code, stock_name, mention_date, mention_time) VALUES(2,'600519.SH','贵州茅台','2026-02-21','2026-02-21T10:00:00.000+0800')"
+            )
+            conn.commit()
+            conn.close()
+        return version
+
+    monkeypatch.setattr(analyzer, "_get_db_version", get_db_version_then_write)
+
+    analyzer.get_global_stats()
+    # 结果记在写入前的版本下，下一次读取必须重新查询
+    assert analyzer.get_global_stats()["_meta"]["cache_hit"] is False
+    assert analyzer.get_global_stats()["_meta"]["cache_hit"] is True
+    analyzer.close()
+
+
+def test_versioned_cache_entries_still_expire_after_backstop_ttl(monkeypatch, tmp_path):
+    import modules.analyzers.global_analyzer as global_analyzer_module
+
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    now = [1000.0]
+    monkeypatch.setattr(global_analyzer_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(analyzer, "FINALIZED_CACHE_TTL_SECONDS", 900)
+
+    version = analyzer._get_db_version()
+    analyzer._set_cache("final", {"v": 1}, db_version=version)
+    now[0] += 899
+    assert analyzer._get_cached("final", version) == {"v": 1}
+    now[0] += 1
+    assert analyzer._get_cached("final", version) is _CACHE_MISS
+    analyzer.close()
+
+
+def test_stock_events_t0_backfill_runs_without_holding_pooled_connection(monkeypatch, tmp_path):
+    import os
+    import threading
+
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]},
+    )
+    db_path = str(tmp_path / "zsxq_topics_1001.db")
+    conn = sqlite3.connect(db_path)
+    for col in (
+        "return_1d REAL", "return_3d REAL", "return_10d REAL", "return_20d REAL",
+        "t0_buy_price REAL", "t0_buy_ts TEXT", "t0_buy_source TEXT",
+        "t0_end_price_rt REAL", "t0_end_price_rt_ts TEXT",
+        "t0_end_price_close REAL", "t0_end_price_close_ts TEXT",
+        "t0_return_rt REAL", "t0_return_close REAL", "t0_status TEXT", "t0_note TEXT",
+    ):
+        conn.execute(f"ALTER TABLE mention_performance ADD COLUMN {col}")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(
+        analyzer,
+        "market_store",
+        types.SimpleNamespace(close_finalize_time="15:05", get_symbol_day_snapshot_info=lambda **kwargs: {}),
+    )
+
+    lock_free_during_backfill = []
+
+    class _FakeStockAnalyzer:
+        def __init__(self, group_id):
+            self.group_id = group_id
+
+        def get_stock_events(self, stock_code, **kwargs):
+            _, lock = analyzer._conn_pool[os.path.abspath(db_path)]
+            def probe():
+                acquired = lock.acquire(blocking=False)
+                if acquired:
+                    lock.release()
+                lock_free_during_backfill.append(acquired)
+
+            prober = threading.Thread(target=probe)
+            prober.start()
+            prober.join()
+            writer = sqlite3.connect(db_path)
+            writer.execute(
+                "UPDATE mention_performance SET t0_buy_price = 10.0, t0_status = 'finalized' WHERE stock_code = ?",
+                (stock_code,),
+            )
+            writer.commit()
+            writer.close()
+
+    fake_module = types.ModuleType("modules.analyzers.stock_analyzer")
+    fake_module.StockAnalyzer = _FakeStockAnalyzer
+    monkeypatch.setitem(sys.modules, "modules.analyzers.stock_analyzer", fake_module)
+
+    result = analyzer.get_global_stock_events("000001.SZ", detail_mode="full")
+
+    assert lock_free_during_backfill == [True]
+    assert [e["t0_status"] for e in result["events"]] == ["finalized"]
+    assert result["events"][0]["t0_buy_price"] == 10.0
+    analyzer.close()
+
+
+def test_conn_pool_evicts_idle_connections_beyond_cap(monkeypatch, tmp_path):
+    import os
+
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {gid: [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)] for gid in ("1001", "1002", "1003")},
+    )
+    monkeypatch.setattr(analyzer, "CONN_POOL_MAX_ENTRIES", 2)
+    paths = [str(tmp_path / f"zsxq_topics_{gid}.db") for gid in ("1001", "1002", "1003")]
+
+    with analyzer._get_conn(paths[0]) as busy:
+        with analyzer._get_conn(paths[1]):
+            pass
+        with analyzer._get_conn(paths[2]):
+            pass
+        # 使用中的最久未用连接不被淘汰，改为淘汰空闲的次旧连接
+        assert list(analyzer._conn_pool) == [os.path.abspath(paths[0]), os.path.abspath(paths[2])]
+        assert busy.execute("SELECT COUNT(*) FROM stock_mentions").fetchone() == (1,)
+
+    with analyzer._get_conn(paths[1]):
+        pass
+    assert list(analyzer._conn_pool) == [os.path.abspath(paths[2]), os.path.abspath(paths[1])]
+    analyzer.close()
+
+
+def test_result_cache_evicts_least_recently_used_entries(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    monkeypatch.setattr(GlobalAnalyzer, "CACHE_MAX_ENTRIES", 2)
+
+    analyzer._set_cache("a", 1)
+    analyzer._set_cache("b", 2)
+    assert analyzer._get_cached("a") == 1
+    analyzer._set_cache("c", 3)
+
+    assert list(analyzer._cache.keys()) == ["a", "c"]
+    assert analyzer._get_cached("b") is _CACHE_MISS
+    analyzer.close()
+
+
+def test_global_win_rate_merges_groups_and_applies_date_window(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2026-01-05", 5.0),
+                (2, "000001.SZ", "平安银行", "2026-02-10", 2.0),
+                (3, "600519.SH", "贵州茅台", "2026-02-11", 1.0),
+            ],
+            "1002": [
+                (4, "000001.SZ", "平安银行", "2026-02-12", -1.0),
+                (5, "000001.SZ", "平安银行", "2026-02-13", None),
+            ],
+        },
+    )
+
+    monkeypatch.setattr(analyzer, "_fetch_group_win_rate_data", lambda *a, **k: pytest.fail("unexpected fallback"))
+
+    payload = analyzer.get_global_win_rate(min_mentions=2, return_period="return_5d", start_date="2026-02-01")
+
+    assert payload["total"] == 1
+    row = payload["data"][0]
+    assert row["stock_code"] == "000001.SZ"
+    assert row["mention_count"] == 2
+    assert row["win_rate"] == 50.0
+    assert row["avg_return"] == 0.5
+    assert row["avg_benchmark_return"] == 1.0
+    assert row["latest_mention"] == "2026-02-12"
+    assert sorted(row["groups"]) == ["1001", "1002"]
+
+    full = analyzer.get_global_win_rate(min_mentions=1, return_period="return_5d", sort_by="avg_return")
+    assert [r["stock_code"] for r in full["data"]] == ["000001.SZ", "600519.SH"]
+    assert full["data"][0]["mention_count"] == 3
+    analyzer.close()
+
+
+def test_scoped_group_list_is_memoized_until_invalidate(monkeypatch):
+    analyzer = GlobalAnalyzer()
+    calls = []
+
+    def _scan():
+        calls.append(1)
+        return [{"group_id": "1001", "topics_db": "/nonexistent.db"}]
+
+    monkeypatch.setattr(analyzer, "_get_scoped_group_dbs", _scan)
+    monkeypatch.setattr(analyzer, "_get_scan_filter_fingerprint", lambda: "fp")
+
+    assert analyzer._get_all_group_dbs() == analyzer._get_all_group_dbs()
+    assert len(calls) == 1
+
+    analyzer.invalidate_cache()
+    analyzer._get_all_group_dbs()
+    assert len(calls) == 2
+
+
+def test_global_win_rate_rejects_unknown_return_period(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-10", 2.0), (2, "000001.SZ", "平安银行", "2026-02-11", 1.0)]},
+    )
+
+    hostile = analyzer.get_global_win_rate(min_mentions=2, return_period="return_5d FROM stock_mentions --")
+    default = analyzer.get_global_win_rate(min_mentions=2, return_period="return_5d")
+
+    assert hostile["total"] == default["total"] == 1
+    assert hostile["data"][0]["avg_return"] == 1.5
+    analyzer.close()
+
+
+def test_groups_overview_attaches_group_dbs_in_batches(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0), (2, "600519.SH", "贵州茅台", "2026-02-22", -1.0)],
+            "1002": [(1, "000001.SZ", "平安银行", "2026-02-21", 3.0)],
+            "1003": [],
+        },
+    )
+    monkeypatch.setattr(GlobalAnalyzer, "ATTACH_BATCH_SIZE", 2)
+    monkeypatch.setattr(analyzer, "_overview_single_group", lambda group: pytest.fail("unexpected fallback"))
+
+    overview = {row["group_id"]: row for row in analyzer.get_groups_overview()}
+
+    assert set(overview) == {"1001", "1002", "1003"}
+    assert overview["1001"]["group_name"] == "群1001"
+    assert overview["1001"]["total_topics"] == 2
+    assert overview["1001"]["latest_topic"] == "2026-02-22T10:00:00.000+0800"
+    assert overview["1001"]["unique_stocks"] == 2
+    assert overview["1001"]["win_rate"] == 50.0
+    assert overview["1003"]["total_mentions"] == 0
+    assert overview["1003"]["win_rate"] is None
+    analyzer.close()
+
+
+def test_group_win_rate_fetch_returns_sql_partial_sums(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2026-02-10", 2.0),
+                (2, "000001.SZ", "平安银行", "2026-02-12", -1.0),
+                (3, "000001.SZ", "平安银行", "2026-02-13", None),
+            ],
+        },
+    )
+    group = analyzer._get_all_group_dbs()[0]
+
+    rows = analyzer._fetch_group_win_rate_data(group, "return_5d", "2026-02-01", "2026-02-28")
+
+    assert rows == [("000001.SZ", "平安银行", 2, 1, 1.0, 2, 2.0, "2026-02-12", "1001")]
+    analyzer.close()
+
+
+def test_sector_topics_only_loads_stocks_for_matched_topics(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2026-02-20", 2.0),
+                (1, "000001.SZ", "平安银行", "2026-02-20", 1.0),
+                (2, "600519.SH", "贵州茅台", "2026-02-21", 1.0),
+            ],
+        },
+        {"1001": {1: "人形机器人订单落地", 2: "白酒提价"}},
+    )
+
+    payload = analyzer.get_global_sector_topics("机器人", start_date="2026-02-01", end_date="2026-02-28")
+
+    assert payload["total"] == 1
+    item = payload["items"][0]
+    assert item["topic_id"] == "1"
+    assert item["matched_keywords"]
+    assert item["stocks"] == [{"stock_code": "000001.SZ", "stock_name": "平安银行"}]
+    analyzer.close()
+
+
+def test_sector_topics_related_stocks_are_loaded_in_chunks(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", "2026-02-20", 2.0),
+                (2, "600519.SH", "贵州茅台", "2026-02-21", 1.0),
+                (3, "000002.SZ", "万科A", "2026-02-22", 1.0),
+            ],
+        },
+        {"1001": {1: "人形机器人订单落地", 2: "机器人白酒", 3: "机器人地产"}},
+    )
+    monkeypatch.setattr(analyzer, "IN_QUERY_CHUNK_SIZE", 2)
+
+    payload = analyzer.get_global_sector_topics("机器人", start_date="2026-02-01", end_date="2026-02-28")
+
+    assert payload["total"] == 3
+    assert {item["topic_id"]: [s["stock_code"] for s in item["stocks"]] for item in payload["items"]} == {
+        "1": ["000001.SZ"],
+        "2": ["600519.SH"],
+        "3": ["000002.SZ"],
+    }
+    analyzer.close()
+
+
+def test_global_win_rate_pages_follow_full_sort_order(monkeypatch, tmp_path):
+    mentions = []
+    for idx, ret in enumerate([3.0, -2.0, 5.0, 1.0, 4.0], start=1):
+        mentions.append((idx, f"00000{idx}.SZ", f"股票{idx}", "2026-02-10", ret))
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": mentions})
+    raw_calls = []
+    raw_fetch = analyzer._get_cached_raw_win_rate
+    monkeypatch.setattr(analyzer, "_get_cached_raw_win_rate", lambda *a: raw_calls.append(a) or raw_fetch(*a))
+
+    pages = [
+        analyzer.get_global_win_rate(min_mentions=1, sort_by="avg_return", order="asc", page=page, page_size=2)
+        for page in (1, 2, 3)
+    ]
+
+    assert [r["avg_return"] for p in pages for r in p["data"]] == [-2.0, 1.0, 3.0, 4.0, 5.0]
+    assert all(p["total"] == 5 for p in pages)
+    assert pages[0]["data"][0]["groups"] == ["1001"]
+    # 排序结果缓存后，翻页只切片，不再取原始汇总重排
+    assert len(raw_calls) == 1
+    analyzer.close()
+
+
+def test_group_name_is_memoized_until_invalidate(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    db_path = str(tmp_path / "zsxq_topics_1001.db")
+
+    with analyzer._get_conn(db_path) as conn:
+        assert analyzer._get_group_name(conn, "1001") == "群1001"
+
+    writer = sqlite3.connect(db_path)
+    writer.execute("UPDATE groups SET name = '新群名' WHERE group_id = 1001")
+    writer.commit()
+    writer.close()
+
+    with analyzer._get_conn(db_path) as conn:
+        assert analyzer._get_group_name(conn, "1001") == "群1001"
+
+    analyzer.invalidate_cache()
+    with analyzer._get_conn(db_path) as conn:
+        assert analyzer._get_group_name(conn, "1001") == "新群名"
+    analyzer.close()
+
+
+def test_runtime_schema_adds_covering_indexes(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]})
+    db_path = str(tmp_path / "zsxq_topics_1001.db")
+
+    analyzer._ensure_db_runtime_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    plan = " ".join(
+        str(row[-1])
+        for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT sm.id FROM stock_mentions sm WHERE sm.stock_code = ? ORDER BY sm.mention_time DESC",
+            ("000001.SZ",),
+        )
+    )
+    # 统计信息就绪后（生产库由 PRAGMA optimize 维护），热词窗口查询只扫覆盖索引
+    conn.executemany(
+        "INSERT INTO stock_mentions(topic_id, stock_code, stock_name, mention_date, mention_time) VALUES(?,?,?,?,?)",
+        [(i, f"{i % 50:06d}.SZ", f"股票{i % 50}", f"2026-01-{1 + i % 28:02d}", "") for i in range(500)],
+    )
+    conn.execute("ANALYZE")
+    hot_plan = " ".join(
+        str(row[-1])
+        for row in conn.execute("EXPLAIN QUERY PLAN " + _hot_words_agg_sql(), ("2026-01-28", "2026-01-28T00:00:00"))
+    )
+    index_names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+
+    assert "COVERING INDEX idx_sm_date_hotword" in hot_plan
+    assert "idx_sm_code_time" in plan
+    assert "TEMP B-TREE" not in plan
+    assert {"idx_sm_date_code", "idx_mp_mention_ret5d"} <= index_names
+    analyzer.close()
+
+
+def test_invalidate_if_stale_keeps_entries_for_unchanged_dbs(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]},
+    )
+    analyzer.get_global_stats()
+    analyzer._set_cache("live", 1)
+    analyzer._sector_cache[("1001", 1)] = ("机器人",)
+
+    analyzer.invalidate_if_stale()
+    analyzer._sector_cache[("1001", 1)] = ("机器人",)
+    assert analyzer.invalidate_if_stale() == 0
+    assert analyzer.get_global_stats()["_meta"]["cache_hit"] is True
+    assert ("1001", 1) in analyzer._sector_cache
+
+    conn = sqlite3.connect(str(tmp_path / "zsxq_topics_1001.db"))
+    conn.execute(
+        "INSERT INTO stock_mentions(topic_id, stock_code, stock_name, mention_date, mention_time) VALUES(2,'600519.SH','贵州茅台','2026-02-21','2026-02-21T10:00:00.000+0800')"
+    )
+    conn.commit()
+    conn.close()
+
+    assert analyzer.invalidate_if_stale() == 1
+    assert ("1001", 1) not in analyzer._sector_cache
+    assert analyzer.get_global_stats()["total_mentions"] == 2
+    analyzer.close()
+
+
+def test_sector_cache_is_lru_bounded(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    monkeypatch.setattr(analyzer, "SECTOR_CACHE_MAX_ENTRIES", 2)
+
+    analyzer._remember_sectors({("1001", 1): ("机器人",), ("1001", 2): ()}, [])
+    analyzer._remember_sectors({("1001", 3): ("芯片",)}, [("1001", 1)])
+
+    assert list(analyzer._sector_cache) == [("1001", 1), ("1001", 3)]
+    analyzer.close()
+
+
+def test_ttl_cache_entries_expire_on_monotonic_clock(monkeypatch, tmp_path):
+    import modules.analyzers.global_analyzer as global_analyzer_module
+
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    now = [1000.0]
+    monkeypatch.setattr(global_analyzer_module.time, "monotonic", lambda: now[0])
+
+    analyzer._set_cache("live", {"v": 1}, ttl_seconds=60)
+    now[0] += 59
+    assert analyzer._get_cached("live") == {"v": 1}
+    now[0] += 1
+    assert analyzer._get_cached("live") is _CACHE_MISS
+    analyzer.close()
+
+
+@pytest.mark.parametrize("batch_size", [10, 1])
+def test_global_stats_counts_unique_stocks_across_attached_batches(monkeypatch, tmp_path, batch_size):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0), (2, "600519.SH", "贵州茅台", "2026-02-21", None)],
+            "1002": [(1, "000001.SZ", "平安银行", "2026-02-21", 3.0)],
+        },
+    )
+    monkeypatch.setattr(GlobalAnalyzer, "ATTACH_BATCH_SIZE", batch_size)
+    monkeypatch.setattr(analyzer, "_stats_single_group", lambda *a: pytest.fail("unexpected fallback"))
+
+    stats = analyzer.get_global_stats()
+
+    assert stats["group_count"] == 2
+    assert stats["total_topics"] == 3
+    assert stats["total_mentions"] == 3
+    assert stats["total_performance"] == 2
+    assert stats["unique_stocks"] == 2
+    analyzer.close()
+
+
+def test_win_rate_summary_is_shared_across_mention_thresholds(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {"1001": [(1, "000001.SZ", "平安银行", "2026-02-10", 2.0), (2, "000001.SZ", "平安银行", "2026-02-11", 1.0),
+                  (3, "600519.SH", "贵州茅台", "2026-02-12", 1.0)]},
+    )
+    fetches = []
+    real_fetch = analyzer._fetch_batch_win_rate_data
+
+    def _counting_fetch(*args, **kwargs):
+        fetches.append(1)
+        return real_fetch(*args, **kwargs)
+
+    monkeypatch.setattr(analyzer, "_fetch_batch_win_rate_data", _counting_fetch)
+
+    assert analyzer.get_global_win_rate(min_mentions=1)["total"] == 2
+    assert analyzer.get_global_win_rate(min_mentions=2)["total"] == 1
+    assert len(fetches) == 1
+    analyzer.close()
+
+
+def test_db_exists_is_memoized_until_invalidation(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": []})
+    missing = str(tmp_path / "later.db")
+    assert analyzer._db_exists(missing) is False
+
+    Path(missing).touch()
+    assert analyzer._db_exists(missing) is False
+
+    analyzer.invalidate_cache()
+    assert analyzer._db_exists(missing) is True
+
+
+@pytest.mark.parametrize("batch_size", [10, 1])
+def test_hot_words_dedup_topic_stock_within_window_in_sql(monkeypatch, tmp_path, batch_size):
+    from datetime import datetime, timedelta
+
+    from modules.analyzers.global_analyzer import BEIJING_TZ
+
+    today = datetime.now(BEIJING_TZ).strftime("%Y-%m-%d")
+    old = (datetime.now(BEIJING_TZ) - timedelta(days=30)).strftime("%Y-%m-%d")
+    analyzer = _make_analyzer(
+        monkeypatch,
+        tmp_path,
+        {
+            "1001": [
+                (1, "000001.SZ", "平安银行", today, None),
+                (1, "000001.SZ", "平安银行", today, None),
+                (2, "000001.SZ", "平安银行", today, None),
+                (3, "600519.SH", "贵州茅台", old, None),
+                (4, "000002.SZ", "排除样本", today, None),
+            ],
+            "1002": [(1, "000001.SZ", "平安银行", today, None)],
+        },
+    )
+    import modules.shared.stock_exclusion as stock_exclusion
+
+    exclude_file = tmp_path / "stock_exclude.json"
+    # 热词只按名称规则排除：代码规则命中的 000001.SZ 仍计入
+    exclude_file.write_text('{"keywords": ["排除"], "stock_codes": ["000001.SZ"]}', encoding="utf-8")
+    monkeypatch.setattr(stock_exclusion, "EXCLUDE_FILES", [exclude_file])
+    monkeypatch.setattr(GlobalAnalyzer, "ATTACH_BATCH_SIZE", batch_size)
+    monkeypatch.setattr(analyzer, "_get_conn", lambda *a: pytest.fail("unexpected fallback"))
+    # 固定写入 10:00，窗口取足 2 天保证今日提及全部落在窗口内
+    payload = analyzer._collect_hot_words_for_window(48, 10, normalize=False)
+
+    assert [(w["name"], w["raw_count"]) for w in payload["words"]] == [("平安银行", 3)]
+    assert payload["data_points_total"] == 3
+    analyzer.close()
+
+
+def test_scan_filter_fingerprint_rehashes_only_when_config_changes(monkeypatch, tmp_path):
+    import hashlib
+
+    import modules.analyzers.global_analyzer as global_analyzer_module
+    import modules.shared.group_scan_filter as group_scan_filter
+
+    config_file = tmp_path / "group_scan_filter.json"
+    config_file.write_text('{"whitelist": []}', encoding="utf-8")
+    monkeypatch.setattr(group_scan_filter, "CONFIG_FILE", str(config_file))
+    hashed = []
+    fake_hashlib = types.SimpleNamespace(
+        blake2b=lambda data, **kwargs: hashed.append(data) or hashlib.blake2b(data, **kwargs)
+    )
+    monkeypatch.setattr(global_analyzer_module, "hashlib", fake_hashlib)
+    analyzer = GlobalAnalyzer()
+
+    first = analyzer._get_scan_filter_fingerprint()
+    assert analyzer._get_scan_filter_fingerprint() == first
+    assert len(hashed) == 1
+
+    config_file.write_text('{"whitelist": ["1001"]}', encoding="utf-8")
+    assert analyzer._get_scan_filter_fingerprint() != first
+    assert len(hashed) == 2
+    analyzer.close()
+
+
+def test_stock_alias_file_is_rechecked_only_after_ttl(monkeypatch, tmp_path):
+    import os
+
+    import modules.analyzers.global_analyzer as global_analyzer_module
+
+    alias_file = tmp_path / "stock_aliases.json"
+    alias_file.write_text('{"茅台": "贵州茅台"}', encoding="utf-8")
+    monkeypatch.setattr(global_analyzer_module, "get_config_path", lambda name: tmp_path / name)
+    analyzer = GlobalAnalyzer()
+
+    assert analyzer._expand_stock_search_terms("茅台") == {"茅台", "贵州茅台"}
+
+    alias_file.write_text('{"茅台": "贵州茅台", "茅子": "贵州茅台"}', encoding="utf-8")
+    os.utime(alias_file, (1_900_000_000, 1_900_000_000))
+    assert analyzer._expand_stock_search_terms("茅台") == {"茅台", "贵州茅台"}
+
+    monkeypatch.setattr(GlobalAnalyzer, "ALIAS_STAT_TTL_SECONDS", 0)
+    assert analyzer._expand_stock_search_terms("茅台") == {"茅台", "贵州茅台", "茅子"}
+    assert analyzer._expand_stock_search_terms(" 贵州茅台 ") == {"茅台", "贵州茅台", "茅子"}
+    assert analyzer._expand_stock_search_terms("平安银行") == {"平安银行"}
+    analyzer.close()
+
+
+def test_runtime_schema_skips_ddl_when_tables_and_indexes_exist(monkeypatch, tmp_path):
+    analyzer = _make_analyzer(monkeypatch, tmp_path, {"1001": [(1, "000001.SZ", "平安银行", "2026-02-20", 2.0)]})
+    db_path = str(tmp_path / "zsxq_topics_1001.db")
+    analyzer._ensure_db_runtime_schema(db_path)
+
+    statements: list[str] = []
+    real_connect = sqlite3.connect
+
+    def tracing_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    # 新进程（清空初始化记忆）再次初始化：对象均已存在，不应再执行 DDL 或提交
+    monkeypatch.setattr(GlobalAnalyzer, "_initialized_dbs", set())
+    monkeypatch.setattr(sqlite3, "connect", tracing_connect)
+    analyzer._ensure_db_runtime_schema(db_path)
+
+    assert statements
+    assert not [stmt for stmt in statements if "CREATE" in stmt or stmt.strip() == "COMMIT"]
+    analyzer.close()
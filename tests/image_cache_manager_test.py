@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from app.runtime.image_cache_manager import ImageCacheManager, hash_urls_batch
+
+
+URL = "https://images.zsxq.com/a.png"
+
+
+def test_existing_cache_files_are_indexed_without_probing(tmp_path, monkeypatch):
+    key = hash_urls_batch([URL])[0]
+    (tmp_path / f"{key}.png").write_bytes(b"png")
+    manager = ImageCacheManager(str(tmp_path))
+
+    monkeypatch.setattr(Path, "exists", lambda self: (_ for _ in ()).throw(AssertionError("stat")))
+    assert manager.is_cached(URL)
+    assert manager.get_cached_path(URL) == tmp_path / f"{key}.png"
+
+
+def test_index_falls_back_to_disk_and_forgets_cleared_files(tmp_path):
+    manager = ImageCacheManager(str(tmp_path))
+    assert not manager.is_cached(URL)
+
+    # 其他进程写入的缓存文件同样可见
+    key = hash_urls_batch([URL])[0]
+    (tmp_path / key[:2]).mkdir()
+    (tmp_path / key[:2] / f"{key}.gif").write_bytes(b"gif")
+    assert manager.get_cached_path(URL) == tmp_path / key[:2] / f"{key}.gif"
+
+    assert manager.clear_cache()[0]
+    assert manager.get_cached_path(URL) is None
+
+
+def test_legacy_md5_named_files_still_resolve(tmp_path):
+    legacy = hashlib.md5(URL.encode("utf-8")).hexdigest()
+    (tmp_path / f"{legacy}.jpg").write_bytes(b"jpg")
+    manager = ImageCacheManager(str(tmp_path))
+
+    assert manager.get_cached_path(URL) == tmp_path / f"{legacy}.jpg"
+    assert manager._get_cache_key(URL) != legacy
+    assert len(manager._get_cache_key(URL)) == len(legacy)
+
+
+class _FakeResponse:
+    headers = {"content-type": "image/png"}
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield b"png"
+
+
+def test_download_many_preserves_order_and_skips_cached_urls(tmp_path):
+    other = "https://images.zsxq.com/b.png"
+    manager = ImageCacheManager(str(tmp_path))
+    (tmp_path / f"{manager._get_cache_key(URL)}.png").write_bytes(b"png")
+    manager._rebuild_index()
+
+    fetched = []
+    manager.session.get = lambda url, **kwargs: fetched.append(url) or _FakeResponse()
+
+    results = manager.download_and_cache_many([other, URL, other])
+
+    assert fetched == [other]
+    other_key = manager._get_cache_key(other)
+    assert [r[1] for r in results] == [
+        tmp_path / other_key[:2] / f"{other_key}.png",
+        tmp_path / f"{manager._get_cache_key(URL)}.png",
+        tmp_path / other_key[:2] / f"{other_key}.png",
+    ]
+    assert all(r[0] for r in results)
+
+
+def test_file_extension_prefers_content_type_then_url_suffix(tmp_path):
+    manager = ImageCacheManager(str(tmp_path))
+
+    assert manager._get_file_extension("image/webp; charset=binary", URL) == ".webp"
+    assert manager._get_file_extension("", "https://x.com/a/b.JPEG?x=1") == ".jpg"
+    assert manager._get_file_extension("", "https://x.com/a.b/c") == ".jpg"
+    assert manager._get_file_extension("", "https://x.com/a/b.gif") == ".gif"
+
+
+def test_group_managers_are_lru_bounded(tmp_path, monkeypatch):
+    import app.runtime.image_cache_manager as icm
+    from collections import OrderedDict
+
+    class _PathManager:
+        def get_group_data_dir(self, group_id):
+            return tmp_path / group_id
+
+    monkeypatch.setattr(icm, "_cache_managers", OrderedDict())
+    monkeypatch.setattr(icm, "_MAX_MANAGERS", 64)
+    monkeypatch.setattr("modules.shared.db_path_manager.get_db_path_manager", lambda: _PathManager())
+    icm.set_max_managers(2)
+
+    first = icm.get_image_cache_manager("g1")
+    icm.get_image_cache_manager("g2")
+    assert icm.get_image_cache_manager("g1") is first
+    icm.get_image_cache_manager("g3")
+
+    assert list(icm._cache_managers) == ["g1", "g3"]
+
+
+def test_evicted_manager_held_by_caller_still_resolves_legacy_files(tmp_path, monkeypatch):
+    import app.runtime.image_cache_manager as icm
+    from collections import OrderedDict
+
+    class _PathManager:
+        def get_group_data_dir(self, group_id):
+            return tmp_path / group_id
+
+    legacy_key = hashlib.md5(URL.encode("utf-8")).hexdigest()
+    (tmp_path / "g1" / "images").mkdir(parents=True)
+    (tmp_path / "g1" / "images" / f"{legacy_key}.png").write_bytes(b"old")
+
+    monkeypatch.setattr(icm, "_cache_managers", OrderedDict())
+    monkeypatch.setattr(icm, "_MAX_MANAGERS", 1)
+    monkeypatch.setattr("modules.shared.db_path_manager.get_db_path_manager", lambda: _PathManager())
+
+    held = icm.get_image_cache_manager("g1")
+    icm.get_image_cache_manager("g2")
+
+    assert "g1" not in icm._cache_managers
+    assert held.get_cached_path(URL) == tmp_path / "g1" / "images" / f"{legacy_key}.png"
+
+
+def test_cache_info_counters_follow_downloads_and_clear(tmp_path):
+    (tmp_path / "existing.jpg").write_bytes(b"12345")
+    manager = ImageCacheManager(str(tmp_path))
+    assert manager.get_cache_info()["total_files"] == 1
+
+    manager.session.get = lambda url, **kwargs: _FakeResponse()
+    manager.download_and_cache(URL)
+    info = manager.get_cache_info()
+    assert (info["total_files"], info["total_size"]) == (2, 8)
+
+    manager.clear_cache()
+    assert manager.get_cache_info()["total_files"] == 0
+
+
+def test_clear_cache_swaps_directory_out(tmp_path):
+    cache_dir = tmp_path / "images"
+    manager = ImageCacheManager(str(cache_dir))
+    for i in range(3):
+        (cache_dir / f"{i}.jpg").write_bytes(b"x")
+
+    ok, message = manager.clear_cache()
+
+    assert ok and "3" in message
+    assert cache_dir.is_dir() and list(cache_dir.iterdir()) == []
+
+
+def test_clear_cache_wait_leaves_parent_directory_empty(tmp_path):
+    cache_dir = tmp_path / "group" / "images"
+    manager = ImageCacheManager(str(cache_dir))
+    (cache_dir / "a.jpg").write_bytes(b"x")
+
+    assert manager.clear_cache(wait=True)[0]
+    cache_dir.rmdir()
+
+    assert list((tmp_path / "group").iterdir()) == []
+
+
+def test_stale_trash_directories_are_swept_on_startup(tmp_path):
+    import app.runtime.image_cache_manager as icm
+
+    stale = tmp_path / "images.old.12345.1"
+    (stale / "ab").mkdir(parents=True)
+    (stale / "ab" / "abcd.jpg").write_bytes(b"x")
+    (tmp_path / "other.old.1.1").mkdir()
+
+    ImageCacheManager(str(tmp_path / "images"))
+    worker = icm._pending_trash.get(str(stale))
+    if worker is not None:
+        worker.join(timeout=5)
+
+    assert not stale.exists()
+    assert (tmp_path / "other.old.1.1").is_dir()
+
+
+def test_new_files_are_sharded_and_reindexed_with_flat_legacy_files(tmp_path):
+    flat_url = "https://images.zsxq.com/flat.png"
+    flat_key = hash_urls_batch([flat_url])[0]
+    (tmp_path / f"{flat_key}.png").write_bytes(b"flat")
+    manager = ImageCacheManager(str(tmp_path))
+    manager.session.get = lambda url, **kwargs: _FakeResponse()
+
+    ok, path, _ = manager.download_and_cache(URL)
+    key = manager._get_cache_key(URL)
+    assert ok and path == tmp_path / key[:2] / f"{key}.png"
+
+    reopened = ImageCacheManager(str(tmp_path))
+    assert reopened.get_cached_path(URL) == path
+    assert reopened.get_cached_path(flat_url) == tmp_path / f"{flat_key}.png"
+    assert reopened.get_cache_info()["total_files"] == 2
+    assert reopened.clear_cache()[1] == "已删除 2 个缓存文件"
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from modules.accounts.accounts_sql_manager import AccountsSQLManager
+from modules.accounts.migrate_accounts_to_sql import _bulk_add_bisect
+
+
+def test_bulk_add_bisect_isolates_bad_accounts_and_keeps_the_rest(tmp_path):
+    manager = AccountsSQLManager(str(tmp_path / "config.db"))
+    accounts = [{"id": f"old_{i}", "cookie": f"cookie-migrate-{i:04d}"} for i in range(7)]
+    accounts[2]["cookie"] = ""
+    accounts[5]["cookie"] = " "
+
+    with manager.transaction():
+        id_mapping = _bulk_add_bisect(manager, accounts)
+
+    assert sorted(id_mapping) == ["old_0", "old_1", "old_3", "old_4", "old_6"]
+    assert manager.count_accounts() == 5
+    assert manager.get_account_by_id(id_mapping["old_4"])["cookie"] == "cookie-migrate-0004"
+    manager.close()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from modules.analyzers.sector_heat import aggregate_sector_heat, match_sector_keywords
+
+
+SECTOR_KEYWORDS = {
+    "机器人": ["机器人", "人形机器人", "宇树"],
+    "AI应用": ["大模型", "gpt"],
+    "消费": ["白酒"],
+}
+
+
+def test_match_sector_keywords_returns_all_overlapping_hits_in_keyword_order():
+    hits = match_sector_keywords("宇树发布人形机器人，接入GPT大模型", SECTOR_KEYWORDS)
+
+    assert list(hits.keys()) == ["机器人", "AI应用"]
+    assert hits["机器人"] == ["机器人", "人形机器人", "宇树"]
+    assert hits["AI应用"] == ["大模型", "gpt"]
+    assert match_sector_keywords("", SECTOR_KEYWORDS) == {}
+    assert match_sector_keywords("今天没有板块", SECTOR_KEYWORDS) == {}
+
+
+def test_aggregate_sector_heat_counts_each_topic_once_per_sector():
+    topics = [
+        ("机器人 机器人 白酒", "2026-02-01T10:00:00.000+0800"),
+        ("人形机器人", "2026-02-02T10:00:00.000+0800"),
+        ("白酒", ""),
+    ]
+
+    result = {item["sector"]: item for item in aggregate_sector_heat(topics, SECTOR_KEYWORDS)}
+
+    assert result["机器人"]["total_mentions"] == 2
+    assert result["机器人"]["daily_mentions"] == {"2026-02-01": 1, "2026-02-02": 1}
+    assert result["消费"]["total_mentions"] == 1
+    assert "AI应用" not in result
+
+
+def test_match_sector_keywords_lowercases_keywords_once():
+    hits = match_sector_keywords("OpenAI 发布新版 GPT", {"AI应用": ["GPT", "OpenAI"]})
+
+    assert hits == {"AI应用": ["gpt", "openai"]}
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sqlite3
+
+import modules.shared.stock_exclusion as stock_exclusion
+from modules.shared.stock_exclusion import build_sql_exclusion_clause, is_excluded_stock
+
+
+def test_sql_exclusion_clause_agrees_with_is_excluded_stock(monkeypatch):
+    rules = stock_exclusion._normalize_rules({
+        "keywords": ["st_", "100%"],
+        "stock_names": ["贵州茅台"],
+        "stock_codes": ["600000.SH"],
+    })
+    monkeypatch.setattr(stock_exclusion, "_load_rules", lambda: rules)
+
+    rows = [
+        (" 600000.sh ", "浦发银行"),
+        ("600519.SH", "　贵州茅台 "),
+        ("000001.SZ", "ST_华仪"),
+        ("000002.SZ", "STX华仪"),
+        ("000003.SZ", "100%科技"),
+        ("000004.SZ", "100x科技"),
+        ("000005.SZ", None),
+        ("000006.SZ", "平安银行"),
+    ]
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE stock_mentions (stock_code TEXT, stock_name TEXT)")
+    conn.executemany("INSERT INTO stock_mentions VALUES (?, ?)", rows)
+
+    clause, params = build_sql_exclusion_clause("stock_code", "stock_name")
+    kept = {
+        row[0]
+        for row in conn.execute(f"SELECT stock_code FROM stock_mentions WHERE 1 = 1{clause}", params)
+    }
+    conn.close()
+
+    assert kept == {code for code, name in rows if not is_excluded_stock(code, name)}
+    assert kept == {"000002.SZ", "000004.SZ", "000005.SZ", "000006.SZ"}